@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db.models import Count
+from drf_yasg.utils import swagger_serializer_method
 from accounts.models import CustomUser
 from profiles.api.v1.serializers import AddressSerializer
 from shipments.api.v1.serializers import ShipmentListSerializer
+from shipments.models import Shipment
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -61,12 +65,44 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'username', 'date_joined', 'last_login')
 
 
+class ShipmentCountsSerializer(serializers.Serializer):
+    """Number of shipments a user owns, in total and per payment status."""
+    total = serializers.IntegerField()
+    pending = serializers.IntegerField()
+    paid = serializers.IntegerField()
+
+
 class UserProfileSerializer(UserSerializer):
+    """
+    User profile with a bounded shipment summary: the most recent shipments
+    and per-status counts. The full history is served by the paginated
+    shipment list.
+    """
     addresses = AddressSerializer(many=True, read_only=True)
-    shipments = ShipmentListSerializer(many=True, read_only=True)
+    recent_shipments = serializers.SerializerMethodField()
+    shipment_counts = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ('addresses', 'shipments')
+        fields = UserSerializer.Meta.fields + ('addresses', 'recent_shipments', 'shipment_counts')
+
+    @swagger_serializer_method(serializer_or_field=ShipmentListSerializer(many=True))
+    def get_recent_shipments(self, obj):
+        shipments = Shipment.objects.for_list().filter(created_by=obj).order_by('-created_at', '-id')
+        return ShipmentListSerializer(
+            shipments[:settings.PROFILE_RECENT_SHIPMENTS], many=True, context=self.context
+        ).data
+
+    @swagger_serializer_method(serializer_or_field=ShipmentCountsSerializer)
+    def get_shipment_counts(self, obj):
+        counts = dict(
+            Shipment.objects.filter(created_by=obj)
+            .order_by()
+            .values_list('payment_status')
+            .annotate(count=Count('id'))
+        )
+        summary = {status: counts.get(status, 0) for status, _ in Shipment.PAYMENT_STATUS_CHOICES}
+        summary['total'] = sum(counts.values())
+        return summary
 
 
 class PasswordChangeSerializer(serializers.Serializer):
@@ -1,9 +1,13 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
+from cities_light.models import Country, City
+from profiles.models import Address
+from shipments.models import Shipper, Shipment
+from shipments.testing import QueryCountAssertionsMixin
 
 User = get_user_model()
 
@@ -99,6 +103,77 @@ class UserProfileTestCase(APITestCase):
         self.assertEqual(self.user.first_name, 'Updated')
 
 
+
+class UserProfileShipmentSummaryTestCase(QueryCountAssertionsMixin, APITestCase):
+    """Test the bounded shipment summary in the user profile."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country', code2='TC', code3='TCO')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='Test Address',
+            country=self.country,
+            city=self.city,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+        Address.objects.create(
+            user=self.user,
+            address='Test Address',
+            country=self.country,
+            city=self.city,
+            contact_number='1234567890'
+        )
+        self.create_shipments(3, payment_status='paid')
+        self.create_shipments(2)
+        self.client.force_authenticate(user=self.user)
+    
+    def create_shipments(self, count, **kwargs):
+        for _ in range(count):
+            Shipment.objects.create(
+                shipper=self.shipper,
+                created_by=self.user,
+                receiver_name='Test Receiver',
+                receiver_address='Test Receiver Address',
+                receiver_country=self.country,
+                receiver_city=self.city,
+                receiver_contact_person='Test Receiver Contact',
+                receiver_contact_number='0987654321',
+                quantity=1,
+                grossweight=1.0,
+                width=10.0,
+                length=10.0,
+                height=10.0,
+                item_description='Test Item',
+                **kwargs
+            )
+    
+    def get_profile(self):
+        # A fresh user each time, as for a real request, so no prefetch is reused
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        return self.client.get(reverse('profile'))
+    
+    @override_settings(PROFILE_RECENT_SHIPMENTS=2)
+    def test_profile_embeds_recent_shipments_and_counts(self):
+        """Test that the profile returns a bounded shipment summary."""
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('shipments', response.data)
+        self.assertEqual(len(response.data['recent_shipments']), 2)
+        self.assertEqual(response.data['shipment_counts'], {'pending': 2, 'paid': 3, 'total': 5})
+        self.assertEqual(response.data['addresses'][0]['city']['country']['name'], 'Test Country')
+    
+    def test_profile_query_count_does_not_grow(self):
+        """Test that the profile query count does not depend on the shipment history."""
+        self.assertQueryCountConstant(self.get_profile, lambda: self.create_shipments(20))
+
+
 class PasswordChangeTestCase(APITestCase):
     """Test password change API."""
     
@@ -7,6 +7,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, prefetch_related_objects
+from profiles.models import Address
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -111,12 +113,18 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
     
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        # Addresses with their country and city (and the city's country) in one query
+        prefetch_related_objects(
+            [user],
+            Prefetch('addresses', queryset=Address.objects.select_related('country', 'city__country'))
+        )
+        return user
     
     @swagger_auto_schema(
-        operation_description="Get current user profile",
+        operation_description="Get current user profile with recent shipments and shipment counts",
         responses={
-            200: openapi.Response('User profile', UserSerializer),
+            200: openapi.Response('User profile', UserProfileSerializer),
             401: 'Authentication required'
         }
     )
@@ -0,0 +1,213 @@
+"""
+Declarative response caching for public GET endpoints.
+
+``cache_response`` caches the rendered body of the successful responses of
+a DRF view handler in the default cache. The key is built from the request
+path and query parameters (or a key function), an optional data version,
+and the request headers the response can depend on: the credentials when
+the view authenticates, ``Accept`` when it can render several formats, and
+any ``vary_on_headers``. Cached responses carry an ETag, and a matching
+``If-None-Match`` is answered with 304 Not Modified.
+
+Hits and misses are counted per cache name in the current worker process.
+"""
+import asyncio
+import hashlib
+import inspect
+import os
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+RESPONSE_CACHE_PREFIX = 'core:response:'
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def _reset():
+    global _lock
+    _lock = threading.Lock()
+    _counters.clear()
+
+
+# Gunicorn workers are forked from a master that may have counted requests of its own
+os.register_at_fork(after_in_child=_reset)
+
+
+def record_cache_access(name, hit):
+    with _lock:
+        counters = _counters.setdefault(name, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def request_key(request):
+    """Return the path of a request with its query parameters in a canonical order."""
+    query = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(request.query_params.lists())
+        for value in sorted(values)
+    )
+    return f'{request.path}?{query}'
+
+
+def response_cache_key(name, key, version=None, headers=()):
+    """
+    Return the cache key of a cached response. ``headers`` are the
+    ``(header, value)`` pairs of the request the response varies on.
+    """
+    parts = [key, *(f'{header}={value}' for header, value in headers)]
+    digest = hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+    return f'{RESPONSE_CACHE_PREFIX}{name}:{version or ""}:{digest}'
+
+
+def get_vary_headers(view, vary_on_headers=()):
+    """Return the request headers a response of ``view`` depends on."""
+    headers = list(vary_on_headers)
+    if view.authentication_classes:
+        headers.append('Authorization')
+        if any(issubclass(authentication, SessionAuthentication) for authentication in view.authentication_classes):
+            headers.append('Cookie')
+    if len(view.renderer_classes) > 1:
+        headers.append('Accept')
+    return headers
+
+
+def _seconds(value):
+    return value() if callable(value) else value
+
+
+def cache_response(name, timeout, key=None, version=None, vary_on_headers=(), max_age=None):
+    """
+    Cache the successful responses of a DRF view handler, sync or async.
+
+    ``timeout`` and ``max_age`` are seconds, or callables returning them.
+    ``key(request)`` replaces the path and query parameters as the cache key,
+    and returning None from it bypasses the cache. A key names the response
+    on its own, so ``response_cache_key(name, key, version)`` can invalidate
+    it; a view varying on request headers cannot use one and raises
+    ImproperlyConfigured. ``version()``, which may
+    be a coroutine function for async handlers, returns the version of the
+    underlying data; bumping it invalidates every cached response at once.
+    ``max_age`` adds a ``Cache-Control`` lifetime for HTTP caches.
+    """
+    def get_key(request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        return key(request) if key else request_key(request)
+
+    def get_cache_key(view, request, request_part, data_version):
+        headers = get_vary_headers(view, vary_on_headers)
+        if key:
+            if headers:
+                raise ImproperlyConfigured(
+                    f'{type(view).__name__} varies on {", ".join(headers)}, so its "{name}" responses '
+                    f'cannot be cached under a key function, which must name them on its own.'
+                )
+            return response_cache_key(name, request_part, data_version)
+        values = [(header, request.headers.get(header, '')) for header in headers]
+        return response_cache_key(name, request_part, data_version, values)
+
+    def finish(view, response):
+        patch_vary_headers(response, get_vary_headers(view, vary_on_headers))
+        if max_age is not None and response.status_code in (200, 304):
+            # Responses for authenticated users must not be stored by shared HTTP caches
+            visibility = {'private': True} if view.authentication_classes else {'public': True}
+            patch_cache_control(response, max_age=_seconds(max_age), **visibility)
+        return response
+
+    def from_cache(view, request, entry):
+        response = get_conditional_response(request, etag=entry['etag'])
+        if response is None:
+            response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        return finish(view, response)
+
+    def store_after_render(view, response, cache_key):
+        def store(rendered):
+            if rendered.status_code != 200 or rendered.streaming or rendered.cookies:
+                return
+            etag = quote_etag(hashlib.sha256(rendered.content).hexdigest())
+            rendered['ETag'] = etag
+            cache.set(cache_key, {
+                'status': rendered.status_code,
+                'content': rendered.content,
+                'content_type': rendered['Content-Type'],
+                'etag': etag,
+            }, _seconds(timeout))
+
+        # DRF responses are rendered after the view returns, once the renderer is chosen
+        if isinstance(response, Response) and not response.is_rendered:
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return finish(view, response)
+
+    def decorator(handler):
+        if asyncio.iscoroutinefunction(handler):
+            @wraps(handler)
+            async def async_wrapper(view, request, *args, **kwargs):
+                request_part = get_key(request)
+                if request_part is None:
+                    return await handler(view, request, *args, **kwargs)
+                data_version = version() if version else None
+                if inspect.isawaitable(data_version):
+                    data_version = await data_version
+                cache_key = get_cache_key(view, request, request_part, data_version)
+                entry = await cache.aget(cache_key)
+                record_cache_access(name, entry is not None)
+                if entry is not None:
+                    return from_cache(view, request, entry)
+                response = await handler(view, request, *args, **kwargs)
+                return store_after_render(view, response, cache_key)
+
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            request_part = get_key(request)
+            if request_part is None:
+                return handler(view, request, *args, **kwargs)
+            cache_key = get_cache_key(view, request, request_part, version() if version else None)
+            entry = cache.get(cache_key)
+            record_cache_access(name, entry is not None)
+            if entry is not None:
+                return from_cache(view, request, entry)
+            response = handler(view, request, *args, **kwargs)
+            return store_after_render(view, response, cache_key)
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_metrics():
+    with _lock:
+        counters = {name: dict(values) for name, values in _counters.items()}
+    for values in counters.values():
+        total = values['hits'] + values['misses']
+        values['hit_ratio'] = round(values['hits'] / total, 4) if total else None
+    return {
+        'pid': os.getpid(),
+        'backend': settings.CACHES['default']['BACKEND'],
+        'responses': counters,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_metrics(request):
+    """
+    Response cache hits and misses of the worker process that serves the request.
+    """
+    return Response(get_cache_metrics())
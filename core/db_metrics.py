@@ -0,0 +1,97 @@
+"""
+Database connection metrics of the current worker process.
+
+Django keeps one connection per database alias and thread. With persistent
+connections (``CONN_MAX_AGE``) a connection should serve many requests
+before it is closed; ``requests_per_connection`` shows whether it does, and
+``open_connections`` how many server connections this worker holds, which,
+multiplied by the number of workers, is what counts against PostgreSQL's
+``max_connections`` (or PgBouncer's pool).
+"""
+import os
+import threading
+import time
+import weakref
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+_lock = threading.Lock()
+_started_at = time.time()
+_requests = 0
+_opened = {}
+# Connection wrappers of every thread, with the time their current connection was opened
+_connected_at = weakref.WeakKeyDictionary()
+
+
+def _reset():
+    global _lock, _started_at, _requests
+    _lock = threading.Lock()
+    _started_at = time.time()
+    _requests = 0
+    _opened.clear()
+    _connected_at.clear()
+
+
+# Gunicorn workers are forked from a master that may have counted its own connections
+os.register_at_fork(after_in_child=_reset)
+
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    global _requests
+    with _lock:
+        _requests += 1
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] = _opened.get(connection.alias, 0) + 1
+        _connected_at[connection] = time.monotonic()
+
+
+def get_connection_metrics():
+    now = time.monotonic()
+    with _lock:
+        requests = _requests
+        opened = dict(_opened)
+        wrappers = list(_connected_at.items())
+
+    databases = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        ages = [
+            now - connected_at for wrapper, connected_at in wrappers
+            if wrapper.alias == alias and wrapper.connection is not None
+        ]
+        databases[alias] = {
+            'vendor': connections[alias].vendor,
+            'host': settings_dict.get('HOST') or None,
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+            'connections_opened': opened.get(alias, 0),
+            'open_connections': len(ages),
+            'oldest_connection_age': round(max(ages), 3) if ages else None,
+            'requests_per_connection': round(requests / opened[alias], 2) if opened.get(alias) else None,
+        }
+    return {
+        'pid': os.getpid(),
+        'uptime': round(time.time() - _started_at, 3),
+        'requests': requests,
+        'databases': databases,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def connection_metrics(request):
+    """
+    Database connection metrics of the worker process that serves the request.
+    """
+    return Response(get_connection_metrics())
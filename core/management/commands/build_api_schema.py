@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.schema import build_schema_artifacts
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema and write it, with gzip-compressed copies, to API_SCHEMA_DIR.'
+
+    def handle(self, *args, **options):
+        written = build_schema_artifacts()
+        for path in written:
+            self.stdout.write(f'Wrote {path}')
+        self.stdout.write(self.style.SUCCESS(f'{len(written)} schema file(s) written.'))
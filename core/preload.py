@@ -0,0 +1,39 @@
+"""
+Work done once in the Gunicorn master before it forks its workers.
+
+With ``preload_app`` the master imports the project before forking, and the
+workers inherit its memory copy-on-write. Importing the heavy dependencies
+there as well (WeasyPrint and its font stack, cities_light, every view
+through the URLconf) means each worker starts with them already loaded and
+shares their pages, instead of paying for the imports and the memory again
+on its first request.
+"""
+import gc
+import importlib
+
+from django.db import connections
+from django.urls import get_resolver
+
+from .schema import get_schema_document
+
+PRELOAD_MODULES = (
+    'weasyprint',
+    'cities_light.models',
+    'shipments.utils.pdf_generator',
+    'shipments.autocomplete',
+)
+
+
+def preload():
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    # Resolving the URL patterns imports every view, serializer and admin module
+    get_resolver().url_patterns
+    # Load the precomputed API schema once, for all workers
+    get_schema_document('json')
+
+    # Sockets must not be shared between processes; each worker opens its own connections
+    connections.close_all()
+    # Keep the garbage collector of the workers from writing to, and so copying, the inherited objects
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,150 @@
+"""
+The OpenAPI schema, generated once and served as a precomputed artifact.
+
+Generating the schema introspects every view and serializer, far too much
+work to repeat for each request. ``build_api_schema`` writes the schema as
+JSON and YAML, each with a gzip-compressed copy, into ``API_SCHEMA_DIR``
+when the image is built. Each process loads the files once; they only change
+with a deploy. Without built files (or with DEBUG on, where code changes
+would leave them stale) the schema is generated in memory on first use.
+
+The schema is generated without a request, so it has no ``host``: clients
+use the host they fetched it from.
+"""
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer, SwaggerYAMLRenderer
+
+from .swagger import API_INFO, schema_view
+
+SCHEMA_CODECS = {
+    'json': OpenAPICodecJson,
+    'yaml': OpenAPICodecYaml,
+}
+
+# Spec renderers of the schema views and the artifact each one is served from
+SPEC_FORMATS = (
+    (SwaggerYAMLRenderer, 'yaml'),
+    (OpenAPIRenderer, 'json'),
+    (SwaggerJSONRenderer, 'json'),
+)
+
+_lock = threading.Lock()
+_documents = {}
+
+
+def get_schema_path(schema_format, compressed=False):
+    path = Path(settings.API_SCHEMA_DIR) / f'openapi.{schema_format}'
+    return path.with_name(path.name + '.gz') if compressed else path
+
+
+def compress(content):
+    # A fixed mtime keeps the compressed artifact identical between builds of the same schema
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def generate_schema():
+    """Generate the encoded schema in every format, as ``{format: bytes}``."""
+    generator = schema_view.generator_class(API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    return {schema_format: codec([]).encode(schema) for schema_format, codec in SCHEMA_CODECS.items()}
+
+
+def build_schema_artifacts():
+    """Write the schema files and their compressed copies; return the paths written."""
+    directory = Path(settings.API_SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for schema_format, content in generate_schema().items():
+        for path, data in (
+            (get_schema_path(schema_format), content),
+            (get_schema_path(schema_format, compressed=True), compress(content)),
+        ):
+            # Written aside and renamed, so a running process never reads a partial file
+            temporary = path.with_name(path.name + '.tmp')
+            temporary.write_bytes(data)
+            temporary.replace(path)
+            written.append(path)
+    _documents.clear()
+    return written
+
+
+def _load_documents():
+    use_artifacts = not settings.DEBUG and all(
+        get_schema_path(schema_format).exists() and get_schema_path(schema_format, compressed=True).exists()
+        for schema_format in SCHEMA_CODECS
+    )
+    if use_artifacts:
+        encoded = {schema_format: get_schema_path(schema_format).read_bytes() for schema_format in SCHEMA_CODECS}
+        compressed = {
+            schema_format: get_schema_path(schema_format, compressed=True).read_bytes()
+            for schema_format in SCHEMA_CODECS
+        }
+    else:
+        encoded = generate_schema()
+        compressed = {schema_format: compress(content) for schema_format, content in encoded.items()}
+
+    documents = {}
+    for schema_format, content in encoded.items():
+        digest = hashlib.sha256(content).hexdigest()
+        documents[schema_format] = {
+            'content': content,
+            'gzip': compressed[schema_format],
+            'etag': quote_etag(digest),
+            'gzip_etag': quote_etag(f'{digest}-gzip'),
+        }
+    return documents
+
+
+def get_schema_document(schema_format):
+    """Return the encoded schema in ``schema_format``, loading or generating it on first use."""
+    if not _documents:
+        with _lock:
+            if not _documents:
+                _documents.update(_load_documents())
+    return _documents[schema_format]
+
+
+def accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+
+class PrecomputedSchemaView(schema_view):
+    """
+    The API schema served from the precomputed artifact, compressed when the
+    client accepts it, and the documentation UIs.
+    """
+
+    def get(self, request, version='', format=None):
+        renderer = request.accepted_renderer
+        schema_format = next(
+            (schema_format for renderer_class, schema_format in SPEC_FORMATS if isinstance(renderer, renderer_class)),
+            None
+        )
+        if schema_format is None:
+            # The UI pages are rendered without the endpoints and load the schema separately
+            return super().get(request, version, format)
+
+        document = get_schema_document(schema_format)
+        compressed = accepts_gzip(request)
+        etag = document['gzip_etag'] if compressed else document['etag']
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                document['gzip'] if compressed else document['content'],
+                content_type=f'{renderer.media_type}; charset=utf-8'
+            )
+            if compressed:
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_MAX_AGE)
+        return response
@@ -15,6 +15,7 @@ from decouple import config
 import os
 
 from django.conf.global_settings import AUTH_USER_MODEL
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,9 +28,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-lv6gcgf_yr48=mw_ir7@rgx#1n-9mlrmkw_+rr#onxei8ia__l')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=False, cast=bool)
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='*', cast=lambda v: [s.strip() for s in v.split(',')])
 
 
 # Application definition
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core',
     'shipments',
     'accounts',
     'profiles',
@@ -97,8 +99,45 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Keep connections open across requests for this many seconds (0: close after every request),
+        # checking before reuse that the server has not dropped them
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # Required behind PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
+    }
+}
+
+
+# Cache
+# 'locmem' keeps a separate cache in every worker process, 'file' shares one between the workers
+# of a host, and 'redis' (any Redis-compatible server; needs the redis package) between all hosts.
+# Cached tracking and reference data are invalidated on change, which only reaches every worker
+# with a shared cache.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'shipment-tracking'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/tmp/shipment-tracking-cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND must be one of: {", ".join(CACHE_BACKENDS)}.')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default='') or CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='shipment-tracking'),
     }
 }
+# Entries the locmem and file caches hold before culling a third of them (Django's default is 300);
+# Redis is bounded by its own maxmemory instead
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int)}
 
 
 # Password validation
@@ -136,6 +175,9 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# collectstatic gathers everything here; in production the web server serves it, not Django
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+STATICFILES_DIRS = [BASE_DIR / 'static']
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -154,7 +196,7 @@ CITIES_LIGHT_GEONAMES_USERNAME = 'rezayadegari'
 
 # Media files configuration
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = Path(config('MEDIA_ROOT', default=str(BASE_DIR / 'media')))
 
 # DRF Configuration
 REST_FRAMEWORK = {
@@ -220,6 +262,9 @@ CORS_ALLOWED_ORIGINS = config(
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Behind the reverse proxy, which terminates TLS and says so in X-Forwarded-Proto
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
 # Swagger Configuration
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -256,4 +301,62 @@ CITIES_LIGHT_INCLUDE_CITY_TYPES = [
     'PPLA3',  # Populated place (admin level 3)
     'PPLA4',  # Populated place (admin level 4)
     'PPLC',   # Populated place (capital)
-]
\ No newline at end of file
+]
+
+# Shipment Configuration
+# Tracking numbers reserved per worker process with a single sequence round trip
+SHIPMENT_NUMBER_BLOCK_SIZE = config('SHIPMENT_NUMBER_BLOCK_SIZE', default=100, cast=int)
+
+# Seconds a public tracking response stays cached; saving a shipment invalidates it
+TRACKING_CACHE_TIMEOUT = config('TRACKING_CACHE_TIMEOUT', default=300, cast=int)
+
+# Maximum number of tracking numbers accepted by one bulk tracking request
+TRACKING_BULK_MAX_NUMBERS = config('TRACKING_BULK_MAX_NUMBERS', default=500, cast=int)
+
+# Rendered PDFs are cached on disk; bump the template version after editing a PDF template
+PDF_CACHE_DIR = MEDIA_ROOT / 'pdf_cache'
+PDF_TEMPLATE_VERSION = config('PDF_TEMPLATE_VERSION', default='1')
+
+# Seconds before a running PDF render job is considered abandoned and claimed again
+PDF_RENDER_JOB_TIMEOUT = config('PDF_RENDER_JOB_TIMEOUT', default=300, cast=int)
+# Claims of an abandoned job before it is marked failed
+PDF_RENDER_JOB_MAX_ATTEMPTS = config('PDF_RENDER_JOB_MAX_ATTEMPTS', default=3, cast=int)
+# Seconds done and failed render jobs are kept before the workers delete them
+PDF_RENDER_JOB_RETENTION = config('PDF_RENDER_JOB_RETENTION', default=86400, cast=int)
+
+# Largest batch rendered into a single label PDF; bigger batches must be streamed
+LABEL_BATCH_MAX_SHIPMENTS = config('LABEL_BATCH_MAX_SHIPMENTS', default=500, cast=int)
+
+
+# Load PDF fonts and stylesheets when the WSGI application starts instead of on the first PDF request
+PDF_WARM_UP_ON_STARTUP = config('PDF_WARM_UP_ON_STARTUP', default=False, cast=bool)
+
+# How barcodes are embedded in PDFs: 'svg' (inline vector markup) or 'png' (base64 image)
+PDF_BARCODE_FORMAT = config('PDF_BARCODE_FORMAT', default='svg')
+# Barcodes memoized per process, keyed by AWB number
+PDF_BARCODE_CACHE_SIZE = config('PDF_BARCODE_CACHE_SIZE', default=1024, cast=int)
+
+# Number of recent shipments embedded in the user profile; the full history is paginated
+PROFILE_RECENT_SHIPMENTS = config('PROFILE_RECENT_SHIPMENTS', default=10, cast=int)
+
+# Country/city list responses are cached until cities_light data changes; clients may reuse them this long
+REFERENCE_DATA_CACHE_TIMEOUT = config('REFERENCE_DATA_CACHE_TIMEOUT', default=86400, cast=int)
+REFERENCE_DATA_MAX_AGE = config('REFERENCE_DATA_MAX_AGE', default=86400, cast=int)
+
+# Largest batch accepted by the bulk shipment endpoint, and rows written per INSERT
+SHIPMENT_BULK_MAX_ITEMS = config('SHIPMENT_BULK_MAX_ITEMS', default=5000, cast=int)
+SHIPMENT_BULK_BATCH_SIZE = config('SHIPMENT_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Rows fetched per query when exporting shipments
+SHIPMENT_EXPORT_CHUNK_SIZE = config('SHIPMENT_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Largest batch of scan events accepted by the ingestion endpoint, and events shown when tracking
+TRACKING_EVENT_BATCH_MAX_ITEMS = config('TRACKING_EVENT_BATCH_MAX_ITEMS', default=1000, cast=int)
+TRACKING_RECENT_EVENTS = config('TRACKING_RECENT_EVENTS', default=10, cast=int)
+
+# Seconds an event's occurred_at may lie ahead of the server clock, to allow for scanner clock skew
+TRACKING_EVENT_MAX_FUTURE = config('TRACKING_EVENT_MAX_FUTURE', default=3600, cast=int)
+
+# Where build_api_schema writes the precomputed OpenAPI schema; clients may reuse it this long
+API_SCHEMA_DIR = config('API_SCHEMA_DIR', default=str(BASE_DIR / 'build' / 'openapi'))
+API_SCHEMA_MAX_AGE = config('API_SCHEMA_MAX_AGE', default=300, cast=int)
@@ -2,11 +2,10 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Shipment Tracking API",
-        default_version='v1',
-        description="""
+API_INFO = openapi.Info(
+    title="Shipment Tracking API",
+    default_version='v1',
+    description="""
         A comprehensive API for shipment tracking and management system.
         
         ## Features
@@ -36,11 +35,17 @@ schema_view = get_schema_view(
         ## Admin Endpoints
         - Detailed PDF generation
         - Label PDF generation
-        """,
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@shipmenttracking.com"),
-        license=openapi.License(name="MIT License"),
-    ),
+    """,
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@shipmenttracking.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+schema_view = get_schema_view(
+    API_INFO,
     public=True,
     permission_classes=[permissions.AllowAny],
+    # The schema is public and the same for every user
+    authentication_classes=[],
 )
+
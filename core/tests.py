@@ -0,0 +1,203 @@
+import base64
+import gzip
+import json
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+from . import schema
+from .cache import cache_response, get_cache_metrics
+
+User = get_user_model()
+
+
+class ConnectionMetricsTestCase(APITestCase):
+    """Test the database connection metrics endpoint."""
+
+    def setUp(self):
+        self.url = reverse('connection-metrics')
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_metrics_require_admin(self):
+        """Test that only staff users can read the metrics."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_of_this_worker(self):
+        """Test that the metrics describe the connections of the current process."""
+        # Pretend the test connection was opened now, as a worker would on its first request
+        connection = connections['default']
+        connection_created.send(sender=connection.__class__, connection=connection)
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data['requests'], 1)
+        default = response.data['databases']['default']
+        self.assertEqual(default['vendor'], connection.vendor)
+        self.assertGreaterEqual(default['connections_opened'], 1)
+        self.assertGreaterEqual(default['open_connections'], 1)
+        self.assertIsNotNone(default['oldest_connection_age'])
+        self.assertIsNotNone(default['requests_per_connection'])
+
+
+class CountingView(APIView):
+    authentication_classes = [BasicAuthentication]
+    permission_classes = [AllowAny]
+    calls = 0
+
+    @cache_response('counting', timeout=60)
+    def get(self, request):
+        CountingView.calls += 1
+        return Response({'user': request.user.username, 'page': request.query_params.get('page')})
+
+
+class KeyedCountingView(CountingView):
+    @cache_response('keyed', timeout=60, key=lambda request: request.query_params.get('page'))
+    def get(self, request):
+        return Response({'page': request.query_params.get('page')})
+
+
+class ResponseCacheTestCase(APITestCase):
+    """Test the declarative response cache."""
+
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        self.view = CountingView.as_view()
+        self.factory = APIRequestFactory()
+        User.objects.create_user(username='alice', password='alicepass123')
+        User.objects.create_user(username='bob', password='bobpass123')
+
+    def get(self, path='/counting/', credentials=None, **headers):
+        if credentials:
+            headers['HTTP_AUTHORIZATION'] = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+        response = self.view(self.factory.get(path, **headers))
+        # Cache hits come back already rendered
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def hits(self, name):
+        return get_cache_metrics()['responses'].get(name, {}).get('hits', 0)
+
+    def test_repeat_request_is_a_hit(self):
+        """Test that a repeated request is served from the cache and counted as a hit."""
+        hits = self.hits('counting')
+        first = self.get('/counting/?page=1')
+        second = self.get('/counting/?page=1')
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.hits('counting'), hits + 1)
+
+    def test_query_parameters_and_credentials_vary(self):
+        """Test that responses are cached per query string and per credentials."""
+        self.get('/counting/?page=1')
+        self.get('/counting/?page=2')
+        alice = self.get(credentials='alice:alicepass123')
+        bob = self.get(credentials='bob:bobpass123')
+        self.assertEqual(CountingView.calls, 4)
+        self.assertIn(b'alice', alice.content)
+        self.assertIn(b'bob', bob.content)
+        self.assertIn('Authorization', alice['Vary'])
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test that a cached response answers a matching If-None-Match with 304."""
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_key_function_requires_no_header_variation(self):
+        """Test that a view varying on request headers cannot name its responses with a key function."""
+        with self.assertRaises(ImproperlyConfigured):
+            KeyedCountingView.as_view()(self.factory.get('/keyed/?page=1'))
+
+    def test_cache_metrics_endpoint(self):
+        """Test that staff users can read the response cache counters."""
+        self.get()
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('cache-metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('counting', response.data['responses'])
+
+
+class PrecomputedSchemaTestCase(APITestCase):
+    """Test serving the API schema from the built artifacts."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(API_SCHEMA_DIR=directory.name, DEBUG=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(schema._documents.clear)
+        call_command('build_api_schema', stdout=StringIO())
+        self.url = reverse('schema-json') + '?format=openapi'
+
+    def test_schema_is_served_from_artifact(self):
+        """Test that the schema is the built file, not regenerated per request."""
+        schema.get_schema_path('json').write_bytes(b'{"swagger": "2.0", "built": true}')
+        schema._documents.clear()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {'swagger': '2.0', 'built': True})
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_built_schema_lists_endpoints(self):
+        """Test that the built schema describes the API."""
+        document = json.loads(schema.get_schema_path('json').read_bytes())
+        self.assertIn('/v1/shipments/track/', ''.join(document['paths']))
+
+    def test_gzip_when_accepted(self):
+        """Test that clients accepting gzip get the compressed artifact."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), schema.get_schema_path('json').read_bytes())
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test that a matching If-None-Match is answered with 304."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_yaml_format(self):
+        """Test that the YAML schema is served from its own artifact."""
+        response = self.client.get(reverse('schema-json') + '?format=.yaml')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, schema.get_schema_path('yaml').read_bytes())
+
+    def test_documentation_ui(self):
+        """Test that the Swagger UI page still renders."""
+        response = self.client.get(reverse('schema-swagger-ui'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -18,20 +18,26 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from .swagger import schema_view
+from .cache import cache_metrics
+from .db_metrics import connection_metrics
+from .schema import PrecomputedSchemaView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # API Documentation
-    path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path('api/schema/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    path('api/docs/', PrecomputedSchemaView.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('api/redoc/', PrecomputedSchemaView.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('api/schema/', PrecomputedSchemaView.without_ui(cache_timeout=0), name='schema-json'),
     
     # API URLs
     path('api/v1/accounts/', include('accounts.api.v1.urls')),
     path('api/v1/shipments/', include('shipments.api.v1.urls')),
     path('api/v1/profiles/', include('profiles.api.v1.urls')),
+    
+    # Monitoring
+    path('api/metrics/connections/', connection_metrics, name='connection-metrics'),
+    path('api/metrics/cache/', cache_metrics, name='cache-metrics'),
 ]
 
 # Serve media files in development
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+if settings.PDF_WARM_UP_ON_STARTUP:
+    # Load fonts and compile PDF stylesheets before the first request pays for it
+    from shipments.utils.pdf_generator import warm_up_pdf_renderer
+
+    warm_up_pdf_renderer()
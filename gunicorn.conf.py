@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for production, read from the working directory.
+
+    gunicorn                                    # core.wsgi on threaded workers
+    GUNICORN_APP=core.asgi:application GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn
+
+Every setting can be overridden with an environment variable.
+"""
+import multiprocessing
+import os
+
+from decouple import config
+
+wsgi_app = config('GUNICORN_APP', default='core.wsgi:application')
+bind = config('GUNICORN_BIND', default='0.0.0.0:8002')
+
+# Pre-forked worker processes, each serving requests on a few threads. Threads overlap the
+# database and cache round trips of API requests; processes are what PDF rendering scales with.
+# Uvicorn workers ignore the threads: async views run on their event loop, sync views in a thread pool.
+workers = config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = config('GUNICORN_THREADS', default=4, cast=int)
+worker_class = config('GUNICORN_WORKER_CLASS', default='gthread')
+
+# Large label batches take a while to render
+timeout = config('GUNICORN_TIMEOUT', default=120, cast=int)
+graceful_timeout = config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Restart each worker after this many requests so slow memory growth cannot build up;
+# the jitter keeps the workers from all restarting at once
+max_requests = config('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = config('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+# Load the application in the master so workers share its memory, see on_starting
+preload_app = config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Worker heartbeat files on tmpfs rather than on the container's overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = config('GUNICORN_ACCESS_LOG', default='-')
+errorlog = '-'
+loglevel = config('GUNICORN_LOG_LEVEL', default='info')
+
+
+def on_starting(server):
+    # With preload_app the application, and so Django, is already loaded at this point
+    if server.cfg.preload_app:
+        from core.preload import preload
+
+        preload()
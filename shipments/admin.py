@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from .models import Shipper, Shipment, ShipmentImage
+from .models import Shipper, Shipment, ShipmentImage, PDFRenderJob, TrackingEvent
 
 
 @admin.register(Shipper)
@@ -22,18 +25,64 @@ class ShipperAdmin(admin.ModelAdmin):
     )
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads the row count of an unfiltered PostgreSQL table from
+    the planner statistics instead of running ``COUNT(*)``. Small tables and
+    filtered changelists are still counted exactly.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[self.object_list.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                        [query.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_threshold:
+                    return row[0]
+        return super().count
+
+
 class ShipmentImageInline(admin.TabularInline):
     model = ShipmentImage
     extra = 1
 
 
+class TrackingEventInline(admin.TabularInline):
+    """Read-only timeline; events are recorded through the ingestion API."""
+    model = TrackingEvent
+    fields = ('occurred_at', 'status', 'location', 'description', 'source', 'recorded_at')
+    readonly_fields = fields
+    ordering = ('-occurred_at', '-id')
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Shipment)
 class ShipmentAdmin(admin.ModelAdmin):
-    list_display = ('awb_number', 'shipper', 'receiver_name', 'receiver_city', 'pdf_buttons')
-    list_filter = ('product_type', 'service', 'receiver_country', 'receiver_city')
+    list_display = ('awb_number', 'shipper', 'receiver_name', 'receiver_city', 'current_status', 'pdf_buttons')
+    list_filter = ('product_type', 'service', 'current_status', 'receiver_country', 'receiver_city')
     search_fields = ('awb_number', 'reference_number', 'receiver_name', 'receiver_contact_person')
-    readonly_fields = ('awb_number', 'reference_number', 'created_at', 'updated_at')
-    inlines = [ShipmentImageInline]
+    readonly_fields = (
+        'awb_number', 'reference_number', 'created_at', 'updated_at',
+        'current_status', 'current_status_at', 'current_location'
+    )
+    inlines = [ShipmentImageInline, TrackingEventInline]
+    list_select_related = ('shipper', 'receiver_city')
+    ordering = ('-created_at', '-id')
+    paginator = EstimatedCountPaginator
+    # Skip the second COUNT(*) over the whole table on filtered changelists
+    show_full_result_count = False
     
     def pdf_buttons(self, obj):
         detailed_url = f'/api/v1/shipments/{obj.id}/pdf/detailed/'
@@ -47,7 +96,10 @@ class ShipmentAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Tracking Information', {
-            'fields': ('awb_number', 'reference_number', 'forwarder')
+            'fields': (
+                'awb_number', 'reference_number', 'forwarder',
+                'current_status', 'current_status_at', 'current_location'
+            )
         }),
         ('Shipper Information', {
             'fields': ('shipper',)
@@ -82,4 +134,13 @@ class ShipmentAdmin(admin.ModelAdmin):
 class ShipmentImageAdmin(admin.ModelAdmin):
     list_display = ('shipment', 'uploaded_at')
     list_filter = ('uploaded_at',)
-    search_fields = ('shipment__awb_number',)
\ No newline at end of file
+    search_fields = ('shipment__awb_number',)
+
+
+@admin.register(PDFRenderJob)
+class PDFRenderJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'shipment', 'document_type', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'document_type')
+    search_fields = ('shipment__awb_number',)
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+    list_select_related = ('shipment',)
@@ -0,0 +1,45 @@
+"""
+Async dispatch for DRF views.
+
+DRF dispatches requests synchronously, so a view with ``async def`` handlers
+needs its own ``dispatch``. ``AsyncAPIView`` runs the usual APIView steps
+(request wrapping, authentication, permission and throttling checks,
+exception handling) and awaits the handler, so Django serves the view as a
+coroutine: under ASGI a request waiting on the cache or the database holds
+no worker thread.
+
+The request checks run on the event loop, so they must not do I/O. Async
+views are public and read-only: no authentication and no throttling by
+default, and permission classes that only look at the request.
+"""
+import asyncio
+
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    authentication_classes = []
+    throttle_classes = []
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # OPTIONS and "method not allowed" are answered by APIView's synchronous handlers
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,110 @@
+"""
+Bulk shipment creation for high-volume merchants.
+
+Every row is validated with ``ShipmentCreateSerializer`` against geography
+and saved addresses preloaded for the whole batch, so validation costs a
+fixed number of queries. Weights are calculated in memory and the rows are
+written by ``save_shipments`` in chunks of ``SHIPMENT_BULK_BATCH_SIZE``
+inside one transaction.
+"""
+import uuid
+
+from django.conf import settings
+from profiles.models import Address
+from shipments.bulk import save_shipments
+from shipments.geography import GeographyLookup
+from shipments.models import Shipment
+from .serializers import ShipmentCreateSerializer, apply_address_defaults
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_geography(rows):
+    """Preload every country and city the rows refer to."""
+    country_ids, city_ids = set(), set()
+    for row in rows:
+        shipper = row.get('shipper')
+        shipper = shipper if isinstance(shipper, dict) else {}
+        for ids, value in (
+            (country_ids, shipper.get('country_id')),
+            (city_ids, shipper.get('city_id')),
+            (country_ids, row.get('receiver_country')),
+            (city_ids, row.get('receiver_city')),
+        ):
+            value = _to_int(value)
+            if value is not None:
+                ids.add(value)
+    return GeographyLookup(country_ids, city_ids)
+
+
+def load_addresses(rows, user):
+    """Preload the user's saved addresses the rows refer to, keyed by UUID."""
+    address_uuids = set()
+    for row in rows:
+        try:
+            address_uuids.add(uuid.UUID(str(row['address_uuid'])))
+        except (KeyError, ValueError):
+            # Missing or malformed; the serializer reports malformed values per row
+            pass
+    if not address_uuids or not user.is_authenticated:
+        return {}
+    addresses = Address.objects.filter(user=user, address_uuid__in=address_uuids)
+    return {address.address_uuid: address for address in addresses}
+
+
+def create_shipments_in_bulk(rows, user, atomic=False, context=None):
+    """
+    Validate and create a batch of shipments owned by ``user``.
+
+    Returns one result per row, in order: ``created`` with the new shipment's
+    ID and tracking numbers, ``error`` with the validation errors, or
+    ``skipped`` for valid rows not created because ``atomic`` is set and
+    another row failed.
+    """
+    context = {**(context or {}), 'geography': load_geography(rows)}
+    addresses = load_addresses(rows, user)
+    results = [None] * len(rows)
+    valid = []
+
+    for index, row in enumerate(rows):
+        serializer = ShipmentCreateSerializer(data=row, context=context)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+            continue
+        data = dict(serializer.validated_data)
+        address_uuid = data.pop('address_uuid', None)
+        if address_uuid:
+            address = addresses.get(address_uuid)
+            if address is None:
+                results[index] = {'index': index, 'status': 'error', 'errors': {'address_uuid': ['Address not found.']}}
+                continue
+            apply_address_defaults(data['shipper'], user, address)
+        valid.append((index, data))
+
+    if atomic and len(valid) < len(rows):
+        for index, _ in valid:
+            results[index] = {'index': index, 'status': 'skipped'}
+        return results
+
+    entries = []
+    for _, data in valid:
+        shipper_data = data.pop('shipper')
+        shipment = Shipment(created_by=user, payment_status='pending', **data)
+        shipment.calculate_weights()
+        entries.append((shipper_data, shipment))
+    shipments = save_shipments(entries, batch_size=settings.SHIPMENT_BULK_BATCH_SIZE)
+
+    for (index, _), shipment in zip(valid, shipments):
+        results[index] = {
+            'index': index,
+            'status': 'created',
+            'id': shipment.id,
+            'awb_number': shipment.awb_number,
+            'reference_number': shipment.reference_number,
+        }
+    return results
@@ -0,0 +1,52 @@
+"""
+Ingestion of batched scan events from hubs and couriers.
+
+Every event is validated on its own and the shipments of the whole batch
+are looked up with one query per tracking number type. Valid events are
+then recorded together by ``record_tracking_events``.
+"""
+from shipments.models import Shipment, TrackingEvent
+from shipments.tracking import record_tracking_events
+from .serializers import TrackingEventIngestSerializer
+
+
+def ingest_tracking_events(rows):
+    """
+    Validate and record a batch of scan events.
+
+    Returns one result per row, in order: ``created``, or ``error`` with
+    the validation errors.
+    """
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        serializer = TrackingEventIngestSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    tracking_numbers = {data['tracking_number'] for _, data in valid}
+    shipments = Shipment.objects.only('id', 'awb_number', 'reference_number').in_bulk_by_tracking_numbers(
+        tracking_numbers
+    )
+
+    events = []
+    for index, data in valid:
+        shipment = shipments.get(data['tracking_number'])
+        if shipment is None:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'tracking_number': ['Shipment not found.']}}
+            continue
+        events.append(TrackingEvent(
+            shipment=shipment,
+            status=data['status'],
+            occurred_at=data['occurred_at'],
+            location=data.get('location') or None,
+            description=data.get('description') or None,
+            source=data.get('source') or None,
+        ))
+        results[index] = {'index': index, 'status': 'created'}
+
+    if events:
+        record_tracking_events(events)
+    return results
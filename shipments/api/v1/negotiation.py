@@ -0,0 +1,17 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Always pick the first parser and renderer.
+
+    For views that build their own non-JSON response, such as file exports,
+    so a client asking for ``Accept: text/csv`` does not get a 406 from
+    renderer negotiation. Errors are still rendered as JSON.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
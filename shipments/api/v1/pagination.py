@@ -0,0 +1,32 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+
+class ShipmentCursorPagination(CursorPagination):
+    """
+    Keyset pagination over ``(created_at, id)``.
+
+    Each page is a range scan on the ``(created_by, created_at, id)`` index
+    starting after the previous page, so deep pages cost the same as the
+    first one and no ``COUNT(*)`` is run. The cursor needs this fixed order,
+    so any other ``?ordering=`` (e.g. by the non-unique ``created_at``
+    ascending, or by ``awb_number``) is rejected rather than paged wrongly.
+    """
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        requested = request.query_params.get(OrderingFilter.ordering_param)
+        if requested:
+            fields = [field.strip() for field in requested.split(',') if field.strip()]
+            if fields and fields != list(self.ordering[:len(fields)]):
+                raise ValidationError({
+                    OrderingFilter.ordering_param: 'Cursor pagination only supports the default ordering (-created_at).'
+                })
+        return self.ordering
+
+
+def wants_cursor_pagination(request):
+    """Cursor pagination is opt-in with ``?pagination=cursor``; its page links carry ``cursor``."""
+    params = request.query_params
+    return params.get('pagination') == 'cursor' or ShipmentCursorPagination.cursor_query_param in params
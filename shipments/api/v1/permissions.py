@@ -23,8 +23,8 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         
         # Users can access their own shipments via created_by
-        if hasattr(obj, 'created_by'):
-            return obj.created_by == request.user
+        if hasattr(obj, 'created_by_id'):
+            return obj.created_by_id == request.user.pk
         
         # For now, allow access if user is authenticated (can be refined later)
         return request.user.is_authenticated
@@ -37,3 +37,26 @@ class IsPublicTracking(permissions.BasePermission):
     
     def has_permission(self, request, view):
         return True  # Public access
+
+
+
+class CanAccessPDFJob(permissions.BasePermission):
+    """
+    Confirmation PDF jobs are public like the confirmation PDF itself;
+    detailed and label PDF jobs are admin only.
+    """
+    
+    def has_object_permission(self, request, view, obj):
+        if obj.document_type == 'confirmation':
+            return True
+        return request.user.is_staff
+
+
+class CanRecordTrackingEvents(permissions.BasePermission):
+    """
+    Hubs and couriers report scan events with accounts holding the
+    ``shipments.add_trackingevent`` permission; superusers always can.
+    """
+    
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.has_perm('shipments.add_trackingevent')
@@ -1,7 +1,11 @@
+from datetime import timedelta
 from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from cities_light.models import Country, City
-from shipments.models import Shipper, Shipment, ShipmentImage
+from shipments.models import Shipper, Shipment, ShipmentImage, PDFRenderJob, TrackingEvent
 from profiles.models import Address
 
 
@@ -22,6 +26,39 @@ class CitySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'country')
 
 
+def resolve_city_in_country(country_id, city_id, country_field, city_field, geography=None):
+    """
+    Load a city with its country in one query and check that it belongs to
+    the given country. Returns ``(country, city)``, or ``(None, None)`` when
+    neither is set. The country is only looked up separately to explain a
+    failure. With a preloaded ``GeographyLookup`` no query is made.
+    """
+    if country_id is None and city_id is None:
+        return None, None
+    if city_id is None or country_id is None:
+        missing = city_field if city_id is None else country_field
+        raise serializers.ValidationError({missing: 'This field is required when the other location field is set.'})
+    
+    if geography is not None:
+        city = geography.get_city(city_id)
+    else:
+        try:
+            city = City.objects.select_related('country').get(id=city_id)
+        except City.DoesNotExist:
+            city = None
+    if city is not None and city.country_id == country_id:
+        return city.country, city
+    if geography is not None:
+        country_exists = geography.has_country(country_id)
+    else:
+        country_exists = Country.objects.filter(id=country_id).exists()
+    if not country_exists:
+        raise serializers.ValidationError({country_field: 'Invalid country ID.'})
+    if city is None:
+        raise serializers.ValidationError({city_field: 'Invalid city ID.'})
+    raise serializers.ValidationError({city_field: 'City does not belong to the selected country.'})
+
+
 class ShipperSerializer(serializers.ModelSerializer):
     """Serializer for shipper information."""
     country = CountrySerializer(read_only=True)
@@ -38,33 +75,19 @@ class ShipperSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('id',)
     
-    def validate_country_id(self, value):
-        try:
-            Country.objects.get(id=value)
-        except Country.DoesNotExist:
-            raise serializers.ValidationError("Invalid country ID.")
-        return value
-    
-    def validate_city_id(self, value):
-        try:
-            City.objects.get(id=value)
-        except City.DoesNotExist:
-            raise serializers.ValidationError("Invalid city ID.")
-        return value
+    def validate(self, attrs):
+        country, city = resolve_city_in_country(
+            attrs.pop('country_id', None), attrs.pop('city_id', None), 'country_id', 'city_id',
+            geography=self.context.get('geography')
+        )
+        if city is not None:
+            attrs['country'] = country
+            attrs['city'] = city
+        return attrs
     
     def create(self, validated_data):
-        country_id = validated_data.pop('country_id')
-        city_id = validated_data.pop('city_id')
-        
-        country = Country.objects.get(id=country_id)
-        city = City.objects.get(id=city_id)
-        
-        shipper = Shipper.objects.create(
-            country=country,
-            city=city,
-            **validated_data
-        )
-        return shipper
+        # Country and city were loaded in validate(); they are not fetched again
+        return Shipper.objects.create(**validated_data)
 
 
 class ShipmentImageSerializer(serializers.ModelSerializer):
@@ -76,11 +99,27 @@ class ShipmentImageSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'uploaded_at')
 
 
+def apply_address_defaults(shipper_data, user, address):
+    """Fill the shipper fields left out of a request from one of the user's saved addresses."""
+    shipper_data.setdefault('shipper_name', user.get_full_name() or user.username)
+    shipper_data.setdefault('address', address.address)
+    if 'city' not in shipper_data:
+        shipper_data['country_id'] = address.country_id
+        shipper_data['city_id'] = address.city_id
+    shipper_data.setdefault('zip_code', address.zip_code)
+    shipper_data.setdefault('location', address.location)
+    shipper_data.setdefault('contact_number', address.contact_number)
+    shipper_data.setdefault('mobile_number', address.mobile_number)
+
+
 class ShipmentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating shipments."""
     shipper = ShipperSerializer()
     images = ShipmentImageSerializer(many=True, read_only=True)
     address_uuid = serializers.UUIDField(required=False, write_only=True)
+    # Plain IDs, checked together in validate() instead of one lookup per field
+    receiver_country = serializers.IntegerField(source='receiver_country_id', allow_null=True)
+    receiver_city = serializers.IntegerField(source='receiver_city_id', allow_null=True)
     
     class Meta:
         model = Shipment
@@ -99,6 +138,15 @@ class ShipmentCreateSerializer(serializers.ModelSerializer):
             'chargeable_weight', 'volumetricks', 'created_at', 'updated_at'
         )
     
+    def validate(self, attrs):
+        country, city = resolve_city_in_country(
+            attrs.pop('receiver_country_id', None), attrs.pop('receiver_city_id', None),
+            'receiver_country', 'receiver_city', geography=self.context.get('geography')
+        )
+        attrs['receiver_country'] = country
+        attrs['receiver_city'] = city
+        return attrs
+    
     def create(self, validated_data):
         shipper_data = validated_data.pop('shipper')
         address_uuid = validated_data.pop('address_uuid', None)
@@ -107,18 +155,10 @@ class ShipmentCreateSerializer(serializers.ModelSerializer):
 
         if address_uuid and user and user.is_authenticated:
             address = get_object_or_404(Address, user=user, address_uuid=address_uuid)
-            shipper_data.setdefault('shipper_name', user.get_full_name() or user.username)
-            shipper_data.setdefault('address', address.address)
-            shipper_data.setdefault('country_id', address.country_id)
-            shipper_data.setdefault('city_id', address.city_id)
-            shipper_data.setdefault('zip_code', address.zip_code)
-            shipper_data.setdefault('location', address.location)
-            shipper_data.setdefault('contact_number', address.contact_number)
-            shipper_data.setdefault('mobile_number', address.mobile_number)
-
-        shipper_serializer = ShipperSerializer(data=shipper_data)
-        shipper_serializer.is_valid(raise_exception=True)
-        shipper = shipper_serializer.save()
+            apply_address_defaults(shipper_data, user, address)
+
+        # The nested shipper was validated with the shipment; don't validate it twice
+        shipper = ShipperSerializer().create(shipper_data)
 
         create_kwargs = {
             'shipper': shipper,
@@ -169,16 +209,136 @@ class ShipmentListSerializer(serializers.ModelSerializer):
         )
 
 
+class TrackingEventSerializer(serializers.ModelSerializer):
+    """Serializer for an event of a shipment's tracking timeline."""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = TrackingEvent
+        fields = ('status', 'status_display', 'location', 'description', 'occurred_at')
+
+
 class ShipmentTrackingSerializer(serializers.ModelSerializer):
     """Serializer for public shipment tracking."""
     shipper_name = serializers.CharField(source='shipper.shipper_name', read_only=True)
     receiver_country_name = serializers.CharField(source='receiver_country.name', read_only=True)
     receiver_city_name = serializers.CharField(source='receiver_city.name', read_only=True)
+    current_status_display = serializers.CharField(source='get_current_status_display', read_only=True)
+    # Prefetched by Shipment.objects.for_tracking(), newest first
+    events = TrackingEventSerializer(source='recent_events', many=True, read_only=True)
     
     class Meta:
         model = Shipment
         fields = (
             'awb_number', 'reference_number', 'shipper_name', 'receiver_name',
             'receiver_country_name', 'receiver_city_name', 'product_type',
-            'service', 'payment_status', 'created_at'
+            'service', 'payment_status', 'created_at',
+            'current_status', 'current_status_display', 'current_status_at', 'current_location',
+            'events'
         )
+
+
+class BulkTrackingRequestSerializer(serializers.Serializer):
+    """Serializer for bulk tracking requests."""
+    tracking_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False,
+        max_length=settings.TRACKING_BULK_MAX_NUMBERS,
+        help_text="AWB- or REF- tracking numbers to look up",
+    )
+
+
+class PDFRenderJobSerializer(serializers.ModelSerializer):
+    """Serializer for background PDF render jobs."""
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PDFRenderJob
+        fields = (
+            'id', 'shipment', 'document_type', 'status', 'error', 'attempts',
+            'created_at', 'started_at', 'finished_at', 'status_url', 'download_url'
+        )
+        read_only_fields = fields
+    
+    def _build_url(self, name, obj):
+        url = reverse(name, kwargs={'id': obj.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_status_url(self, obj):
+        return self._build_url('shipment-pdf-job', obj)
+    
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        return self._build_url('shipment-pdf-job-download', obj)
+
+
+class LabelBatchRequestSerializer(serializers.Serializer):
+    """Serializer for batch label printing requests."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        help_text="Shipment IDs to print"
+    )
+    payment_status = serializers.ChoiceField(choices=Shipment.PAYMENT_STATUS_CHOICES, required=False)
+    service = serializers.ChoiceField(choices=Shipment.SERVICE_TYPE_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    stream = serializers.BooleanField(
+        default=False,
+        help_text="Stream a ZIP of chunked PDFs instead of one PDF, for very large batches"
+    )
+    chunk_size = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    
+    def validate(self, attrs):
+        filters = ('ids', 'payment_status', 'service', 'created_after', 'created_before')
+        if not any(attrs.get(name) for name in filters):
+            raise serializers.ValidationError("Provide shipment ids or at least one filter.")
+        return attrs
+
+
+class BulkShipmentCreateSerializer(serializers.Serializer):
+    """Request body for bulk shipment creation; each row is validated like a single shipment."""
+    shipments = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=settings.SHIPMENT_BULK_MAX_ITEMS,
+        help_text="Shipments in the same format as the single create endpoint"
+    )
+    atomic = serializers.BooleanField(
+        default=False,
+        help_text="Create nothing unless every row is valid"
+    )
+
+
+class TrackingEventIngestSerializer(serializers.Serializer):
+    """One scan event reported by a hub or courier."""
+    tracking_number = serializers.CharField(max_length=50, help_text="AWB or REF number of the shipment")
+    status = serializers.ChoiceField(choices=Shipment.TRACKING_STATUS_CHOICES)
+    occurred_at = serializers.DateTimeField(help_text="When the scan happened")
+    location = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    source = serializers.CharField(
+        max_length=100, required=False, allow_blank=True, allow_null=True,
+        help_text="Hub or courier that reported the event"
+    )
+    
+    def validate_occurred_at(self, value):
+        # A far-future event would land in the default partition and block creating its month's partition
+        latest = timezone.now() + timedelta(seconds=settings.TRACKING_EVENT_MAX_FUTURE)
+        if value > latest:
+            raise serializers.ValidationError("Events cannot occur in the future.")
+        return value
+
+
+class TrackingEventBatchSerializer(serializers.Serializer):
+    """Request body for tracking event ingestion; each event is validated on its own."""
+    events = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=settings.TRACKING_EVENT_BATCH_MAX_ITEMS,
+        help_text="Events in the format of TrackingEventIngestSerializer"
+    )
@@ -1,10 +1,23 @@
-from django.test import TestCase
-from django.urls import reverse
+import asyncio
+import csv
+import io
+import json
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.conf import settings
+from django.contrib.auth.models import Permission
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from cities_light.models import Country, City
-from shipments.models import Shipper, Shipment
+from core.cache import response_cache_key
+from shipments.cache import (
+    REFERENCE_DATA_VERSION_KEY, TRACKING_RESPONSE_CACHE, aget_tracking_data_version, get_reference_data_version,
+    get_tracking_data_version, tracking_cache_key,
+)
+from shipments.models import Shipper, Shipment, TrackingEvent
+from shipments.testing import QueryCountAssertionsMixin, ShipmentFixturesMixin
 
 User = get_user_model()
 
@@ -113,6 +126,135 @@ class ShipmentAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class ShipmentTrackingCacheTestCase(ShipmentFixturesMixin, APITestCase):
+    """Test the cached public tracking endpoints."""
+    
+    def setUp(self):
+        cache.clear()
+        self.create_shipment_fixtures()
+        self.shipment = self.create_shipment(payment_status='paid')
+        self.url = f"{reverse('shipment-track')}?tracking_number={self.shipment.awb_number}"
+    
+    def test_tracking_uses_joined_query(self):
+        """Test that an uncached tracking lookup is one joined query plus one for the recent events."""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['shipper_name'], 'Test Shipper')
+        self.assertEqual(response.data['receiver_city_name'], 'Test City')
+    
+    def test_repeat_tracking_is_served_from_cache(self):
+        """Test that a repeat poll does not touch the database."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['awb_number'], self.shipment.awb_number)
+    
+    async def test_tracking_is_served_asynchronously(self):
+        """Test that tracking runs as a coroutine and serves repeat polls from the cache."""
+        self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse('shipment-track')).func))
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['awb_number'], self.shipment.awb_number)
+        version = await aget_tracking_data_version()
+        self.assertIsNotNone(await cache.aget(tracking_cache_key(self.shipment.awb_number, version)))
+        
+        missing = await self.async_client.get(reverse('shipment-track'), {'tracking_number': 'AWB-999999'})
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_saving_shipment_invalidates_cache(self):
+        """Test that saving a shipment drops its cached tracking response."""
+        self.client.get(self.url)
+        self.shipment.receiver_name = 'Updated Receiver'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipment.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['receiver_name'], 'Updated Receiver')
+    
+    def test_bulk_tracking_is_documented(self):
+        """Test that the API schema describes the bulk tracking request."""
+        schema = self.client.get(reverse('schema-json') + '?format=openapi').json()
+        path = reverse('shipment-track-bulk').replace('/api', '', 1)
+        parameters = schema['paths'][path]['post']['parameters']
+        self.assertEqual([parameter['in'] for parameter in parameters], ['body'])
+    
+    def test_saving_shipment_removes_cached_response(self):
+        """Test that saving a shipment deletes the cached response under the key the view stored it."""
+        self.client.get(self.url)
+        key = response_cache_key(TRACKING_RESPONSE_CACHE, self.shipment.awb_number, get_tracking_data_version())
+        self.assertIsNotNone(cache.get(key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipment.save()
+        self.assertIsNone(cache.get(key))
+    
+    def test_saving_shipper_invalidates_cache(self):
+        """Test that renaming the shipper drops the cached tracking responses of its shipments."""
+        self.client.get(self.url)
+        self.shipper.shipper_name = 'Renamed Shipper'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipper.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['shipper_name'], 'Renamed Shipper')
+    
+    def test_renaming_city_invalidates_cache(self):
+        """Test that renaming the receiver's city drops the cached tracking response."""
+        self.client.get(self.url)
+        self.city.name = 'Renamed City'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['receiver_city_name'], 'Renamed City')
+    
+    def test_renaming_city_does_not_touch_each_shipment(self):
+        """Test that a rename invalidates tracking in constant work, however many shipments it affects."""
+        version = get_tracking_data_version()
+        self.city.name = 'Renamed City'
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            self.city.save()
+        self.assertNotEqual(get_tracking_data_version(), version)
+    
+    def test_bulk_tracking_mixed_numbers(self):
+        """Test bulk tracking with AWB, REF, unknown and invalid numbers."""
+        numbers = [
+            self.shipment.awb_number,
+            self.shipment.reference_number,
+            'AWB-999999',
+            'INVALID',
+        ]
+        # One lookup per number type, each with its recent events
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse('shipment-track-bulk'), {'tracking_numbers': numbers}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(list(results), numbers)
+        self.assertEqual(results[self.shipment.awb_number]['receiver_name'], 'Test Receiver')
+        self.assertEqual(results[self.shipment.reference_number]['awb_number'], self.shipment.awb_number)
+        self.assertEqual(results['AWB-999999'], {'error': 'Shipment not found'})
+        self.assertIn('error', results['INVALID'])
+    
+    def test_bulk_tracking_reuses_cache(self):
+        """Test that bulk tracking serves already cached numbers without queries."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                reverse('shipment-track-bulk'),
+                {'tracking_numbers': [self.shipment.awb_number]},
+                format='json'
+            )
+        self.assertEqual(response.data['results'][self.shipment.awb_number]['awb_number'], self.shipment.awb_number)
+    
+    def test_bulk_tracking_rejects_oversized_request(self):
+        """Test that bulk tracking enforces the maximum batch size."""
+        numbers = [f'AWB-{n}' for n in range(settings.TRACKING_BULK_MAX_NUMBERS + 1)]
+        response = self.client.post(
+            reverse('shipment-track-bulk'), {'tracking_numbers': numbers}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class ShipmentDetailAPITestCase(APITestCase):
     """Test shipment detail API endpoints."""
     
@@ -174,3 +316,477 @@ class ShipmentDetailAPITestCase(APITestCase):
         self.client.force_authenticate(user=None)
         response = self.client.get(reverse('shipment-list'))
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ShipmentQueryCountTestCase(ShipmentFixturesMixin, QueryCountAssertionsMixin, APITestCase):
+    """Guard the shipment list and detail endpoints against N+1 queries."""
+    
+    def setUp(self):
+        self.create_shipment_fixtures()
+        self.create_shipments(5)
+        self.client.force_authenticate(user=self.user)
+    
+    def create_shipments(self, count):
+        for _ in range(count):
+            self.create_shipment()
+    
+    def test_shipment_list_query_count(self):
+        """Test that a page of shipments is one count and one joined query."""
+        with self.assertMaxNumQueries(2):
+            response = self.client.get(reverse('shipment-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['shipper_name'], 'Test Shipper')
+        self.assertEqual(response.data['results'][0]['receiver_city_name'], 'Test City')
+    
+    def test_shipment_list_query_count_does_not_grow(self):
+        """Test that the query count does not depend on the page size."""
+        self.assertQueryCountConstant(
+            lambda: self.client.get(reverse('shipment-list')),
+            lambda: self.create_shipments(10)
+        )
+    
+    def test_shipment_list_cursor_pagination(self):
+        """Test that cursor pagination walks all shipments without counting them."""
+        self.create_shipments(20)
+        url = f"{reverse('shipment-list')}?pagination=cursor"
+        seen = []
+        while url:
+            with self.assertMaxNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(shipment['id'] for shipment in response.data['results'])
+            url = response.data['next']
+        expected = list(
+            Shipment.objects.filter(created_by=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+    
+    def test_cursor_pagination_rejects_other_orderings(self):
+        """Test that cursor pagination keeps its unique order instead of paging by another one."""
+        url = reverse('shipment-list')
+        for ordering in ('created_at', 'awb_number'):
+            response = self.client.get(url, {'pagination': 'cursor', 'ordering': ordering})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'pagination': 'cursor', 'ordering': '-created_at'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_shipment_detail_query_count(self):
+        """Test that the detail view is one joined query plus the images."""
+        shipment = Shipment.objects.filter(created_by=self.user).first()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('shipment-detail', kwargs={'id': shipment.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['shipper']['city']['country']['name'], 'Test Country')
+        self.assertEqual(response.data['receiver_city']['country']['name'], 'Test Country')
+
+
+class ReferenceDataCacheTestCase(APITestCase):
+    """Test the cached country and city lists."""
+    
+    def setUp(self):
+        cache.clear()
+        self.country = Country.objects.create(name='Test Country', code2='TC', code3='TCO')
+        self.other_country = Country.objects.create(name='Other Country', code2='OC', code3='OCO')
+        City.objects.create(name='Test City', country=self.country)
+        City.objects.create(name='Other City', country=self.other_country)
+    
+    def test_city_list_uses_single_query(self):
+        """Test that cities and their countries load in one query."""
+        with self.assertNumQueries(2):  # count + joined page
+            response = self.client.get(reverse('city-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'][0]['country']['name'], 'Other Country')
+    
+    def test_repeat_request_is_served_from_cache(self):
+        """Test that a repeated list request does not touch the database."""
+        first = self.client.get(reverse('country-list'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('country-list'))
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('max-age', second['Cache-Control'])
+    
+    async def test_lists_are_served_asynchronously(self):
+        """Test that the country and city lists run as coroutines."""
+        for name in ('country-list', 'city-list'):
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse(name)).func))
+        response = await self.async_client.get(reverse('city-list'), {'country': self.country.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([city['name'] for city in response.json()['results']], ['Test City'])
+        cached = await self.async_client.get(reverse('city-list'), {'country': self.country.id})
+        self.assertEqual(cached.content, response.content)
+    
+    def test_query_parameters_are_cached_separately(self):
+        """Test that filtered lists do not share a cache entry."""
+        url = reverse('city-list')
+        response = self.client.get(url, {'country': self.country.id})
+        other = self.client.get(url, {'country': self.other_country.id})
+        self.assertEqual([city['name'] for city in response.json()['results']], ['Test City'])
+        self.assertEqual([city['name'] for city in other.json()['results']], ['Other City'])
+    
+    def test_matching_etag_returns_not_modified(self):
+        """Test that clients revalidating with the ETag get a 304."""
+        etag = self.client.get(reverse('country-list'))['ETag']
+        response = self.client.get(reverse('country-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_reference_data_change_invalidates_cache(self):
+        """Test that editing a country serves fresh data."""
+        etag = self.client.get(reverse('country-list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.name = 'Renamed Country'
+            self.country.save()
+        response = self.client.get(reverse('country-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Renamed Country', [country['name'] for country in response.json()['results']])
+    
+    def test_evicted_version_does_not_invalidate_cache(self):
+        """Test that losing the version key keeps serving the cached lists instead of starting over."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.save()
+        version = get_reference_data_version()
+        cache.delete(REFERENCE_DATA_VERSION_KEY)
+        self.assertEqual(get_reference_data_version(), get_reference_data_version())
+        self.assertNotEqual(get_reference_data_version(), version)
+        
+        self.client.get(reverse('country-list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('country-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(REFERENCE_DATA_VERSION_KEY))
+    
+    def test_city_autocomplete(self):
+        """Test that the autocomplete endpoint suggests cities by prefix."""
+        response = self.client.get(reverse('city-autocomplete'), {'q': 'test', 'country': self.country.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([city['name'] for city in response.data['results']], ['Test City'])
+        
+        with self.assertNumQueries(0):
+            self.client.get(reverse('city-autocomplete'), {'q': 'oth'})
+    
+    def test_city_autocomplete_is_documented(self):
+        """Test that the API schema describes the suggestions the endpoint returns."""
+        schema = self.client.get(reverse('schema-json') + '?format=openapi').json()
+        path = reverse('city-autocomplete').replace('/api', '', 1)
+        response = schema['paths'][path]['get']['responses']['200']
+        suggestion = response['schema']['properties']['results']['items']
+        self.assertEqual(set(suggestion['properties']), {'id', 'name', 'country'})
+    
+    def test_city_autocomplete_requires_term(self):
+        """Test that an empty search term is rejected."""
+        response = self.client.get(reverse('city-autocomplete'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShipmentCreateGeographyTestCase(ShipmentFixturesMixin, QueryCountAssertionsMixin, APITestCase):
+    """Test country/city validation on shipment creation."""
+    
+    def setUp(self):
+        self.user = self.create_user()
+        self.create_geography()
+        self.other_country = Country.objects.create(name='Other Country', code2='OC', code3='OCO')
+        self.other_city = City.objects.create(name='Other City', country=self.other_country)
+        self.client.force_authenticate(user=self.user)
+    
+    def get_data(self, **overrides):
+        return self.shipment_payload(**{
+            'receiver_country': self.other_country.id,
+            'receiver_city': self.other_city.id,
+            **overrides
+        })
+    
+    def test_geography_is_checked_with_one_query_per_location(self):
+        """Test that shipper and receiver locations cost one read each."""
+        # One geography read per location, the two inserts and the (empty) images of the response
+        with self.assertMaxNumQueries(5):
+            response = self.client.post(reverse('shipment-create'), self.get_data(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        shipment = Shipment.objects.get(id=response.data['id'])
+        self.assertEqual(shipment.shipper.city_id, self.city.id)
+        self.assertEqual(shipment.receiver_city_id, self.other_city.id)
+    
+    def test_shipper_city_must_belong_to_country(self):
+        """Test that a shipper city from another country is rejected."""
+        data = self.get_data(shipper={'city_id': self.other_city.id})
+        response = self.client.post(reverse('shipment-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('city_id', response.data['shipper'])
+    
+    def test_receiver_city_must_belong_to_country(self):
+        """Test that a receiver city from another country is rejected."""
+        data = self.get_data(receiver_city=self.city.id)
+        response = self.client.post(reverse('shipment-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('receiver_city', response.data)
+    
+    def test_unknown_country_and_city_are_rejected(self):
+        """Test that unknown IDs are reported on the right field."""
+        response = self.client.post(
+            reverse('shipment-create'), self.get_data(shipper={'country_id': 999999}), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('country_id', response.data['shipper'])
+        
+        response = self.client.post(reverse('shipment-create'), self.get_data(receiver_city=999999), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('receiver_city', response.data)
+
+
+class ShipmentBulkCreateTestCase(ShipmentFixturesMixin, QueryCountAssertionsMixin, APITestCase):
+    """Test bulk shipment creation."""
+    
+    def setUp(self):
+        self.user = self.create_user()
+        self.create_geography()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('shipment-bulk-create')
+    
+    def get_row(self, **overrides):
+        return self.shipment_payload(**{'quantity': 2, 'width': 50.0, 'length': 40.0, 'height': 30.0, **overrides})
+    
+    def test_bulk_create(self):
+        """Test that every row is created with its weights and identical shippers are stored once."""
+        response = self.client.post(self.url, {'shipments': [self.get_row() for _ in range(3)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created'] * 3)
+        
+        shipments = Shipment.objects.filter(created_by=self.user)
+        self.assertEqual(shipments.count(), 3)
+        self.assertEqual(Shipper.objects.count(), 1)
+        shipment = shipments.get(awb_number=response.data['results'][0]['awb_number'])
+        self.assertEqual(shipment.volumetricks, 24)
+        self.assertEqual(shipment.chargeable_weight, 24)
+        self.assertEqual(shipment.payment_status, 'pending')
+    
+    def test_bulk_create_query_count_does_not_grow(self):
+        """Test that the number of queries does not depend on the number of rows."""
+        for count in (1, 20):
+            rows = [self.get_row(receiver_name=f'Receiver {index}') for index in range(count)]
+            # Cities, countries, the two inserts and the savepoint around them
+            with self.assertMaxNumQueries(6):
+                response = self.client.post(self.url, {'shipments': rows}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_bulk_create_reports_errors_per_row(self):
+        """Test that invalid rows are reported and valid rows are still created."""
+        rows = [self.get_row(), self.get_row(receiver_city=999999), self.get_row(quantity=None)]
+        response = self.client.post(self.url, {'shipments': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 2)
+        results = response.data['results']
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertIn('receiver_city', results[1]['errors'])
+        self.assertIn('quantity', results[2]['errors'])
+        self.assertEqual(Shipment.objects.count(), 1)
+    
+    def test_atomic_bulk_create_creates_nothing_on_error(self):
+        """Test that an atomic batch with an invalid row creates nothing."""
+        rows = [self.get_row(), self.get_row(receiver_city=999999)]
+        response = self.client.post(self.url, {'shipments': rows, 'atomic': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'][0]['status'], 'skipped')
+        self.assertEqual(Shipment.objects.count(), 0)
+        self.assertEqual(Shipper.objects.count(), 0)
+    
+    def test_bulk_create_requires_authentication(self):
+        """Test that anonymous users cannot create shipments in bulk."""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, {'shipments': [self.get_row()]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ShipmentExportTestCase(ShipmentFixturesMixin, QueryCountAssertionsMixin, APITestCase):
+    """Test the streaming shipment export."""
+    
+    def setUp(self):
+        self.create_shipment_fixtures()
+        self.other_user = self.create_user('otheruser')
+        for index, (owner, service) in enumerate(
+            [(self.user, 'outbound'), (self.user, 'inbound'), (self.user, 'outbound'), (self.other_user, 'outbound')]
+        ):
+            self.create_shipment(created_by=owner, receiver_name=f'Receiver {index}', service=service)
+        self.client.force_authenticate(user=self.user)
+    
+    def export(self, **params):
+        response = self.client.get(reverse('shipment-export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+    
+    def test_export_csv(self):
+        """Test that the user's shipments are streamed as CSV with joined names in one query."""
+        with self.assertMaxNumQueries(1):
+            response, content = self.export()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['receiver_name'] for row in rows], ['Receiver 2', 'Receiver 1', 'Receiver 0'])
+        self.assertEqual(rows[0]['shipper_name'], 'Test Shipper')
+        self.assertEqual(rows[0]['receiver_city'], 'Test City')
+    
+    def test_export_ndjson(self):
+        """Test that the export can be streamed as one JSON object per line."""
+        response, content = self.export(format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['receiver_country'], 'Test Country')
+    
+    def test_export_uses_list_filters(self):
+        """Test that the list filters, search and ordering apply to the export."""
+        _, content = self.export(service='outbound', ordering='created_at')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['receiver_name'] for row in rows], ['Receiver 0', 'Receiver 2'])
+        
+        awb_number = Shipment.objects.get(receiver_name='Receiver 1').awb_number
+        _, content = self.export(search=awb_number)
+        self.assertEqual([row['receiver_name'] for row in csv.DictReader(io.StringIO(content))], ['Receiver 1'])
+    
+    def test_export_ignores_accept_header(self):
+        """Test that asking for text/csv does not fail content negotiation."""
+        response = self.client.get(reverse('shipment-export'), HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_export_rejects_unknown_format(self):
+        """Test that an unsupported format is a bad request."""
+        response = self.client.get(reverse('shipment-export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_requires_authentication(self):
+        """Test that anonymous users cannot export shipments."""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('shipment-export'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TrackingEventTestCase(ShipmentFixturesMixin, QueryCountAssertionsMixin, APITestCase):
+    """Test tracking event ingestion and the tracking timeline."""
+    
+    def setUp(self):
+        cache.clear()
+        self.create_shipment_fixtures()
+        self.courier = self.create_user('courier')
+        self.courier.user_permissions.add(Permission.objects.get(codename='add_trackingevent'))
+        self.shipments = [
+            self.create_shipment(receiver_name=f'Receiver {index}', payment_status='paid')
+            for index in range(2)
+        ]
+        self.url = reverse('tracking-event-ingest')
+        self.client.force_authenticate(user=self.courier)
+    
+    def event(self, shipment, status_value, occurred_at, **extra):
+        return {
+            'tracking_number': shipment.awb_number,
+            'status': status_value,
+            'occurred_at': occurred_at,
+            **extra
+        }
+    
+    def test_ingest_events(self):
+        """Test that a batch is recorded and moves each shipment to its latest status."""
+        first, second = self.shipments
+        events = [
+            self.event(first, 'picked_up', '2025-01-01T08:00:00Z'),
+            self.event(first, 'arrived_at_hub', '2025-01-01T12:00:00Z', location='Dubai Hub'),
+            self.event(second, 'in_transit', '2025-01-01T09:00:00Z', location='Sharjah'),
+        ]
+        # The courier's permissions, one shipment lookup, the insert and the status update in a savepoint
+        with self.assertMaxNumQueries(7):
+            response = self.client.post(self.url, {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.current_status, 'arrived_at_hub')
+        self.assertEqual(first.current_location, 'Dubai Hub')
+        self.assertEqual(second.current_status, 'in_transit')
+        self.assertEqual(first.events.count(), 2)
+    
+    def test_older_event_does_not_roll_status_back(self):
+        """Test that a late scan joins the timeline without changing the current status."""
+        shipment = self.shipments[0]
+        self.client.post(self.url, {'events': [self.event(shipment, 'delivered', '2025-01-02T10:00:00Z')]}, format='json')
+        response = self.client.post(
+            self.url, {'events': [self.event(shipment, 'out_for_delivery', '2025-01-02T08:00:00Z')]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        shipment.refresh_from_db()
+        self.assertEqual(shipment.current_status, 'delivered')
+        self.assertEqual(shipment.events.count(), 2)
+    
+    def test_invalid_events_are_reported_per_event(self):
+        """Test that unknown shipments and statuses are rejected while valid events are recorded."""
+        events = [
+            self.event(self.shipments[0], 'picked_up', '2025-01-01T08:00:00Z'),
+            {'tracking_number': 'AWB-000000', 'status': 'picked_up', 'occurred_at': '2025-01-01T08:00:00Z'},
+            self.event(self.shipments[1], 'teleported', '2025-01-01T08:00:00Z'),
+        ]
+        response = self.client.post(self.url, {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data['results']
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertIn('tracking_number', results[1]['errors'])
+        self.assertIn('status', results[2]['errors'])
+        self.assertEqual(TrackingEvent.objects.count(), 1)
+    
+    def test_future_events_are_rejected(self):
+        """Test that an event from a scanner clock far in the future is rejected."""
+        events = [self.event(self.shipments[0], 'picked_up', '2999-01-01T08:00:00Z')]
+        response = self.client.post(self.url, {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('occurred_at', response.data['results'][0]['errors'])
+        self.assertFalse(TrackingEvent.objects.exists())
+    
+    def test_ingest_requires_permission(self):
+        """Test that only accounts allowed to record events can post them."""
+        self.client.force_authenticate(user=self.user)
+        event = self.event(self.shipments[0], 'picked_up', '2025-01-01T08:00:00Z')
+        response = self.client.post(self.url, {'events': [event]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_tracking_returns_status_and_recent_timeline(self):
+        """Test that tracking returns the current status and newest events, and is refreshed after ingestion."""
+        shipment = self.shipments[0]
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('shipment-track'), {'tracking_number': shipment.awb_number})
+        self.assertEqual(response.data['current_status'], 'created')
+        self.assertEqual(response.data['events'], [])
+        
+        self.client.force_authenticate(user=self.courier)
+        events = [
+            self.event(shipment, 'picked_up', '2025-01-01T08:00:00Z'),
+            self.event(shipment, 'in_transit', '2025-01-01T12:00:00Z', location='Dubai Hub'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'events': events}, format='json')
+        
+        self.client.force_authenticate(user=None)
+        # The shipment and its recent events
+        with self.assertMaxNumQueries(2):
+            response = self.client.get(reverse('shipment-track'), {'tracking_number': shipment.awb_number})
+        self.assertEqual(response.data['current_status'], 'in_transit')
+        self.assertEqual(response.data['current_location'], 'Dubai Hub')
+        self.assertEqual([event['status'] for event in response.data['events']], ['in_transit', 'picked_up'])
+    
+    @override_settings(TRACKING_RECENT_EVENTS=2)
+    def test_bulk_tracking_limits_timeline(self):
+        """Test that bulk tracking returns only the newest events of each shipment."""
+        events = [
+            self.event(shipment, status_value, f'2025-01-01T0{hour}:00:00Z')
+            for shipment in self.shipments
+            for hour, status_value in enumerate(['picked_up', 'arrived_at_hub', 'departed_hub'])
+        ]
+        self.client.post(self.url, {'events': events}, format='json')
+        
+        self.client.force_authenticate(user=None)
+        numbers = [shipment.awb_number for shipment in self.shipments]
+        response = self.client.post(reverse('shipment-track-bulk'), {'tracking_numbers': numbers}, format='json')
+        for number in numbers:
+            self.assertEqual(
+                [event['status'] for event in response.data['results'][number]['events']],
+                ['departed_hub', 'arrived_at_hub']
+            )
@@ -1,23 +1,33 @@
 from django.urls import path
 from .views import (
-    CountryListView, CityListView, ShipmentCreateView, ShipmentListView,
-    ShipmentDetailView, track_shipment, ShipmentConfirmationPDFView,
-    ShipmentDetailedPDFView, ShipmentLabelPDFView
+    CountryListView, CityListView, autocomplete_cities, ShipmentCreateView, ShipmentListView,
+    ShipmentDetailView, TrackShipmentView, track_shipments_bulk, ShipmentConfirmationPDFView,
+    ShipmentDetailedPDFView, ShipmentLabelPDFView, PDFRenderJobDetailView,
+    PDFRenderJobDownloadView, ShipmentLabelBatchPDFView, ShipmentBulkCreateView,
+    ShipmentExportView, TrackingEventIngestView
 )
 
 urlpatterns = [
     # Public endpoints
     path('countries/', CountryListView.as_view(), name='country-list'),
     path('cities/', CityListView.as_view(), name='city-list'),
+    path('cities/autocomplete/', autocomplete_cities, name='city-autocomplete'),
     path('', ShipmentCreateView.as_view(), name='shipment-create'),
-    path('track/', track_shipment, name='shipment-track'),
+    path('track/', TrackShipmentView.as_view(), name='shipment-track'),
+    path('track/bulk/', track_shipments_bulk, name='shipment-track-bulk'),
     
     # Authenticated endpoints
     path('list/', ShipmentListView.as_view(), name='shipment-list'),
+    path('export/', ShipmentExportView.as_view(), name='shipment-export'),
+    path('bulk/', ShipmentBulkCreateView.as_view(), name='shipment-bulk-create'),
+    path('events/', TrackingEventIngestView.as_view(), name='tracking-event-ingest'),
     path('<int:id>/', ShipmentDetailView.as_view(), name='shipment-detail'),
     
     # PDF endpoints
     path('<int:id>/pdf/confirmation/', ShipmentConfirmationPDFView.as_view(), name='shipment-confirmation-pdf'),
     path('<int:id>/pdf/detailed/', ShipmentDetailedPDFView.as_view(), name='shipment-detailed-pdf'),
     path('<int:id>/pdf/label/', ShipmentLabelPDFView.as_view(), name='shipment-label-pdf'),
+    path('pdf/labels/', ShipmentLabelBatchPDFView.as_view(), name='shipment-label-batch-pdf'),
+    path('pdf/jobs/<uuid:id>/', PDFRenderJobDetailView.as_view(), name='shipment-pdf-job'),
+    path('pdf/jobs/<uuid:id>/download/', PDFRenderJobDownloadView.as_view(), name='shipment-pdf-job-download'),
 ]
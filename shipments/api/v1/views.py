@@ -1,26 +1,51 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from cities_light.models import Country, City
-from shipments.models import Shipment, ShipmentImage
+from shipments import autocomplete
+from core.cache import cache_response
+from shipments.cache import (
+    TRACKING_RESPONSE_CACHE, aget_reference_data_version, aget_tracking_data_version,
+    get_reference_data_cache_timeout, get_tracking_cache_timeout, get_tracking_data_version, tracking_cache_key
+)
+from shipments.exporting import CONTENT_TYPES, EXPORT_FORMATS, export_shipments
+from shipments.models import PDFRenderJob, Shipment, ShipmentImage
+from shipments.utils.pdf_cache import get_pdf_cache_path
 from shipments.utils.pdf_generator import (
     generate_shipment_confirmation_pdf,
     generate_shipment_detailed_pdf,
-    generate_shipment_label_pdf
+    generate_shipment_label_pdf,
+    render_shipment_labels_pdf,
+    shipment_pdf_response
 )
+from shipments.utils.pdf_jobs import enqueue_pdf_render
+from shipments.utils.label_batch import get_label_queryset, iter_label_pdfs, iter_zip_stream
 from .serializers import (
     CountrySerializer, CitySerializer, ShipmentCreateSerializer,
-    ShipmentDetailSerializer, ShipmentListSerializer, ShipmentTrackingSerializer
+    ShipmentDetailSerializer, ShipmentListSerializer, ShipmentTrackingSerializer,
+    BulkTrackingRequestSerializer, PDFRenderJobSerializer, LabelBatchRequestSerializer,
+    BulkShipmentCreateSerializer, TrackingEventBatchSerializer
+)
+from .async_views import AsyncAPIView
+from .bulk import create_shipments_in_bulk
+from .events import ingest_tracking_events
+from .negotiation import IgnoreClientContentNegotiation
+from .pagination import ShipmentCursorPagination, wants_cursor_pagination
+from .permissions import (
+    IsStaffOrReadOnly, IsOwnerOrAdmin, IsPublicTracking, CanAccessPDFJob, CanRecordTrackingEvents
 )
-from .permissions import IsStaffOrReadOnly, IsOwnerOrAdmin, IsPublicTracking
 
 
-class CountryListView(generics.ListAPIView):
+class CountryListView(AsyncAPIView, generics.ListAPIView):
     """
     List all countries.
     """
@@ -36,15 +61,19 @@ class CountryListView(generics.ListAPIView):
             200: openapi.Response('List of countries', CountrySerializer(many=True))
         }
     )
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    @cache_response(
+        'countries', timeout=get_reference_data_cache_timeout, version=aget_reference_data_version,
+        max_age=settings.REFERENCE_DATA_MAX_AGE
+    )
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(self.list)(request, *args, **kwargs)
 
 
-class CityListView(generics.ListAPIView):
+class CityListView(AsyncAPIView, generics.ListAPIView):
     """
     List cities, optionally filtered by country.
     """
-    queryset = City.objects.all().order_by('name')
+    queryset = City.objects.select_related('country').order_by('name')
     serializer_class = CitySerializer
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -65,8 +94,98 @@ class CityListView(generics.ListAPIView):
             200: openapi.Response('List of cities', CitySerializer(many=True))
         }
     )
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    @cache_response(
+        'cities', timeout=get_reference_data_cache_timeout, version=aget_reference_data_version,
+        max_age=settings.REFERENCE_DATA_MAX_AGE
+    )
+    async def get(self, request, *args, **kwargs):
+        # The country filter validates against the database synchronously, so a miss builds the page in a thread
+        return await sync_to_async(self.list)(request, *args, **kwargs)
+
+
+city_suggestion_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'results': openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'name': openapi.Schema(type=openapi.TYPE_STRING),
+                    'country': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'name': openapi.Schema(type=openapi.TYPE_STRING),
+                            'code2': openapi.Schema(type=openapi.TYPE_STRING),
+                            'code3': openapi.Schema(type=openapi.TYPE_STRING),
+                        }
+                    )
+                }
+            )
+        )
+    }
+)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description=(
+        "Autocomplete city names by prefix, ranked by population. "
+        "Matching ignores accents and case and also matches later words of a name."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            'q',
+            openapi.IN_QUERY,
+            description="Start of the city name",
+            type=openapi.TYPE_STRING,
+            required=True
+        ),
+        openapi.Parameter(
+            'country',
+            openapi.IN_QUERY,
+            description="Only suggest cities in this country ID",
+            type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter(
+            'limit',
+            openapi.IN_QUERY,
+            description=f"Number of suggestions (default 10, at most {autocomplete.MAX_RESULTS})",
+            type=openapi.TYPE_INTEGER
+        )
+    ],
+    responses={
+        200: openapi.Response('Matching cities, most populous first', city_suggestion_schema),
+        400: 'Missing search term or invalid parameters'
+    }
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def autocomplete_cities(request):
+    """
+    Suggest cities for a name prefix from the in-memory autocomplete index (public access).
+    """
+    term = request.GET.get('q', '').strip()
+    if not term:
+        return Response(
+            {'error': 'Search term is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        country_id = int(request.GET['country']) if request.GET.get('country') else None
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        return Response(
+            {'error': 'country and limit must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, autocomplete.MAX_RESULTS))
+    
+    results = autocomplete.get_city_index().search(term, country_id=country_id, limit=limit)
+    return Response({'results': results})
 
 
 class ShipmentCreateView(generics.CreateAPIView):
@@ -89,24 +208,133 @@ class ShipmentCreateView(generics.CreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class ShipmentListView(generics.ListAPIView):
+class ShipmentBulkCreateView(generics.GenericAPIView):
     """
-    List user's shipments (authenticated users only).
+    Create many shipments in one request.
     """
-    serializer_class = ShipmentListSerializer
+    serializer_class = BulkShipmentCreateSerializer
     permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Create a batch of shipments. Rows are validated up front and written together; "
+            "the response has one result per row. With atomic=true nothing is created unless every row is valid."
+        ),
+        request_body=BulkShipmentCreateSerializer,
+        responses={
+            201: 'All shipments created',
+            207: 'Some rows created, others rejected; see the per-row results',
+            400: 'No shipment created',
+            401: 'Authentication required'
+        }
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = create_shipments_in_bulk(
+            serializer.validated_data['shipments'],
+            request.user,
+            atomic=serializer.validated_data['atomic'],
+            context=self.get_serializer_context()
+        )
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'failed': len(results) - created, 'results': results},
+            status=response_status
+        )
+
+
+class TrackingEventIngestView(generics.GenericAPIView):
+    """
+    Record batches of scan events from hubs and couriers.
+    """
+    serializer_class = TrackingEventBatchSerializer
+    permission_classes = [CanRecordTrackingEvents]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Record a batch of tracking events. Events are appended to the shipments' timelines and move "
+            "each shipment's current status to its latest event; older events never roll the status back. "
+            "The response has one result per event."
+        ),
+        request_body=TrackingEventBatchSerializer,
+        responses={
+            201: 'All events recorded',
+            207: 'Some events recorded, others rejected; see the per-event results',
+            400: 'No event recorded',
+            403: 'Not allowed to record tracking events'
+        }
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = ingest_tracking_events(serializer.validated_data['events'])
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'failed': len(results) - created, 'results': results},
+            status=response_status
+        )
+
+
+class ShipmentFilterMixin:
+    """
+    Filtering, search and ordering of the user's shipments, shared by the list and the export.
+    """
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['product_type', 'service', 'payment_status']
     search_fields = ['awb_number', 'reference_number', 'receiver_name']
     ordering_fields = ['created_at', 'awb_number']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+
+
+class ShipmentListView(ShipmentFilterMixin, generics.ListAPIView):
+    """
+    List user's shipments (authenticated users only).
+    """
+    serializer_class = ShipmentListSerializer
+    permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
-        return Shipment.objects.filter(created_by=user)
+        return Shipment.objects.for_list().filter(created_by=user)
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.request is not None and wants_cursor_pagination(self.request):
+            self._paginator = ShipmentCursorPagination()
+        return super().paginator
     
     @swagger_auto_schema(
         operation_description="Get list of user's shipments",
+        manual_parameters=[
+            openapi.Parameter(
+                'pagination',
+                openapi.IN_QUERY,
+                description="Set to 'cursor' for keyset pagination: constant-time pages without a total count",
+                type=openapi.TYPE_STRING,
+                enum=['cursor']
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from the next/previous link of a cursor-paginated page",
+                type=openapi.TYPE_STRING
+            )
+        ],
         responses={
             200: openapi.Response('List of shipments', ShipmentListSerializer(many=True)),
             401: 'Authentication required'
@@ -116,11 +344,66 @@ class ShipmentListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+class ShipmentExportView(ShipmentFilterMixin, generics.GenericAPIView):
+    """
+    Stream the user's shipments as CSV or NDJSON.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    
+    def get_queryset(self):
+        return Shipment.objects.filter(created_by=self.request.user)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Export the user's shipments, with the same filters, search and ordering as the list. "
+            "The file is streamed, so exports of any size use constant memory."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'format',
+                openapi.IN_QUERY,
+                description="File format",
+                type=openapi.TYPE_STRING,
+                enum=list(EXPORT_FORMATS),
+                default='csv'
+            ),
+            openapi.Parameter('product_type', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('service', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('payment_status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING)
+        ],
+        responses={
+            200: 'CSV or NDJSON file',
+            400: 'Unsupported format',
+            401: 'Authentication required'
+        }
+    )
+    def get(self, request):
+        file_format = request.query_params.get('format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'Unsupported format. Use one of: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_shipments(queryset, file_format, chunk_size=settings.SHIPMENT_EXPORT_CHUNK_SIZE),
+            content_type=CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="shipments.{file_format}"'
+        # Let a buffering proxy pass the rows on as they are produced
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class ShipmentDetailView(generics.RetrieveAPIView):
     """
     Retrieve detailed shipment information.
     """
-    queryset = Shipment.objects.all()
+    queryset = Shipment.objects.for_detail()
     serializer_class = ShipmentDetailSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
     lookup_field = 'id'
@@ -137,56 +420,144 @@ class ShipmentDetailView(generics.RetrieveAPIView):
         return super().get(request, *args, **kwargs)
 
 
-@api_view(['GET'])
-@permission_classes([IsPublicTracking])
-@swagger_auto_schema(
-    operation_description="Track shipment by AWB or REF number",
-    manual_parameters=[
-        openapi.Parameter(
-            'tracking_number',
-            openapi.IN_QUERY,
-            description="AWB or REF tracking number",
-            type=openapi.TYPE_STRING,
-            required=True
-        )
-    ],
-    responses={
-        200: openapi.Response('Shipment tracking information', ShipmentTrackingSerializer),
-        400: 'Invalid tracking number format',
-        404: 'Shipment not found'
-    }
-)
-def track_shipment(request):
+class TrackShipmentView(AsyncAPIView):
     """
     Track shipment by AWB or REF number (public access).
     """
-    tracking_number = request.GET.get('tracking_number')
+    permission_classes = [IsPublicTracking]
     
-    if not tracking_number:
-        return Response(
-            {'error': 'Tracking number is required'}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    try:
+    @swagger_auto_schema(
+        operation_description="Track shipment by AWB or REF number",
+        manual_parameters=[
+            openapi.Parameter(
+                'tracking_number',
+                openapi.IN_QUERY,
+                description="AWB or REF tracking number",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={
+            200: openapi.Response('Shipment tracking information', ShipmentTrackingSerializer),
+            400: 'Invalid tracking number format',
+            404: 'Shipment not found'
+        }
+    )
+    @cache_response(
+        TRACKING_RESPONSE_CACHE, timeout=get_tracking_cache_timeout, version=aget_tracking_data_version,
+        key=lambda request: request.query_params.get('tracking_number') or None
+    )
+    async def get(self, request):
+        tracking_number = request.query_params.get('tracking_number')
+        
+        if not tracking_number:
+            return Response(
+                {'error': 'Tracking number is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         if tracking_number.startswith('AWB-'):
-            shipment = Shipment.objects.get(awb_number=tracking_number)
+            lookup = {'awb_number': tracking_number}
         elif tracking_number.startswith('REF-'):
-            shipment = Shipment.objects.get(reference_number=tracking_number)
+            lookup = {'reference_number': tracking_number}
         else:
             return Response(
                 {'error': 'Invalid tracking number format. Use AWB- or REF- prefix.'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        serializer = ShipmentTrackingSerializer(shipment)
-        return Response(serializer.data)
+        # Repeat polls are served from the cache, which Shipment.save() invalidates
+        cache_key = tracking_cache_key(tracking_number, await aget_tracking_data_version())
+        data = await cache.aget(cache_key)
+        if data is None:
+            try:
+                shipment = await Shipment.objects.for_tracking().aget(**lookup)
+            except Shipment.DoesNotExist:
+                return Response(
+                    {'error': 'Shipment not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            # for_tracking() loads everything the serializer reads, so this does no queries
+            data = ShipmentTrackingSerializer(shipment).data
+            await cache.aset(cache_key, data, get_tracking_cache_timeout())
         
-    except Shipment.DoesNotExist:
-        return Response(
-            {'error': 'Shipment not found'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
+        return Response(data)
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Track many shipments by AWB or REF number in one request",
+    request_body=BulkTrackingRequestSerializer,
+    responses={
+        200: openapi.Response(
+            'Tracking information keyed by tracking number; unknown numbers map to an error marker',
+            openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        additional_properties=openapi.Schema(type=openapi.TYPE_OBJECT)
+                    )
+                }
+            )
+        ),
+        400: 'Bad request - validation errors'
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsPublicTracking])
+def track_shipments_bulk(request):
+    """
+    Track many shipments by AWB or REF number (public access).
+    """
+    serializer = BulkTrackingRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    tracking_numbers = list(dict.fromkeys(serializer.validated_data['tracking_numbers']))
+    
+    version = get_tracking_data_version()
+    cached = cache.get_many([tracking_cache_key(number, version) for number in tracking_numbers])
+    results = {}
+    for number in tracking_numbers:
+        data = cached.get(tracking_cache_key(number, version))
+        if data is not None:
+            results[number] = data
+    
+    missing = [number for number in tracking_numbers if number not in results]
+    shipments = Shipment.objects.for_tracking().in_bulk_by_tracking_numbers(missing)
+    fresh = {}
+    for number in missing:
+        shipment = shipments.get(number)
+        if shipment is not None:
+            results[number] = ShipmentTrackingSerializer(shipment).data
+            fresh[tracking_cache_key(number, version)] = results[number]
+        elif number.startswith(('AWB-', 'REF-')):
+            results[number] = {'error': 'Shipment not found'}
+        else:
+            results[number] = {'error': 'Invalid tracking number format. Use AWB- or REF- prefix.'}
+    if fresh:
+        cache.set_many(fresh, get_tracking_cache_timeout())
+    
+    return Response({'results': {number: results[number] for number in tracking_numbers}})
+
+
+def wants_async_pdf(request):
+    """Return True when the client asked for background rendering (``?async=true``)."""
+    return request.query_params.get('async', '').lower() in ('1', 'true', 'yes')
+
+
+def enqueue_pdf_response(request, shipment, document_type):
+    """Queue a PDF render and answer with the job instead of the file."""
+    job = enqueue_pdf_render(shipment, document_type)
+    serializer = PDFRenderJobSerializer(job, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+async_pdf_parameter = openapi.Parameter(
+    'async',
+    openapi.IN_QUERY,
+    description="Queue the PDF for background rendering and return a render job instead of the file",
+    type=openapi.TYPE_BOOLEAN
+)
 
 
 class ShipmentConfirmationPDFView(generics.GenericAPIView):
@@ -197,14 +568,19 @@ class ShipmentConfirmationPDFView(generics.GenericAPIView):
     
     @swagger_auto_schema(
         operation_description="Generate shipment confirmation PDF",
+        manual_parameters=[async_pdf_parameter],
         responses={
             200: openapi.Response('PDF file', content_type='application/pdf'),
+            202: openapi.Response('Render job queued', PDFRenderJobSerializer),
+            304: 'PDF not modified since the ETag or Last-Modified sent by the client',
             404: 'Shipment not found'
         }
     )
     def get(self, request, id):
-        shipment = get_object_or_404(Shipment, id=id)
-        return generate_shipment_confirmation_pdf(shipment)
+        shipment = get_object_or_404(Shipment.objects.with_geography(), id=id)
+        if wants_async_pdf(request):
+            return enqueue_pdf_response(request, shipment, 'confirmation')
+        return generate_shipment_confirmation_pdf(shipment, request)
 
 
 class ShipmentDetailedPDFView(generics.GenericAPIView):
@@ -215,15 +591,20 @@ class ShipmentDetailedPDFView(generics.GenericAPIView):
     
     @swagger_auto_schema(
         operation_description="Generate detailed shipment PDF (admin only)",
+        manual_parameters=[async_pdf_parameter],
         responses={
             200: openapi.Response('PDF file', content_type='application/pdf'),
+            202: openapi.Response('Render job queued', PDFRenderJobSerializer),
+            304: 'PDF not modified since the ETag or Last-Modified sent by the client',
             403: 'Admin access required',
             404: 'Shipment not found'
         }
     )
     def get(self, request, id):
-        shipment = get_object_or_404(Shipment, id=id)
-        return generate_shipment_detailed_pdf(shipment)
+        shipment = get_object_or_404(Shipment.objects.with_geography(), id=id)
+        if wants_async_pdf(request):
+            return enqueue_pdf_response(request, shipment, 'detailed')
+        return generate_shipment_detailed_pdf(shipment, request)
 
 
 class ShipmentLabelPDFView(generics.GenericAPIView):
@@ -234,12 +615,120 @@ class ShipmentLabelPDFView(generics.GenericAPIView):
     
     @swagger_auto_schema(
         operation_description="Generate shipment label PDF (admin only)",
+        manual_parameters=[async_pdf_parameter],
         responses={
             200: openapi.Response('PDF file', content_type='application/pdf'),
+            202: openapi.Response('Render job queued', PDFRenderJobSerializer),
+            304: 'PDF not modified since the ETag or Last-Modified sent by the client',
             403: 'Admin access required',
             404: 'Shipment not found'
         }
     )
     def get(self, request, id):
-        shipment = get_object_or_404(Shipment, id=id)
-        return generate_shipment_label_pdf(shipment)
+        shipment = get_object_or_404(Shipment.objects.with_geography(), id=id)
+        if wants_async_pdf(request):
+            return enqueue_pdf_response(request, shipment, 'label')
+        return generate_shipment_label_pdf(shipment, request)
+
+
+class ShipmentLabelBatchPDFView(generics.GenericAPIView):
+    """
+    Print labels for many shipments at once (admin version).
+    """
+    serializer_class = LabelBatchRequestSerializer
+    permission_classes = [IsAdminUser]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Render labels for the selected shipments into one multi-page PDF (admin only). "
+            "With stream=true the labels are rendered in chunks and streamed as a ZIP of PDFs."
+        ),
+        request_body=LabelBatchRequestSerializer,
+        responses={
+            200: openapi.Response('PDF file, or ZIP archive of PDFs when streaming', content_type='application/pdf'),
+            400: 'Bad request - validation errors or batch too large',
+            403: 'Admin access required',
+            404: 'No shipments matched'
+        }
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = dict(serializer.validated_data)
+        stream = options.pop('stream')
+        chunk_size = options.pop('chunk_size')
+        queryset = get_label_queryset(**options)
+        
+        if stream:
+            response = StreamingHttpResponse(
+                iter_zip_stream(iter_label_pdfs(queryset, chunk_size)),
+                content_type='application/zip'
+            )
+            response['Content-Disposition'] = 'attachment; filename="labels.zip"'
+            return response
+        
+        max_labels = settings.LABEL_BATCH_MAX_SHIPMENTS
+        shipments = list(queryset[:max_labels + 1])
+        if not shipments:
+            return Response({'error': 'No shipments matched'}, status=status.HTTP_404_NOT_FOUND)
+        if len(shipments) > max_labels:
+            return Response(
+                {'error': f'More than {max_labels} shipments matched. Use stream=true for large batches.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = HttpResponse(render_shipment_labels_pdf(shipments), content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="labels.pdf"'
+        return response
+
+
+class PDFRenderJobDetailView(generics.RetrieveAPIView):
+    """
+    Retrieve the status of a background PDF render job.
+    """
+    queryset = PDFRenderJob.objects.all()
+    serializer_class = PDFRenderJobSerializer
+    permission_classes = [CanAccessPDFJob]
+    lookup_field = 'id'
+    
+    @swagger_auto_schema(
+        operation_description="Get the status of a PDF render job",
+        responses={
+            200: openapi.Response('Render job', PDFRenderJobSerializer),
+            403: 'Admin access required for detailed and label PDFs',
+            404: 'Job not found'
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class PDFRenderJobDownloadView(generics.GenericAPIView):
+    """
+    Download the PDF produced by a finished render job.
+    """
+    queryset = PDFRenderJob.objects.select_related('shipment__shipper')
+    serializer_class = PDFRenderJobSerializer
+    permission_classes = [CanAccessPDFJob]
+    lookup_field = 'id'
+    
+    @swagger_auto_schema(
+        operation_description="Download the PDF of a finished render job",
+        responses={
+            200: openapi.Response('PDF file', content_type='application/pdf'),
+            202: openapi.Response('Shipment changed since rendering; re-render queued', PDFRenderJobSerializer),
+            304: 'PDF not modified since the ETag or Last-Modified sent by the client',
+            403: 'Admin access required for detailed and label PDFs',
+            404: 'Job not found',
+            409: openapi.Response('Job has not finished', PDFRenderJobSerializer)
+        }
+    )
+    def get(self, request, id):
+        job = self.get_object()
+        if job.status != 'done':
+            return Response(self.get_serializer(job).data, status=status.HTTP_409_CONFLICT)
+        if not get_pdf_cache_path(job.shipment, job.document_type).exists():
+            # The shipment changed after rendering; queue the current version
+            job = enqueue_pdf_render(job.shipment, job.document_type)
+            return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+        return shipment_pdf_response(job.shipment, job.document_type, request)
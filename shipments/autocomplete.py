@@ -0,0 +1,152 @@
+"""
+In-memory prefix index for city autocomplete.
+
+``SearchFilter`` on the city list is an ``ILIKE '%term%'`` scan of the whole
+cities_light table on every keystroke. This index is built once per process
+from cities_light data and answers prefix queries with a binary search over
+sorted keys instead:
+
+* names are matched accent- and case-insensitively, at the start of the name
+  or of any later word ("york" finds "New York");
+* results are ranked by population, then name;
+* queries can be scoped to one country, which has its own sorted keys;
+* the top results of every one- and two-letter prefix are precomputed, since
+  those prefixes match the most cities.
+
+The index is rebuilt when the reference data version changes, i.e. after a
+cities_light import or an edit of a country or city.
+"""
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from cities_light.models import City
+from .cache import get_reference_data_version
+
+# Prefixes up to this length have their top results precomputed
+PRECOMPUTED_PREFIX_LENGTH = 2
+# Results kept per precomputed prefix; requests cannot ask for more than this
+MAX_RESULTS = 20
+
+
+def normalize(text):
+    """Fold accents, case and whitespace: ``'  São  Paulo'`` becomes ``'sao paulo'``."""
+    text = text or ''
+    if not text.isascii():
+        decomposed = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def iter_keys(*names):
+    """Yield the searchable keys of a city from its normalized names: each name from every word onwards."""
+    seen = set()
+    for name in names:
+        words = name.split(' ')
+        for index in range(len(words)):
+            key = ' '.join(words[index:])
+            if key and key not in seen:
+                seen.add(key)
+                yield key
+
+
+class _SortedKeys:
+    """Parallel sorted lists of keys and city ids, searchable by prefix."""
+
+    def __init__(self, pairs):
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.city_ids = [city_id for _, city_id in pairs]
+
+    def prefix_range(self, prefix):
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + '\uffff')
+
+
+class CityAutocompleteIndex:
+    """Prefix index over city names, ranked by population."""
+
+    def __init__(self, cities):
+        """
+        ``cities`` is an iterable of dicts with ``id``, ``name``, ``name_ascii``,
+        ``population`` and ``country`` (a dict with ``id``, ``name``,
+        ``code2`` and ``code3``).
+        """
+        self.cities = {}
+        self.rank = {}
+        all_pairs = []
+        country_pairs = defaultdict(list)
+        for city in cities:
+            city_id = city['id']
+            name = normalize(city['name'])
+            self.cities[city_id] = {'id': city_id, 'name': city['name'], 'country': city['country']}
+            self.rank[city_id] = (-(city['population'] or 0), name, city_id)
+            for key in iter_keys(name, normalize(city['name_ascii'])):
+                all_pairs.append((key, city_id))
+                country_pairs[city['country']['id']].append((key, city_id))
+
+        self.all = _SortedKeys(all_pairs)
+        self.by_country = {country_id: _SortedKeys(pairs) for country_id, pairs in country_pairs.items()}
+        self.top = {None: self._precompute_top(self.all)}
+        for country_id, keys in self.by_country.items():
+            self.top[country_id] = self._precompute_top(keys)
+
+    def _precompute_top(self, sorted_keys):
+        prefixes = {
+            key[:length]
+            for key in sorted_keys.keys
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1)
+        }
+        return {prefix: self._rank(sorted_keys, prefix, MAX_RESULTS) for prefix in prefixes}
+
+    def _rank(self, sorted_keys, prefix, limit):
+        start, end = sorted_keys.prefix_range(prefix)
+        return heapq.nsmallest(limit, set(sorted_keys.city_ids[start:end]), key=self.rank.__getitem__)
+
+    def search(self, term, country_id=None, limit=10):
+        """Return up to ``limit`` cities whose name or a later word starts with ``term``."""
+        prefix = normalize(term)
+        limit = min(limit, MAX_RESULTS)
+        if not prefix or limit < 1:
+            return []
+        sorted_keys = self.all if country_id is None else self.by_country.get(country_id)
+        if sorted_keys is None:
+            return []
+
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            city_ids = self.top[country_id].get(prefix, [])[:limit]
+        else:
+            city_ids = self._rank(sorted_keys, prefix, limit)
+        return [self.cities[city_id] for city_id in city_ids]
+
+
+def load_cities():
+    """Read every city with its country in one query."""
+    rows = City.objects.values_list(
+        'id', 'name', 'name_ascii', 'population',
+        'country_id', 'country__name', 'country__code2', 'country__code3',
+    )
+    for city_id, name, name_ascii, population, country_id, country_name, code2, code3 in rows.iterator(chunk_size=5000):
+        yield {
+            'id': city_id,
+            'name': name,
+            'name_ascii': name_ascii,
+            'population': population,
+            'country': {'id': country_id, 'name': country_name, 'code2': code2, 'code3': code3},
+        }
+
+
+_index_lock = threading.Lock()
+_index = {'version': None, 'index': None}
+
+
+def get_city_index():
+    """Return the index for the current reference data version, building it if needed."""
+    version = get_reference_data_version()
+    if _index['version'] != version:
+        with _index_lock:
+            if _index['version'] != version:
+                _index['index'] = CityAutocompleteIndex(load_cities())
+                _index['version'] = version
+    return _index['index']
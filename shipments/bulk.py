@@ -0,0 +1,91 @@
+"""
+Writing shipments in bulk.
+
+Shared by the bulk creation API and the ``import_shipments`` command.
+Identical shippers of a batch are stored once, and both tables are written
+with ``bulk_create`` in one transaction. On PostgreSQL, callers that do not
+need the new shipment IDs can load the shipments with ``COPY`` instead,
+which is several times faster than multi-row ``INSERT`` for large chunks.
+"""
+import csv
+import io
+
+from django.db import connection, transaction
+from shipments.models import Shipment, Shipper
+
+# Shipper fields compared to store identical shippers of a batch only once
+SHIPPER_KEY_FIELDS = (
+    'shipper_name', 'address', 'country', 'city', 'zip_code', 'location',
+    'contact_person', 'contact_number', 'mobile_number', 'identity_image',
+)
+
+# Marks NULL in the CSV sent to COPY, so empty strings stay empty strings
+COPY_NULL = '\\N'
+
+
+def shipper_key(shipper_data):
+    """Identify a shipper by its fields; ``country`` and ``city`` may be objects or ``*_id`` values."""
+    return tuple(
+        getattr(value, 'pk', value)
+        for value in (shipper_data.get(field, shipper_data.get(f'{field}_id')) for field in SHIPPER_KEY_FIELDS)
+    )
+
+
+def can_copy():
+    return connection.vendor == 'postgresql'
+
+
+def copy_insert(model, objs):
+    """
+    Insert ``objs`` with PostgreSQL ``COPY``.
+
+    Unlike ``bulk_create`` this does not set the primary keys of ``objs``.
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        row = []
+        for field in fields:
+            value = field.get_db_prep_save(field.pre_save(obj, True), connection)
+            row.append(COPY_NULL if value is None else value)
+        writer.writerow(row)
+    buffer.seek(0)
+
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    # copy_expert() bypasses the cursor wrapper, so driver errors are wrapped here
+    # into Django's DatabaseError subclasses, which callers handle
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        cursor.copy_expert(
+            f"COPY {quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
+
+
+def save_shipments(entries, batch_size=None, use_copy=False):
+    """
+    Save ``(shipper_data, shipment)`` pairs, where ``shipment`` is an unsaved
+    ``Shipment`` without a shipper.
+
+    Shippers with identical ``shipper_data`` are stored once. With
+    ``use_copy`` the shipments are loaded with ``COPY`` and keep ``id=None``.
+    """
+    shippers = {}
+    keys = []
+    for shipper_data, _ in entries:
+        key = shipper_key(shipper_data)
+        if key not in shippers:
+            shippers[key] = Shipper(**shipper_data)
+        keys.append(key)
+
+    shipments = [shipment for _, shipment in entries]
+    with transaction.atomic():
+        Shipper.objects.bulk_create(shippers.values(), batch_size=batch_size)
+        for key, shipment in zip(keys, shipments):
+            shipment.shipper = shippers[key]
+        if use_copy:
+            copy_insert(Shipment, shipments)
+        else:
+            Shipment.objects.bulk_create(shipments, batch_size=batch_size)
+    return shipments
@@ -0,0 +1,110 @@
+"""
+Cache keys and invalidation helpers for shipment data served from the cache.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from core.cache import response_cache_key
+from .utils.pdf_cache import purge_pdf_cache
+
+TRACKING_CACHE_PREFIX = 'shipments:tracking:'
+TRACKING_DATA_VERSION_KEY = f'{TRACKING_CACHE_PREFIX}version'
+# Name of the response cache of the tracking endpoint, keyed by tracking number alone
+TRACKING_RESPONSE_CACHE = 'track'
+REFERENCE_DATA_CACHE_PREFIX = 'shipments:reference-data:'
+REFERENCE_DATA_VERSION_KEY = f'{REFERENCE_DATA_CACHE_PREFIX}version'
+# Version of data that was never bumped, or whose version key was evicted. It is
+# the same in every process, so losing the key does not invalidate everything;
+# at worst, entries cached before the first bump are served until they expire.
+INITIAL_DATA_VERSION = 'initial'
+
+
+def tracking_cache_key(tracking_number, version):
+    """Return the cache key holding the public tracking payload for a number."""
+    return f'{TRACKING_CACHE_PREFIX}{version}:{tracking_number}'
+
+
+def get_tracking_cache_timeout():
+    return getattr(settings, 'TRACKING_CACHE_TIMEOUT', 300)
+
+
+def _get_data_version(key):
+    return cache.get(key, INITIAL_DATA_VERSION)
+
+
+async def _aget_data_version(key):
+    return await cache.aget(key, INITIAL_DATA_VERSION)
+
+
+def _bump_data_version(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def get_tracking_data_version():
+    """
+    Return the current version of the tracking payloads. They are keyed by
+    it, so a change to a shipper, country or city printed in many payloads
+    bumps it instead of deleting each payload.
+    """
+    return _get_data_version(TRACKING_DATA_VERSION_KEY)
+
+
+async def aget_tracking_data_version():
+    """Async version of ``get_tracking_data_version``."""
+    return await _aget_data_version(TRACKING_DATA_VERSION_KEY)
+
+
+def bump_tracking_data_version():
+    _bump_data_version(TRACKING_DATA_VERSION_KEY)
+
+
+def invalidate_tracking_cache(shipment):
+    """
+    Drop the cached tracking payloads of a shipment once the current
+    transaction commits, so a concurrent poll cannot re-cache stale data.
+    """
+    numbers = [number for number in (shipment.awb_number, shipment.reference_number) if number]
+
+    def invalidate():
+        version = get_tracking_data_version()
+        cache.delete_many([
+            key
+            for number in numbers
+            for key in (
+                tracking_cache_key(number, version),
+                response_cache_key(TRACKING_RESPONSE_CACHE, number, version),
+            )
+        ])
+
+    if numbers:
+        transaction.on_commit(invalidate)
+
+
+def invalidate_pdf_cache(shipment):
+    """Remove the rendered PDFs of a shipment once the current transaction commits."""
+    shipment_id = shipment.pk
+    if shipment_id is not None:
+        transaction.on_commit(lambda: purge_pdf_cache(shipment_id))
+
+
+def get_reference_data_version():
+    """
+    Return the current version of the country/city reference data. Cached
+    reference payloads are keyed by it, so bumping it invalidates them all.
+    """
+    return _get_data_version(REFERENCE_DATA_VERSION_KEY)
+
+
+async def aget_reference_data_version():
+    """Async version of ``get_reference_data_version``."""
+    return await _aget_data_version(REFERENCE_DATA_VERSION_KEY)
+
+
+def bump_reference_data_version():
+    _bump_data_version(REFERENCE_DATA_VERSION_KEY)
+
+
+def get_reference_data_cache_timeout():
+    return getattr(settings, 'REFERENCE_DATA_CACHE_TIMEOUT', 86400)
@@ -0,0 +1,141 @@
+"""
+Streaming export of shipments as CSV or NDJSON.
+
+Rows are read with ``values_list()`` in pages of ``chunk_size``, each page
+one query continuing after the last row of the previous one (keyset
+pagination). Only one page is held in memory at a time and no model
+instances are built, without relying on server-side cursors, which are
+unavailable behind PgBouncer. Shipper and place names are joined in the
+same query. The output is produced as an iterator of text blocks that can
+feed a ``StreamingHttpResponse`` or a file.
+"""
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Exported columns and the lookup each one is read from
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('awb_number', 'awb_number'),
+    ('reference_number', 'reference_number'),
+    ('created_at', 'created_at'),
+    ('payment_status', 'payment_status'),
+    ('product_type', 'product_type'),
+    ('service', 'service'),
+    ('shipper_name', 'shipper__shipper_name'),
+    ('shipper_country', 'shipper__country__name'),
+    ('shipper_city', 'shipper__city__name'),
+    ('receiver_name', 'receiver_name'),
+    ('receiver_country', 'receiver_country__name'),
+    ('receiver_city', 'receiver_city__name'),
+    ('quantity', 'quantity'),
+    ('grossweight', 'grossweight'),
+    ('volumetricks', 'volumetricks'),
+    ('chargeable_weight', 'chargeable_weight'),
+    ('price_of_shipment', 'price_of_shipment'),
+    ('cod_amount', 'cod_amount'),
+    ('base_price', 'base_price'),
+    ('additional_charges', 'additional_charges'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Text is handed out in blocks of about this many characters rather than per row
+BLOCK_SIZE = 64 * 1024
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def get_keyset_ordering(queryset):
+    """Return the ordering of ``queryset`` with the primary key appended, so every row has a unique position."""
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if not all(isinstance(field, str) for field in ordering):
+        raise ValueError('Exports can only be ordered by field names.')
+    if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+        ordering.append('pk')
+    return ordering
+
+
+def rows_after(ordering, values):
+    """
+    Return the filter selecting the rows that come after the row with the
+    given ``ordering`` values. The ordered columns must not be null.
+    """
+    condition = Q(pk__in=[])
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def iter_export_rows(queryset, chunk_size=2000):
+    """Yield one tuple per shipment, in ``EXPORT_COLUMNS`` order, reading ``chunk_size`` rows per query."""
+    ordering = get_keyset_ordering(queryset)
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    # The ordering values are read along with each row, to continue after the last one
+    rows = queryset.order_by(*ordering).values_list(*lookups, *(field.lstrip('-') for field in ordering))
+    width = len(lookups)
+    page = list(rows[:chunk_size])
+    while page:
+        for row in page:
+            yield row[:width]
+        if len(page) < chunk_size:
+            return
+        page = list(rows.filter(rows_after(ordering, page[-1][width:]))[:chunk_size])
+
+
+def csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Shown as text instead of being evaluated when the file is opened in a spreadsheet
+        return f"'{value}"
+    return value
+
+
+def _iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in rows:
+        writer.writerow(csv_value(value) for value in row)
+        if buffer.tell() >= BLOCK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _iter_ndjson(rows):
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    block = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(dict(zip(columns, row))) + '\n'
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield ''.join(block)
+            block = []
+            size = 0
+    yield ''.join(block)
+
+
+def export_shipments(queryset, file_format='csv', chunk_size=2000):
+    """Return an iterator of text blocks exporting ``queryset`` in ``file_format``."""
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format "{file_format}"; use one of {", ".join(EXPORT_FORMATS)}.')
+    rows = iter_export_rows(queryset, chunk_size)
+    return _iter_csv(rows) if file_format == 'csv' else _iter_ndjson(rows)
@@ -0,0 +1,100 @@
+"""
+Batch lookups of cities_light countries and cities.
+
+Validating many rows one ``get()`` at a time costs a round trip per row and
+field. ``GeographyLookup`` loads every city a batch refers to, with its
+country, in one query, and the referenced country IDs in another.
+
+Imported files name places instead of using IDs. ``GeographyNameIndex``
+reads all countries and cities once and resolves names in memory.
+"""
+from cities_light.models import Country, City
+from .autocomplete import normalize
+
+
+class GeographyLookup:
+    """Cities (with their countries) and country IDs preloaded for a batch of rows."""
+
+    def __init__(self, country_ids=(), city_ids=()):
+        self.cities = City.objects.select_related('country').in_bulk(set(city_ids)) if city_ids else {}
+        self.country_ids = set(
+            Country.objects.filter(id__in=set(country_ids)).values_list('id', flat=True)
+        ) if country_ids else set()
+
+    def get_city(self, city_id):
+        return self.cities.get(city_id)
+
+    def has_country(self, country_id):
+        return country_id in self.country_ids
+
+
+def _as_id(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+class GeographyNameIndex:
+    """
+    Country and city IDs by name.
+
+    Countries are found by name, ASCII name, ISO code or ID; cities by name,
+    ASCII name or ID within their country. When a country has several cities
+    of the same name, the most populous one wins.
+    """
+
+    def __init__(self, countries, cities):
+        """
+        ``countries`` yields ``(id, name, name_ascii, code2, code3)`` and
+        ``cities`` yields ``(id, country_id, name, name_ascii, population)``.
+        """
+        self.countries = {}
+        self.country_ids = set()
+        codes = {}
+        for country_id, name, name_ascii, code2, code3 in countries:
+            self.country_ids.add(country_id)
+            for value in (name, name_ascii):
+                if value:
+                    self.countries.setdefault(normalize(value), country_id)
+            for value in (code2, code3):
+                if value:
+                    codes.setdefault(normalize(value), country_id)
+        # Names take precedence over codes
+        for code, country_id in codes.items():
+            self.countries.setdefault(code, country_id)
+
+        ranked = {}
+        self.city_countries = {}
+        for city_id, country_id, name, name_ascii, population in cities:
+            self.city_countries[city_id] = country_id
+            rank = (population or 0, -city_id)
+            for value in {normalize(name), normalize(name_ascii)}:
+                key = (country_id, value)
+                if value and (key not in ranked or rank > ranked[key][0]):
+                    ranked[key] = (rank, city_id)
+        self.cities = {key: city_id for key, (_, city_id) in ranked.items()}
+
+    @classmethod
+    def load(cls):
+        """Build the index from every cities_light country and city, one query each."""
+        countries = Country.objects.values_list('id', 'name', 'name_ascii', 'code2', 'code3')
+        cities = City.objects.values_list('id', 'country_id', 'name', 'name_ascii', 'population')
+        return cls(countries.iterator(), cities.iterator(chunk_size=5000))
+
+    def get_country_id(self, value):
+        """Return the ID of the country named or identified by ``value``, or ``None``."""
+        country_id = _as_id(value)
+        if country_id is not None:
+            return country_id if country_id in self.country_ids else None
+        return self.countries.get(normalize(str(value)))
+
+    def get_city_id(self, country_id, value):
+        """Return the ID of the city of ``country_id`` named or identified by ``value``, or ``None``."""
+        city_id = _as_id(value)
+        if city_id is not None:
+            return city_id if self.city_countries.get(city_id) == country_id else None
+        return self.cities.get((country_id, normalize(str(value))))
@@ -0,0 +1,334 @@
+"""
+Import of shipment manifests from CSV and XLSX files.
+
+Used by the ``import_shipments`` management command. Files are streamed row
+by row, so memory use does not grow with the file. Rows are converted to
+shippers and shipments with the model fields' own validation, and place
+names are resolved against ``GeographyNameIndex``, so converting a row
+makes no query. Chunks of converted rows are written with
+``save_shipments``.
+
+Reading XLSX files needs the optional ``openpyxl`` package.
+"""
+import csv
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import DatabaseError, models, transaction
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+from .bulk import save_shipments
+from .models import ImportChunk, Shipment, Shipper
+from .sequences import advance_tracking_number_sequence, allocate_tracking_numbers, get_highest_tracking_number
+
+FILE_FORMATS = ('csv', 'xlsx')
+
+# Manifest columns describing the shipper, and the Shipper field each one fills
+SHIPPER_COLUMNS = {
+    'shipper_name': 'shipper_name',
+    'shipper_address': 'address',
+    'shipper_zip_code': 'zip_code',
+    'shipper_location': 'location',
+    'shipper_contact_person': 'contact_person',
+    'shipper_contact_number': 'contact_number',
+    'shipper_mobile_number': 'mobile_number',
+}
+
+# Manifest columns named after the Shipment field they fill
+SHIPMENT_COLUMNS = (
+    'receiver_name', 'receiver_address', 'receiver_zip_code', 'receiver_location',
+    'receiver_contact_person', 'receiver_contact_number', 'receiver_mobile_number',
+    'awb_number', 'reference_number', 'forwarder', 'product_type', 'service', 'payment_status',
+    'quantity', 'grossweight', 'width', 'length', 'height',
+    'price_of_shipment', 'item_description', 'special_instruction',
+    'cod_amount', 'base_price', 'additional_charges',
+)
+
+# Place columns, holding a name, code or ID: (country column, city column, target)
+PLACE_COLUMNS = (
+    ('shipper_country', 'shipper_city', 'shipper'),
+    ('receiver_country', 'receiver_city', 'receiver'),
+)
+
+COLUMNS = (
+    *SHIPPER_COLUMNS,
+    *(column for country, city, _ in PLACE_COLUMNS for column in (country, city)),
+    *SHIPMENT_COLUMNS,
+)
+
+# Returned by clean_value for blank cells of fields with a default
+DEFAULT = object()
+
+
+def get_column_fields():
+    """Return the model field behind each shipper and shipment column."""
+    fields = {column: Shipper._meta.get_field(name) for column, name in SHIPPER_COLUMNS.items()}
+    fields.update((column, Shipment._meta.get_field(column)) for column in SHIPMENT_COLUMNS)
+    return fields
+
+
+def get_required_columns():
+    return [
+        column for column, field in get_column_fields().items()
+        if not field.blank and not field.has_default()
+    ]
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def clean_value(field, value):
+    """Convert and validate a cell for a model field, like ``Model.full_clean()`` would."""
+    if isinstance(value, str):
+        value = value.strip()
+    elif isinstance(value, float) and value.is_integer() and isinstance(field, models.CharField):
+        # Spreadsheets store phone numbers and zip codes as numbers
+        value = int(value)
+    if is_blank(value):
+        if field.has_default():
+            return DEFAULT
+        if field.null:
+            return None
+        raise ValidationError(field.error_messages['blank'], code='blank')
+    return field.clean(value, None)
+
+
+def read_csv(path):
+    # utf-8-sig drops the byte order mark Excel puts in front of CSV exports
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        yield from csv.reader(handle)
+
+
+def read_xlsx(path, sheet=None):
+    if openpyxl is None:
+        raise ImproperlyConfigured('Reading XLSX files requires the openpyxl package.')
+    # Read-only mode streams the rows instead of loading the whole workbook
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet and sheet not in workbook.sheetnames:
+            raise ValueError(f'The workbook has no sheet named "{sheet}".')
+        worksheet = workbook[sheet] if sheet else workbook.active
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(path, file_format=None, sheet=None):
+    """Yield the rows of a CSV or XLSX file as sequences of cells, header row first."""
+    file_format = file_format or Path(path).suffix.lstrip('.').lower()
+    if file_format == 'csv':
+        return read_csv(path)
+    if file_format == 'xlsx':
+        return read_xlsx(path, sheet)
+    raise ValueError(f'Unsupported file format "{file_format}"; use one of {", ".join(FILE_FORMATS)}.')
+
+
+def iter_chunks(rows, chunk_size, skip=0):
+    """
+    Group data rows into chunks of ``(line, row)`` pairs, where ``line`` is
+    the row's line in the file, counting the header as line 1.
+
+    Yields ``(rows_read, chunk)``, ``rows_read`` being the number of data rows
+    read so far, including the ``skip`` rows skipped at the start.
+    """
+    rows_read = skip
+    rows = islice(rows, skip, None)
+    while True:
+        chunk = [(rows_read + offset + 2, row) for offset, row in enumerate(islice(rows, chunk_size))]
+        if not chunk:
+            return
+        rows_read += len(chunk)
+        yield rows_read, chunk
+
+
+def format_errors(error):
+    return '; '.join(f'{column}: {" ".join(messages)}' for column, messages in error.message_dict.items())
+
+
+class ShipmentRowConverter:
+    """Turn manifest rows into unsaved shippers and shipments owned by ``owner``."""
+
+    def __init__(self, headers, owner, geography, column_map=None):
+        """
+        ``column_map`` maps file headers to column names, for files whose
+        headers differ from ``COLUMNS``. Unknown headers are ignored.
+        """
+        column_map = column_map or {}
+        self.owner = owner
+        self.geography = geography
+        self.positions = {}
+        for position, header in enumerate(headers):
+            header = '' if header is None else str(header).strip()
+            column = column_map.get(header, header)
+            if column in COLUMNS:
+                self.positions.setdefault(column, position)
+        self.missing_columns = [column for column in get_required_columns() if column not in self.positions]
+
+        fields = get_column_fields()
+        self.shipper_fields = [
+            (column, name, fields[column]) for column, name in SHIPPER_COLUMNS.items()
+        ]
+        self.shipment_fields = [(column, column, fields[column]) for column in SHIPMENT_COLUMNS]
+
+    def get_cell(self, row, column):
+        position = self.positions.get(column)
+        if position is None or position >= len(row):
+            return None
+        return row[position]
+
+    def clean_fields(self, row, fields, data, errors):
+        for column, name, field in fields:
+            try:
+                value = clean_value(field, self.get_cell(row, column))
+            except ValidationError as error:
+                errors[column] = error.messages
+                continue
+            if value is not DEFAULT:
+                data[name] = value
+
+    def resolve_place(self, row, country_column, city_column, errors):
+        country_name = self.get_cell(row, country_column)
+        city_name = self.get_cell(row, city_column)
+        country_id = city_id = None
+        if not is_blank(country_name):
+            country_id = self.geography.get_country_id(country_name)
+            if country_id is None:
+                errors[country_column] = [f'Unknown country "{country_name}".']
+        if not is_blank(city_name):
+            if country_id is None:
+                if country_column not in errors:
+                    errors[city_column] = ['A city needs a country.']
+            else:
+                city_id = self.geography.get_city_id(country_id, city_name)
+                if city_id is None:
+                    errors[city_column] = [f'Unknown city "{city_name}" in this country.']
+        return country_id, city_id
+
+    def convert(self, row):
+        """Return ``(shipper_data, shipment)`` for a row, or raise ``ValidationError`` keyed by column."""
+        errors = {}
+        shipper_data = {}
+        shipment_data = {}
+        self.clean_fields(row, self.shipper_fields, shipper_data, errors)
+        self.clean_fields(row, self.shipment_fields, shipment_data, errors)
+        for country_column, city_column, target in PLACE_COLUMNS:
+            country_id, city_id = self.resolve_place(row, country_column, city_column, errors)
+            if target == 'shipper':
+                shipper_data.update(country_id=country_id, city_id=city_id)
+            else:
+                shipment_data.update(receiver_country_id=country_id, receiver_city_id=city_id)
+        if errors:
+            raise ValidationError(errors)
+
+        shipment = Shipment(created_by=self.owner, **shipment_data)
+        if shipment.payment_status == 'paid' and not ('awb_number' in shipment_data and 'reference_number' in shipment_data):
+            # Shipment.save() is bypassed, so paid shipments get their permanent numbers here
+            awb_number, reference_number = allocate_tracking_numbers()
+            shipment.awb_number = shipment_data.get('awb_number', awb_number)
+            shipment.reference_number = shipment_data.get('reference_number', reference_number)
+        shipment.calculate_weights()
+        return shipper_data, shipment
+
+
+def import_rows(converter, rows, use_copy=False, checkpoint=None, rows_read=None):
+    """
+    Convert and save a chunk of ``(line, row)`` pairs in one transaction.
+
+    Returns the number of shipments created and ``(line, message)`` pairs for
+    the rejected rows. If the chunk breaks a database constraint, typically
+    a duplicate AWB number, its rows are saved one at a time so only the
+    offending rows are rejected. With a ``checkpoint``, the chunk ending
+    after ``rows_read`` data rows is recorded in the same transaction.
+    The tracking number sequence is then moved past the AWB/REF numbers of
+    the chunk.
+    """
+    entries = []
+    errors = []
+    for line, row in rows:
+        if all(is_blank(value) for value in row):
+            continue
+        try:
+            entries.append((line, converter.convert(row)))
+        except ValidationError as error:
+            errors.append((line, format_errors(error)))
+
+    with transaction.atomic():
+        created = save_entries(entries, errors, use_copy)
+        if checkpoint:
+            checkpoint.record(rows_read, created, len(errors))
+    # Numbers taken from the file must never be allocated again
+    advance_tracking_number_sequence(get_highest_tracking_number(shipment for _, (_, shipment) in entries))
+    return created, errors
+
+
+def save_entries(entries, errors, use_copy):
+    """Save converted rows, adding the rows the database rejects to ``errors``."""
+    if not entries:
+        return 0
+    try:
+        save_shipments([entry for _, entry in entries], use_copy=use_copy)
+        return len(entries)
+    except DatabaseError:
+        pass
+
+    created = 0
+    for line, (shipper_data, shipment) in entries:
+        # Forget keys assigned by the rolled back chunk
+        shipment.pk = None
+        shipment._state.adding = True
+        try:
+            save_shipments([(shipper_data, shipment)], use_copy=use_copy)
+        except DatabaseError as error:
+            errors.append((line, str(error).strip()))
+        else:
+            created += 1
+    errors.sort()
+    return created
+
+
+class ImportCheckpoint:
+    """
+    Progress of a named import: the chunks already written, recorded as
+    ``ImportChunk`` rows in the transactions that wrote them. Chunks are
+    identified by the rows read up to their end, so an import can only be
+    resumed with the chunk size it started with.
+    """
+
+    def __init__(self, name, source, chunk_size):
+        self.name = name
+        self.source = str(Path(source).resolve())
+        self.chunk_size = chunk_size
+        self.done = set()
+        self.created = self.failed = 0
+        for chunk in ImportChunk.objects.filter(checkpoint=name):
+            if chunk.source != self.source:
+                raise ValueError(f'Checkpoint "{name}" records an import of {chunk.source}, not {self.source}.')
+            if chunk.chunk_size != chunk_size:
+                raise ValueError(f'Checkpoint "{name}" was written with --chunk-size {chunk.chunk_size}; resume with it.')
+            self.done.add(chunk.rows_read)
+            self.created += chunk.created
+            self.failed += chunk.failed
+
+        # Rows of the leading chunks that are all written; reading resumes after them
+        self.rows = 0
+        while self.rows + chunk_size in self.done:
+            self.rows += chunk_size
+
+    def is_done(self, rows_read):
+        return rows_read in self.done
+
+    def record(self, rows_read, created, failed):
+        ImportChunk.objects.create(
+            checkpoint=self.name,
+            source=self.source,
+            chunk_size=self.chunk_size,
+            rows_read=rows_read,
+            created=created,
+            failed=failed,
+        )
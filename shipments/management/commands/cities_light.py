@@ -0,0 +1,17 @@
+from cities_light.management.commands.cities_light import Command as CitiesLightCommand
+from shipments.signals import finish_reference_data_import
+
+
+class Command(CitiesLightCommand):
+    """
+    The cities_light import, followed by one invalidation of the cached
+    country and city data. It replaces the command of cities_light, which
+    comes after this app in INSTALLED_APPS.
+    """
+
+    def handle(self, *args, **options):
+        try:
+            super().handle(*args, **options)
+        finally:
+            # Rows may have changed even if the import stopped half way
+            finish_reference_data_import()
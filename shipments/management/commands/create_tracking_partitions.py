@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from shipments.partitions import create_tracking_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly PostgreSQL partitions of the tracking event table ahead of time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=3,
+            help='Create partitions from this month up to this many months ahead (default: 3).'
+        )
+
+    def handle(self, *args, **options):
+        if options['months'] < 0:
+            raise CommandError('--months cannot be negative.')
+        if connection.vendor != 'postgresql':
+            self.stdout.write('Tracking events are only partitioned on PostgreSQL; nothing to do.')
+            return
+
+        created, failed = create_tracking_partitions(months_ahead=options['months'])
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        for name, error in failed:
+            self.stderr.write(f'Could not create {name}: {error}')
+        if failed:
+            raise CommandError(
+                f'{len(failed)} partition(s) could not be created. Events of their months are probably '
+                f'already in the default partition; move them out before creating the partition.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partition(s) created.'))
@@ -0,0 +1,151 @@
+import csv
+import multiprocessing
+import time
+from collections import deque
+from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from shipments.bulk import can_copy
+from shipments.geography import GeographyNameIndex
+from shipments.importing import (
+    COLUMNS, FILE_FORMATS, ImportCheckpoint, ShipmentRowConverter, import_rows, iter_chunks, read_rows
+)
+from shipments.management.users import get_user
+
+_worker = {}
+
+
+def start_worker(converter, use_copy, checkpoint):
+    """Keep the converter, with its geography index, for every chunk of this process."""
+    _worker.update(converter=converter, use_copy=use_copy, checkpoint=checkpoint)
+
+
+def import_chunk(rows_read, chunk):
+    return import_rows(
+        _worker['converter'], chunk, use_copy=_worker['use_copy'], checkpoint=_worker['checkpoint'], rows_read=rows_read
+    )
+
+
+class Command(BaseCommand):
+    help = 'Import shipments from a CSV or XLSX manifest.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with a header row.')
+        parser.add_argument('--owner', required=True, help='Username or email of the user the shipments belong to.')
+        parser.add_argument('--format', choices=FILE_FORMATS, help='File format (default: from the file extension).')
+        parser.add_argument('--sheet', help='XLSX worksheet to read (default: the active one).')
+        parser.add_argument(
+            '--map', action='append', default=[], metavar='HEADER=COLUMN',
+            help=f'Read COLUMN from the file column HEADER, e.g. "Consignee=receiver_name". '
+                 f'Can be repeated. Columns: {", ".join(COLUMNS)}.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows written per transaction.')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Number of processes converting and writing chunks.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Name under which the written chunks are recorded. Running the import again with the same '
+                 'checkpoint skips the chunks already written.'
+        )
+        parser.add_argument('--errors', help='Write rejected rows to this CSV file instead of stderr.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'No such file: {path}')
+        if options['chunk_size'] < 1 or options['processes'] < 1:
+            raise CommandError('--chunk-size and --processes must be at least 1.')
+        owner = get_user(options['owner'])
+        column_map = self.parse_column_map(options['map'])
+
+        try:
+            checkpoint = (
+                ImportCheckpoint(options['checkpoint'], path, options['chunk_size']) if options['checkpoint'] else None
+            )
+            rows = read_rows(path, options['format'], options['sheet'])
+            headers = next(rows, None)
+        except (ImproperlyConfigured, ValueError) as error:
+            raise CommandError(error)
+        if headers is None:
+            raise CommandError(f'{path} is empty.')
+
+        self.stdout.write('Loading countries and cities...')
+        converter = ShipmentRowConverter(headers, owner, GeographyNameIndex.load(), column_map)
+        if converter.missing_columns:
+            raise CommandError(f'Missing required columns: {", ".join(converter.missing_columns)}')
+
+        rows_read, created, failed = (checkpoint.rows, checkpoint.created, checkpoint.failed) if checkpoint else (0, 0, 0)
+        if checkpoint and checkpoint.done:
+            self.stdout.write(f'Resuming: {len(checkpoint.done)} chunk(s) already written.')
+        chunks = iter_chunks(rows, options['chunk_size'], skip=rows_read)
+        if checkpoint:
+            # Chunks written by parallel processes may be followed by ones that were not
+            chunks = ((rows_read, chunk) for rows_read, chunk in chunks if not checkpoint.is_done(rows_read))
+        use_copy = can_copy()
+        if options['processes'] > 1:
+            results = self.import_in_processes(chunks, converter, use_copy, checkpoint, options['processes'])
+        else:
+            results = (
+                (rows_read, *import_rows(converter, chunk, use_copy, checkpoint, rows_read))
+                for rows_read, chunk in chunks
+            )
+
+        error_file = None
+        errors = None
+        if options['errors']:
+            error_path = Path(options['errors'])
+            append = bool(checkpoint and checkpoint.done and error_path.exists())
+            error_file = open(error_path, 'a' if append else 'w', newline='')
+            errors = csv.writer(error_file)
+            if not append:
+                errors.writerow(['line', 'errors'])
+
+        started = time.monotonic()
+        first_row = rows_read
+        try:
+            for rows_read, chunk_created, chunk_errors in results:
+                created += chunk_created
+                failed += len(chunk_errors)
+                for line, message in chunk_errors:
+                    if errors:
+                        errors.writerow([line, message])
+                    else:
+                        self.stderr.write(f'Line {line}: {message}')
+                if error_file:
+                    error_file.flush()
+                rate = (rows_read - first_row) / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f'{rows_read} rows read, {created} created, {failed} rejected ({rate:.0f} rows/s)')
+        finally:
+            if error_file:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} shipment(s), rejected {failed} row(s).'))
+
+    def import_in_processes(self, chunks, converter, use_copy, checkpoint, processes):
+        """Import chunks in a pool of processes, yielding the results in file order."""
+        # Children must open their own database connections
+        connections.close_all()
+        initargs = (converter, use_copy, checkpoint)
+        with multiprocessing.Pool(processes, initializer=start_worker, initargs=initargs) as pool:
+            pending = deque()
+            for rows_read, chunk in chunks:
+                pending.append((rows_read, pool.apply_async(import_chunk, (rows_read, chunk))))
+                # Only read ahead a few chunks, so memory stays flat however large the file
+                if len(pending) >= processes * 2:
+                    rows_read, result = pending.popleft()
+                    yield (rows_read, *result.get())
+            while pending:
+                rows_read, result = pending.popleft()
+                yield (rows_read, *result.get())
+
+    def parse_column_map(self, mappings):
+        column_map = {}
+        for mapping in mappings:
+            header, separator, column = mapping.partition('=')
+            if not separator or column.strip() not in COLUMNS:
+                raise CommandError(f'Invalid --map "{mapping}"; expected HEADER=COLUMN with a known column.')
+            column_map[header.strip()] = column.strip()
+        return column_map
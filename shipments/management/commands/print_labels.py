@@ -0,0 +1,74 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from shipments.models import Shipment
+from shipments.utils.label_batch import get_label_queryset, iter_label_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Render shipping labels for many shipments into multi-page PDF files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='Shipment IDs to print.')
+        parser.add_argument(
+            '--payment-status', choices=[choice for choice, _ in Shipment.PAYMENT_STATUS_CHOICES],
+            help='Only print shipments with this payment status.'
+        )
+        parser.add_argument(
+            '--service', choices=[choice for choice, _ in Shipment.SERVICE_TYPE_CHOICES],
+            help='Only print shipments with this service.'
+        )
+        parser.add_argument('--created-after', help='Only print shipments created at or after this ISO datetime.')
+        parser.add_argument('--created-before', help='Only print shipments created before this ISO datetime.')
+        parser.add_argument(
+            '--output', default='labels.pdf',
+            help='Output PDF path. With --chunk-size, files are named <output>-0001.pdf, <output>-0002.pdf, ...'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Render this many labels per PDF file so large batches do not stay in memory.'
+        )
+
+    def handle(self, *args, **options):
+        filters = {
+            'ids': options['ids'],
+            'payment_status': options['payment_status'],
+            'service': options['service'],
+            'created_after': self.parse_datetime_option(options, 'created_after'),
+            'created_before': self.parse_datetime_option(options, 'created_before'),
+        }
+        if not any(filters.values()):
+            raise CommandError('Provide --ids or at least one filter.')
+
+        chunk_size = options['chunk_size']
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        queryset = get_label_queryset(**filters)
+        output = Path(options['output'])
+
+        if chunk_size is None:
+            # One WeasyPrint pass over the whole batch
+            pdfs = iter_label_pdfs(queryset, chunk_size=queryset.count() or 1)
+        else:
+            pdfs = iter_label_pdfs(queryset, chunk_size=chunk_size)
+
+        written = 0
+        for index, (_, pdf) in enumerate(pdfs, start=1):
+            path = output if chunk_size is None else output.with_name(f'{output.stem}-{index:04d}{output.suffix}')
+            path.write_bytes(pdf)
+            written += 1
+            self.stdout.write(f'Wrote {path}')
+
+        if not written:
+            raise CommandError('No shipments matched.')
+        self.stdout.write(self.style.SUCCESS(f'Rendered labels into {written} file(s).'))
+
+    def parse_datetime_option(self, options, name):
+        value = options[name]
+        if value is None:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f'Invalid datetime for --{name.replace("_", "-")}: {value}')
+        return parsed
@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from shipments.utils.pdf_generator import warm_up_pdf_renderer
+from shipments.utils.pdf_jobs import run_worker
+
+
+def stop_on_sigterm(signum, frame):
+    # Docker and process managers stop the pool with SIGTERM
+    raise KeyboardInterrupt
+
+
+def start_worker(poll_interval):
+    """Warm up fonts and stylesheets once, then keep rendering queued jobs."""
+    warm_up_pdf_renderer()
+    run_worker(poll_interval=poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Start a pool of processes rendering queued shipment PDFs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Number of rendering processes (default: number of CPUs).'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait before polling an empty queue again.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Render everything queued in this process and exit.'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = run_worker(exit_when_idle=True)
+            self.stdout.write(self.style.SUCCESS(f'Rendered {processed} queued PDF(s).'))
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=start_worker,
+                kwargs={'poll_interval': options['poll_interval']},
+                name=f'pdf-worker-{index}',
+                daemon=True,
+            )
+            for index in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        # Installed after the fork, so the children keep the default handler
+        signal.signal(signal.SIGTERM, stop_on_sigterm)
+        self.stdout.write(f'Started {len(workers)} PDF rendering process(es).')
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping PDF rendering processes...')
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
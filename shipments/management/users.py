@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db.models import Q
+
+
+def get_user(value):
+    """Return the user with ``value`` as username or email, for the ``--owner`` option of commands."""
+    User = get_user_model()
+    try:
+        return User.objects.get(Q(username=value) | Q(email=value))
+    except User.DoesNotExist:
+        raise CommandError(f'No user with username or email "{value}".')
+    except User.MultipleObjectsReturned:
+        raise CommandError(f'Several users match "{value}"; use the username.')
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# Inlined from shipments.sequences so the migration does not change with the app code
+TRACKING_NUMBER_SEQUENCE = 'shipments_tracking_number_seq'
+TRACKING_NUMBER_START = 980102992
+
+# Starts the sequence after the highest AWB/REF number already issued
+SEED_SEQUENCE_SQL = f"""
+SELECT setval('{TRACKING_NUMBER_SEQUENCE}', last_number)
+FROM (
+    SELECT GREATEST(
+        (SELECT MAX(CAST(SUBSTRING(awb_number FROM 5) AS BIGINT))
+         FROM shipments_shipment WHERE awb_number ~ '^AWB-[0-9]+$'),
+        (SELECT MAX(CAST(SUBSTRING(reference_number FROM 5) AS BIGINT))
+         FROM shipments_shipment WHERE reference_number ~ '^REF-[0-9]+$')
+    ) AS last_number
+) AS issued
+WHERE last_number >= {TRACKING_NUMBER_START}
+"""
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE SEQUENCE IF NOT EXISTS {TRACKING_NUMBER_SEQUENCE} START WITH {TRACKING_NUMBER_START}'
+    )
+    schema_editor.execute(SEED_SEQUENCE_SQL)
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP SEQUENCE IF EXISTS {TRACKING_NUMBER_SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0004_shipment_created_by'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:38
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# Monthly partitions created with the table: this month and the following ones
+INITIAL_PARTITION_MONTHS = 3
+
+
+def partition_tracking_events(apps, schema_editor):
+    """
+    On PostgreSQL, replace the (still empty) table created above with one
+    partitioned by range of occurred_at. The primary key of a partitioned
+    table must include the partition key, and IDs come from a plain sequence
+    since identity columns are not supported on partitioned tables before
+    PostgreSQL 17. The partitions of this month and the next few are created
+    with the table; later ones are added by create_tracking_partitions. A
+    default partition catches rows no monthly partition covers.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Also drops the index and foreign key statements still deferred for the plain table
+    schema_editor.delete_model(apps.get_model('shipments', 'TrackingEvent'))
+    for statement in (
+        'CREATE SEQUENCE shipments_trackingevent_id_seq',
+        """
+        CREATE TABLE shipments_trackingevent (
+            id bigint NOT NULL DEFAULT nextval('shipments_trackingevent_id_seq'),
+            status varchar(30) NOT NULL,
+            location varchar(100) NULL,
+            description text NULL,
+            source varchar(100) NULL,
+            occurred_at timestamp with time zone NOT NULL,
+            recorded_at timestamp with time zone NOT NULL,
+            shipment_id bigint NOT NULL
+                CONSTRAINT shipments_trackingevent_shipment_id_fk_shipments_shipment_id
+                REFERENCES shipments_shipment (id) DEFERRABLE INITIALLY DEFERRED,
+            PRIMARY KEY (id, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+        """,
+        'ALTER SEQUENCE shipments_trackingevent_id_seq OWNED BY shipments_trackingevent.id',
+        'CREATE TABLE shipments_trackingevent_default PARTITION OF shipments_trackingevent DEFAULT',
+        """
+        CREATE INDEX tracking_event_timeline_idx
+            ON shipments_trackingevent (shipment_id, occurred_at DESC, id DESC)
+        """,
+    ):
+        schema_editor.execute(statement)
+
+    month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    for _ in range(INITIAL_PARTITION_MONTHS + 1):
+        next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+        schema_editor.execute(
+            f'CREATE TABLE shipments_trackingevent_{month:%Y_%m} PARTITION OF shipments_trackingevent '
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{next_month.isoformat()} 00:00:00+00')"
+        )
+        month = next_month
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0007_shipment_owner_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='current_location',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='current_status',
+            field=models.CharField(choices=[('created', 'Created'), ('picked_up', 'Picked Up'), ('arrived_at_hub', 'Arrived at Hub'), ('departed_hub', 'Departed Hub'), ('in_transit', 'In Transit'), ('customs', 'In Customs'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('delivery_failed', 'Delivery Failed'), ('returned', 'Returned to Shipper'), ('exception', 'Exception')], default='created', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='current_status_at',
+            field=models.DateTimeField(blank=True, help_text='When the latest tracking event occurred', null=True),
+        ),
+        migrations.CreateModel(
+            name='TrackingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('created', 'Created'), ('picked_up', 'Picked Up'), ('arrived_at_hub', 'Arrived at Hub'), ('departed_hub', 'Departed Hub'), ('in_transit', 'In Transit'), ('customs', 'In Customs'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('delivery_failed', 'Delivery Failed'), ('returned', 'Returned to Shipper'), ('exception', 'Exception')], max_length=30)),
+                ('location', models.CharField(blank=True, max_length=100, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('source', models.CharField(blank=True, help_text='Hub or courier that reported the event', max_length=100, null=True)),
+                ('occurred_at', models.DateTimeField()),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='shipments.shipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['shipment', '-occurred_at', '-id'], name='tracking_event_timeline_idx')],
+            },
+        ),
+        # Dropping the model drops the partitioned table with its partitions
+        migrations.RunPython(partition_tracking_events, migrations.RunPython.noop),
+    ]
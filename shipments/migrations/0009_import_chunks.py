@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0008_tracking_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('checkpoint', models.CharField(max_length=100)),
+                ('source', models.TextField(help_text='Resolved path of the imported file')),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('rows_read', models.PositiveIntegerField(help_text='Data rows read up to the end of this chunk')),
+                ('created', models.PositiveIntegerField()),
+                ('failed', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importchunk',
+            constraint=models.UniqueConstraint(fields=('checkpoint', 'rows_read'), name='import_chunk_unique'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:34
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Keep the newest pending or running job of each PDF; the others were never handed out
+    PDFRenderJob = apps.get_model('shipments', 'PDFRenderJob')
+    active_jobs = PDFRenderJob.objects.filter(status__in=['pending', 'running'])
+    duplicates = (
+        active_jobs.values('shipment_id', 'document_type')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    now = timezone.now()
+    for duplicate in duplicates.iterator():
+        jobs = active_jobs.filter(
+            shipment_id=duplicate['shipment_id'], document_type=duplicate['document_type'],
+        ).order_by('-created_at')
+        PDFRenderJob.objects.filter(pk__in=list(jobs.values_list('pk', flat=True)[1:])).update(
+            status='failed', error='Duplicate of a newer job', finished_at=now, updated_at=now,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipments', '0009_import_chunks'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pdfrenderjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('shipment', 'document_type'), name='pdf_job_active_unique'),
+        ),
+    ]
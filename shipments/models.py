@@ -1,50 +1,16 @@
-from django.db import transaction, models
+from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from cities_light.models import Country, City
 from django.core.exceptions import ValidationError
-import random
-import string
+from .cache import invalidate_pdf_cache, invalidate_tracking_cache
+from .sequences import allocate_tracking_numbers, pending_numbers
+import uuid
 
 def generate_temp_number(prefix):
     """Generate a temporary unique number for pending shipments."""
-    # Generate a random 8-digit number
-    random_digits = ''.join(random.choices(string.digits, k=8))
-    return f"{prefix}{random_digits}"
-
-def generate_awb_number():
-    """
-    Generate a unique AWB number using atomic transaction to prevent race conditions.
-    Returns a string in format 'AWB-XXXXXX' where XXXXXX is a sequential number.
-    """
-    with transaction.atomic():
-        last_shipment = Shipment.objects.select_for_update().order_by('-id').first()
-        if last_shipment and last_shipment.awb_number and last_shipment.awb_number.startswith('AWB-'):
-            try:
-                last_number = int(last_shipment.awb_number.replace('AWB-', ''))
-            except ValueError:
-                last_number = 980102991
-            new_number = last_number + 1
-        else:
-            new_number = 980102991 + 1
-        return f"AWB-{new_number:06d}"
-
-def generate_reference_number():
-    """
-    Generate a unique reference number using atomic transaction to prevent race conditions.
-    Returns a string in format 'REF-XXXXXX' where XXXXXX is a sequential number.
-    """
-    with transaction.atomic():
-        last_shipment = Shipment.objects.select_for_update().order_by('-id').first()
-        if last_shipment and last_shipment.reference_number and last_shipment.reference_number.startswith('REF-'):
-            try:
-                last_number = int(last_shipment.reference_number.replace('REF-', ''))
-            except ValueError:
-                last_number = 980102991
-            new_number = last_number + 1
-        else:
-            new_number = 980102991 + 1
-        return f"REF-{new_number:06d}"
+    # Time-ordered and collision-free across processes, see PendingNumberGenerator
+    return pending_numbers.generate(prefix)
 
 def zip_code_validator(zip_code):
     if not zip_code.isdigit() :
@@ -84,6 +50,63 @@ def get_default_reference():
     """Generate a default reference number for new shipments."""
     return generate_temp_number('PENDING')
 
+class ShipmentQuerySet(models.QuerySet):
+    """Query shortcuts that load exactly what each shipment view needs."""
+
+    def for_tracking(self):
+        """
+        Single joined query with the columns used by the public tracking payload,
+        plus one indexed query for the recent events of the fetched shipments.
+        """
+        return self.select_related('shipper', 'receiver_country', 'receiver_city').only(
+            'awb_number', 'reference_number', 'receiver_name', 'product_type',
+            'service', 'payment_status', 'created_at',
+            'current_status', 'current_status_at', 'current_location',
+            'shipper__shipper_name', 'receiver_country__name', 'receiver_city__name',
+        ).prefetch_related(
+            models.Prefetch(
+                'events',
+                queryset=TrackingEvent.objects.recent(getattr(settings, 'TRACKING_RECENT_EVENTS', 10)),
+                to_attr='recent_events',
+            )
+        )
+
+    def with_geography(self):
+        """Join the shipper and every country and city printed on a shipment, including each city's country."""
+        return self.select_related(
+            'shipper__country', 'shipper__city__country',
+            'receiver_country', 'receiver_city__country',
+        )
+
+    def for_detail(self):
+        """Fully hydrated shipments: one joined query plus one query for the images."""
+        return self.with_geography().prefetch_related('images')
+
+    def for_list(self):
+        """Single joined query with the columns used by the shipment list payload."""
+        return self.select_related('shipper', 'receiver_country', 'receiver_city').only(
+            'awb_number', 'reference_number', 'receiver_name', 'product_type',
+            'service', 'payment_status', 'created_at', 'created_by_id',
+            'shipper__shipper_name', 'receiver_country__name', 'receiver_city__name',
+        )
+
+    def in_bulk_by_tracking_numbers(self, tracking_numbers):
+        """
+        Return a dict mapping each found AWB-/REF- number to its shipment.
+        Uses one IN lookup per number type, whatever the number of inputs.
+        """
+        awb_numbers = [number for number in tracking_numbers if number.startswith('AWB-')]
+        reference_numbers = [number for number in tracking_numbers if number.startswith('REF-')]
+        found = {}
+        if awb_numbers:
+            for shipment in self.filter(awb_number__in=awb_numbers):
+                found[shipment.awb_number] = shipment
+        if reference_numbers:
+            for shipment in self.filter(reference_number__in=reference_numbers):
+                found[shipment.reference_number] = shipment
+        return found
+
+
 class Shipment(TimeStampedMixin):
     """Model for storing shipment information and tracking."""
     # Shipper Information
@@ -156,10 +179,43 @@ class Shipment(TimeStampedMixin):
     cod_amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="COD in AED", default=0)
     base_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Base shipping cost", default=0)
     additional_charges = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, help_text="Additional fees")
+    
+    # Tracking status, denormalized from the latest TrackingEvent
+    TRACKING_STATUS_CHOICES = [
+        ('created', 'Created'),
+        ('picked_up', 'Picked Up'),
+        ('arrived_at_hub', 'Arrived at Hub'),
+        ('departed_hub', 'Departed Hub'),
+        ('in_transit', 'In Transit'),
+        ('customs', 'In Customs'),
+        ('out_for_delivery', 'Out for Delivery'),
+        ('delivered', 'Delivered'),
+        ('delivery_failed', 'Delivery Failed'),
+        ('returned', 'Returned to Shipper'),
+        ('exception', 'Exception'),
+    ]
+    current_status = models.CharField(
+        max_length=30,
+        choices=TRACKING_STATUS_CHOICES,
+        default='created',
+    )
+    current_status_at = models.DateTimeField(null=True, blank=True, help_text="When the latest tracking event occurred")
+    current_location = models.CharField(max_length=100, blank=True, null=True)
+
+    objects = ShipmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves "my shipments, newest first" and keyset pagination over (created_at, id)
+            models.Index(fields=['created_by', 'created_at', 'id'], name='shipment_owner_created_idx'),
+        ]
 
     def clean(self):
         super().clean()
-        # Calculate volumetric weight and chargeable weight
+        self.calculate_weights()
+
+    def calculate_weights(self):
+        """Calculate volumetric weight and chargeable weight."""
         if self.length and self.width and self.height and self.quantity:
             self.volumetricks = (self.length * self.width * self.height * self.quantity) / 5000
             self.chargeable_weight = max(self.volumetricks, self.grossweight)
@@ -174,10 +230,14 @@ class Shipment(TimeStampedMixin):
         if self.payment_status == 'paid':
             try:
                 # Generate permanent numbers for paid shipments
-                if not self.awb_number or self.awb_number.startswith('PENDING'):
-                    self.awb_number = generate_awb_number()
-                if not self.reference_number or self.reference_number.startswith('PENDING'):
-                    self.reference_number = generate_reference_number()
+                needs_awb = not self.awb_number or self.awb_number.startswith('PENDING')
+                needs_reference = not self.reference_number or self.reference_number.startswith('PENDING')
+                if needs_awb or needs_reference:
+                    awb_number, reference_number = allocate_tracking_numbers()
+                    if needs_awb:
+                        self.awb_number = awb_number
+                    if needs_reference:
+                        self.reference_number = reference_number
             except Exception as e:
                 raise ValidationError(f"Error generating tracking numbers: {str(e)}")
         else:
@@ -188,12 +248,54 @@ class Shipment(TimeStampedMixin):
                 self.reference_number = generate_temp_number('PENDING')
 
         super().save(*args, **kwargs)
+        invalidate_tracking_cache(self)
+        invalidate_pdf_cache(self)
 
     def __str__(self):
         return f"Shipment {self.awb_number}"
 
 
 
+class TrackingEventQuerySet(models.QuerySet):
+    def timeline(self):
+        """Newest first, the order served by the timeline index."""
+        return self.order_by('-occurred_at', '-id')
+
+    def recent(self, limit):
+        """The ``limit`` newest events of each shipment, for use in a ``Prefetch``."""
+        return self.only(
+            'shipment_id', 'status', 'location', 'description', 'occurred_at',
+        ).timeline()[:limit]
+
+
+class TrackingEvent(models.Model):
+    """
+    Append-only scan event in a shipment's tracking timeline.
+
+    Events are written in batches by the ingestion API, which also moves the
+    shipment's ``current_status`` forward. On PostgreSQL the table is
+    partitioned by month of ``occurred_at``; see ``shipments.partitions``.
+    """
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='events')
+    status = models.CharField(max_length=30, choices=Shipment.TRACKING_STATUS_CHOICES)
+    location = models.CharField(max_length=100, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    source = models.CharField(max_length=100, blank=True, null=True, help_text="Hub or courier that reported the event")
+    occurred_at = models.DateTimeField()
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = TrackingEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the newest events of a shipment
+            models.Index(fields=['shipment', '-occurred_at', '-id'], name='tracking_event_timeline_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_status_display()} for {self.shipment_id} at {self.occurred_at}"
+
+
 def validate_image_file(file):
     if not file.content_type.startswith('image'):
         raise ValidationError("File must be an image")
@@ -209,4 +311,67 @@ class ShipmentImage(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Image for {self.shipment.awb_number}"
\ No newline at end of file
+        return f"Image for {self.shipment.awb_number}"
+
+
+class PDFRenderJob(TimeStampedMixin):
+    """Queued request to render a shipment PDF outside the web request."""
+    DOCUMENT_TYPE_CHOICES = [
+        ('confirmation', 'Confirmation'),
+        ('detailed', 'Detailed'),
+        ('label', 'Label'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='pdf_jobs')
+    document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    digest = models.CharField(max_length=64, blank=True, help_text="Cache digest of the rendered PDF")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='pdf_job_queue_idx'),
+        ]
+        constraints = [
+            # Concurrent requests for the same PDF must share one queued job
+            models.UniqueConstraint(
+                fields=['shipment', 'document_type'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='pdf_job_active_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_document_type_display()} PDF for {self.shipment_id} ({self.status})"
+
+
+class ImportChunk(TimeStampedMixin):
+    """
+    A chunk of a manifest written by ``import_shipments --checkpoint``.
+    Saved in the transaction that writes the chunk's shipments, so a resumed
+    import knows exactly which chunks are in the database.
+    """
+    checkpoint = models.CharField(max_length=100)
+    source = models.TextField(help_text="Resolved path of the imported file")
+    chunk_size = models.PositiveIntegerField()
+    rows_read = models.PositiveIntegerField(help_text="Data rows read up to the end of this chunk")
+    created = models.PositiveIntegerField()
+    failed = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['checkpoint', 'rows_read'], name='import_chunk_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.checkpoint}: rows up to {self.rows_read}"
@@ -0,0 +1,75 @@
+"""
+Monthly partitions of the tracking event table on PostgreSQL.
+
+``shipments_trackingevent`` is partitioned by range of ``occurred_at``, one
+partition per calendar month (UTC), plus a default partition for events no
+monthly partition covers. Timeline queries only touch the partitions of the
+months they read, and old months can be detached or dropped as a whole
+instead of deleted row by row.
+
+Partitions must exist before events for their month arrive: PostgreSQL
+refuses to create a partition for a range that already has rows in the
+default partition. ``create_tracking_partitions`` creates them ahead of time.
+"""
+import datetime
+
+from django.db import DatabaseError, connections, transaction
+
+TRACKING_EVENT_TABLE = 'shipments_trackingevent'
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TRACKING_EVENT_TABLE}_{month:%Y_%m}'
+
+
+def create_tracking_partitions(months_ahead=3, start=None, using='default'):
+    """
+    Create the monthly partitions from the month of ``start`` (default: this
+    month) to ``months_ahead`` months later.
+
+    Returns ``(created, failed)``: the names of the partitions created and
+    ``(name, error)`` pairs for the ones PostgreSQL refused. Existing
+    partitions are left alone. Does nothing on other databases.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return [], []
+    start = start or datetime.datetime.now(datetime.timezone.utc).date()
+    first_month = start.replace(day=1)
+    quote_name = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s',
+            [TRACKING_EVENT_TABLE],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+    created = []
+    failed = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first_month, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(TRACKING_EVENT_TABLE)} '
+                    f'FOR VALUES FROM (%s) TO (%s)',
+                    [f'{month.isoformat()} 00:00:00+00', f'{add_months(month, 1).isoformat()} 00:00:00+00'],
+                )
+        except DatabaseError as error:
+            failed.append((name, str(error).strip()))
+        else:
+            created.append(name)
+    return created, failed
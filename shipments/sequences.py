@@ -0,0 +1,179 @@
+"""
+Tracking number allocation for shipments.
+
+Permanent AWB/REF numbers are drawn from the ``shipments_tracking_number_seq``
+PostgreSQL sequence. Each worker process reserves a block of values with a
+single ``nextval`` round trip and hands them out from memory, so most
+payment confirmations never touch the database and no row lock is taken.
+``nextval`` is not transactional, which means a reserved block is never
+handed out twice even if the surrounding transaction rolls back. The price
+is that numbers are unique and increasing per process, but not gapless.
+
+Temporary numbers for pending shipments are generated locally, without a
+database round trip, by ``PendingNumberGenerator``.
+"""
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+
+TRACKING_NUMBER_SEQUENCE = 'shipments_tracking_number_seq'
+TRACKING_NUMBER_START = 980102992
+
+AWB_PREFIX = 'AWB-'
+REF_PREFIX = 'REF-'
+
+
+class TrackingNumberAllocator:
+    """Hand out tracking numbers from blocks reserved on the database sequence."""
+
+    def __init__(self, sequence_name=TRACKING_NUMBER_SEQUENCE, block_size=None):
+        self.sequence_name = sequence_name
+        self._block_size = block_size
+        self._numbers = deque()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def block_size(self):
+        if self._block_size is not None:
+            return self._block_size
+        return getattr(settings, 'SHIPMENT_NUMBER_BLOCK_SIZE', 100)
+
+    def next(self):
+        """Return the next number, reserving a new block when the current one is used up."""
+        with self._lock:
+            # A block reserved before fork() must not be shared with the children.
+            if self._pid != os.getpid():
+                self._numbers.clear()
+                self._pid = os.getpid()
+            if not self._numbers:
+                self._numbers.extend(self._reserve_block(self.block_size))
+            return self._numbers.popleft()
+
+    def reset(self):
+        """Drop any numbers reserved by this process."""
+        with self._lock:
+            self._numbers.clear()
+
+    def _reserve_block(self, size):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT nextval(%s) FROM generate_series(1, %s)',
+                    [self.sequence_name, size],
+                )
+                return sorted(row[0] for row in cursor.fetchall())
+        return [self._next_from_table()]
+
+    def _next_from_table(self):
+        # Fallback for non-PostgreSQL databases used in local development:
+        # derive the next number from the highest one already issued.
+        from shipments.models import Shipment
+
+        with transaction.atomic():
+            last_number = TRACKING_NUMBER_START - 1
+            for field, prefix in (('awb_number', AWB_PREFIX), ('reference_number', REF_PREFIX)):
+                values = (
+                    Shipment.objects.select_for_update()
+                    .filter(**{f'{field}__startswith': prefix})
+                    .order_by(f'-{field}')
+                    .values_list(field, flat=True)[:1]
+                )
+                for value in values:
+                    last_number = max(last_number, parse_tracking_number(value, prefix))
+            return last_number + 1
+
+
+def parse_tracking_number(value, prefix):
+    """Return the numeric part of a permanent tracking number, or 0 if it has none."""
+    try:
+        return int(value[len(prefix):]) if value.startswith(prefix) else 0
+    except ValueError:
+        return 0
+
+
+def get_highest_tracking_number(shipments):
+    """Return the highest numeric part of the AWB/REF numbers of ``shipments``, or 0."""
+    return max(
+        (
+            parse_tracking_number(number, prefix)
+            for shipment in shipments
+            for number, prefix in ((shipment.awb_number, AWB_PREFIX), (shipment.reference_number, REF_PREFIX))
+        ),
+        default=0,
+    )
+
+
+def advance_tracking_number_sequence(number):
+    """
+    Make the sequence hand out only numbers above ``number``, e.g. after
+    shipments were imported with their own AWB/REF numbers. It never moves
+    the sequence back.
+    """
+    if number < TRACKING_NUMBER_START or connection.vendor != 'postgresql':
+        # The fallback of other databases starts after the highest stored number anyway
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT setval(%s, %s) FROM {TRACKING_NUMBER_SEQUENCE} WHERE last_value < %s',
+            [TRACKING_NUMBER_SEQUENCE, number, number],
+        )
+
+
+allocator = TrackingNumberAllocator()
+
+
+def allocate_tracking_numbers():
+    """
+    Allocate a permanent AWB and REF number pair in one step.
+    Both numbers share the same sequence value, e.g. ('AWB-980102992', 'REF-980102992').
+    """
+    number = allocator.next()
+    return f"{AWB_PREFIX}{number:06d}", f"{REF_PREFIX}{number:06d}"
+
+
+class PendingNumberGenerator:
+    """
+    Generate time-ordered temporary numbers for pending shipments.
+
+    A number is the prefix followed by 24 lowercase hex digits: a 48-bit
+    millisecond timestamp, a 32-bit random node id chosen per process and a
+    16-bit counter. Numbers from one process never repeat, concurrent
+    processes are told apart by their node id, and because the timestamp
+    leads, new rows land at the right-hand edge of the unique indexes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._node = 0
+        self._last_ms = 0
+        self._counter = 0
+
+    def generate(self, prefix):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._node = secrets.randbits(32)
+                self._last_ms = 0
+                self._counter = 0
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._counter = 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting
+                # from the last timestamp so numbers stay increasing.
+                self._counter += 1
+                if self._counter > 0xFFFF:
+                    self._last_ms += 1
+                    self._counter = 0
+            return f"{prefix}{self._last_ms:012x}{self._node:08x}{self._counter:04x}"
+
+
+pending_numbers = PendingNumberGenerator()
@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from cities_light.models import City, Country
+from cities_light.signals import city_items_pre_import, country_items_pre_import
+from .cache import (
+    bump_reference_data_version, bump_tracking_data_version, invalidate_pdf_cache, invalidate_tracking_cache,
+)
+from .models import Shipment, Shipper
+
+# Set while this process runs the cities_light import; the reference data
+# version is then bumped once at the end of the import instead of per row,
+# see the cities_light command of this app.
+_reference_data_import = {'running': False}
+
+
+@receiver(post_delete, sender=Shipment)
+def drop_deleted_shipment_from_cache(sender, instance, **kwargs):
+    # Also covers cascade deletes, which never call Shipment.delete()
+    invalidate_tracking_cache(instance)
+    invalidate_pdf_cache(instance)
+
+
+@receiver(post_save, sender=Shipper)
+def invalidate_shipper_tracking(sender, instance, created, **kwargs):
+    # Tracking payloads print the shipper's name. A shipper can have any number
+    # of shipments, so all payloads are invalidated at once instead of each.
+    if not created:
+        transaction.on_commit(bump_tracking_data_version)
+
+
+@receiver(country_items_pre_import)
+@receiver(city_items_pre_import)
+def track_reference_data_import(sender, **kwargs):
+    _reference_data_import['running'] = True
+
+
+def finish_reference_data_import():
+    """Invalidate the cached reference data and tracking payloads once, after a cities_light import."""
+    _reference_data_import['running'] = False
+    bump_reference_data_version()
+    bump_tracking_data_version()
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_reference_data(sender, **kwargs):
+    # Edits made outside an import (e.g. in the admin) invalidate right away
+    if not _reference_data_import['running']:
+        transaction.on_commit(bump_reference_data_version)
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=City)
+def invalidate_receiver_tracking(sender, instance, created, **kwargs):
+    # Tracking payloads print the receiver's country and city names; an import
+    # invalidates them once when it finishes.
+    if not created and not _reference_data_import['running']:
+        transaction.on_commit(bump_tracking_data_version)
@@ -0,0 +1,145 @@
+"""
+Test helpers shared by the shipment test suites.
+
+``QueryCountAssertionsMixin`` guards endpoints against N+1 regressions: a
+serializer that starts dereferencing a relation the view does not join will
+make the query count grow with the number of rows and fail these assertions.
+
+``ShipmentFixturesMixin`` creates the user, geography, shipper and shipments
+most tests start from, and builds shipment creation payloads for the API.
+"""
+from cities_light.models import City, Country
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from .models import Shipment, Shipper
+
+
+class _AssertMaxNumQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed, self.num,
+            '%d queries executed, at most %d expected\nCaptured queries were:\n%s' % (
+                executed, self.num,
+                '\n'.join('%d. %s' % (i, query['sql']) for i, query in enumerate(self.captured_queries, start=1))
+            )
+        )
+
+
+class QueryCountAssertionsMixin:
+    """Mixin for ``TestCase`` classes asserting upper bounds on database queries."""
+
+    def assertMaxNumQueries(self, num, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        """Like ``assertNumQueries`` but passes with ``num`` queries or fewer."""
+        context = _AssertMaxNumQueriesContext(self, num, connections[using])
+        if func is None:
+            return context
+        with context:
+            func(*args, **kwargs)
+
+    def assertQueryCountConstant(self, request, add_rows, using=DEFAULT_DB_ALIAS):
+        """
+        Call ``request``, add rows with ``add_rows`` and call ``request`` again;
+        the second call must not run more queries than the first.
+        """
+        with CaptureQueriesContext(connections[using]) as before:
+            request()
+        add_rows()
+        with CaptureQueriesContext(connections[using]) as after:
+            request()
+        self.assertEqual(
+            len(after), len(before),
+            'Query count grew from %d to %d after adding rows\nCaptured queries were:\n%s' % (
+                len(before), len(after),
+                '\n'.join('%d. %s' % (i, query['sql']) for i, query in enumerate(after.captured_queries, start=1))
+            )
+        )
+
+
+class ShipmentFixturesMixin:
+    """Mixin for ``TestCase`` classes creating shipments and shipment payloads."""
+
+    def create_user(self, username='testuser'):
+        return get_user_model().objects.create_user(
+            username=username,
+            password='testpass123',
+            email=f'{username}@example.com'
+        )
+
+    def create_geography(self):
+        """Create ``self.country`` and ``self.city``."""
+        self.country = Country.objects.create(name='Test Country', code2='TC', code3='TCO')
+        self.city = City.objects.create(name='Test City', country=self.country)
+
+    def create_shipment_fixtures(self):
+        """Create ``self.user``, ``self.country``, ``self.city`` and ``self.shipper``."""
+        self.user = self.create_user()
+        self.create_geography()
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='Test Address',
+            country=self.country,
+            city=self.city,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+
+    def create_shipment(self, **fields):
+        """Create a shipment of ``self.user`` from ``self.shipper`` to ``self.city``."""
+        return Shipment.objects.create(**{
+            'shipper': self.shipper,
+            'created_by': self.user,
+            'receiver_name': 'Test Receiver',
+            'receiver_address': 'Test Receiver Address',
+            'receiver_country': self.country,
+            'receiver_city': self.city,
+            'receiver_contact_person': 'Test Receiver Contact',
+            'receiver_contact_number': '0987654321',
+            'quantity': 1,
+            'grossweight': 1.0,
+            'width': 10.0,
+            'length': 10.0,
+            'height': 10.0,
+            'item_description': 'Test Item',
+            **fields
+        })
+
+    def shipment_payload(self, shipper=None, **fields):
+        """
+        Return the API payload creating a shipment from and to ``self.city``;
+        ``shipper`` updates the nested shipper fields.
+        """
+        return {
+            'shipper': {
+                'shipper_name': 'New Shipper',
+                'address': 'New Address',
+                'country_id': self.country.id,
+                'city_id': self.city.id,
+                'contact_person': 'New Contact',
+                'contact_number': '1111111111',
+                **(shipper or {})
+            },
+            'receiver_name': 'New Receiver',
+            'receiver_address': 'New Receiver Address',
+            'receiver_country': self.country.id,
+            'receiver_city': self.city.id,
+            'receiver_contact_person': 'New Receiver Contact',
+            'receiver_contact_number': '2222222222',
+            'quantity': 1,
+            'grossweight': 1.0,
+            'width': 10.0,
+            'length': 10.0,
+            'height': 10.0,
+            'item_description': 'New Test Item',
+            **fields
+        }
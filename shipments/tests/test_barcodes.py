@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase, override_settings
+from ..utils.barcodes import generate_barcode, generate_barcode_svg, get_barcode_context
+
+
+class BarcodeTest(SimpleTestCase):
+    def setUp(self):
+        generate_barcode.cache_clear()
+        generate_barcode_svg.cache_clear()
+
+    def test_svg_barcode_is_inline_markup(self):
+        """Test that the SVG barcode can be embedded directly in HTML"""
+        markup = generate_barcode_svg('AWB-980102992')
+
+        self.assertTrue(markup.startswith('<svg'))
+        self.assertNotIn('<?xml', markup)
+        self.assertNotIn('<!DOCTYPE', markup)
+
+    def test_barcodes_are_memoized_per_awb(self):
+        """Test that the same AWB is only encoded once"""
+        first = generate_barcode_svg('AWB-980102992')
+        second = generate_barcode_svg('AWB-980102992')
+
+        self.assertEqual(first, second)
+        info = generate_barcode_svg.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    @override_settings(PDF_BARCODE_FORMAT='svg')
+    def test_svg_context(self):
+        """Test that SVG mode skips the PNG barcode"""
+        context = get_barcode_context('AWB-980102992')
+
+        self.assertEqual(set(context), {'barcode_svg'})
+        self.assertEqual(generate_barcode.cache_info().currsize, 0)
+
+    @override_settings(PDF_BARCODE_FORMAT='png')
+    def test_png_context(self):
+        """Test that PNG mode provides the base64 image"""
+        context = get_barcode_context('AWB-980102992')
+
+        self.assertEqual(set(context), {'barcode_data'})
+        self.assertTrue(context['barcode_data'])
+
+    @override_settings(PDF_BARCODE_FORMAT='gif')
+    def test_unknown_format_is_rejected(self):
+        """Test that a misconfigured barcode format fails loudly"""
+        with self.assertRaises(ValueError):
+            get_barcode_context('AWB-980102992')
@@ -0,0 +1,38 @@
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from cities_light.management.commands.cities_light import Command as CitiesLightCommand
+from cities_light.models import Country
+from cities_light.signals import country_items_pre_import
+from ..cache import get_reference_data_version
+
+
+def fake_import(command, *args, **options):
+    """Stand-in for the download and import of the cities_light data"""
+    # As in cities_light, the filters of other receivers may reject the row
+    country_items_pre_import.send_robust(sender=command, items=['IC'])
+    Country.objects.create(name='Imported Country', code2='IC', code3='ICO')
+    Country.objects.create(name='Other Country', code2='OC', code3='OCO')
+
+
+class CitiesLightImportTest(TestCase):
+    @mock.patch.object(CitiesLightCommand, 'handle', autospec=True, side_effect=fake_import)
+    def test_import_bumps_reference_data_version_once(self, handle):
+        """Test that the import invalidates the cached reference data at its end, not per row"""
+        with mock.patch('shipments.signals.bump_reference_data_version') as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('cities_light')
+
+        handle.assert_called_once()
+        bump.assert_called_once_with()
+
+    @mock.patch.object(CitiesLightCommand, 'handle', autospec=True, side_effect=fake_import)
+    def test_edits_after_import_invalidate_again(self, handle):
+        """Test that the import does not leave per-row invalidation switched off"""
+        call_command('cities_light')
+        version = get_reference_data_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Country.objects.filter(code2='IC').get().save()
+
+        self.assertNotEqual(get_reference_data_version(), version)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from cities_light.models import Country, City
+from ..autocomplete import CityAutocompleteIndex, get_city_index, load_cities, normalize
+
+
+class CityAutocompleteIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brazil = Country.objects.create(name='Brazil', code2='BR', code3='BRA')
+        self.usa = Country.objects.create(name='United States', code2='US', code3='USA')
+        self.sao_paulo = City.objects.create(name='São Paulo', country=self.brazil, population=12000000)
+        self.santos = City.objects.create(name='Santos', country=self.brazil, population=430000)
+        self.new_york = City.objects.create(name='New York', country=self.usa, population=8000000)
+        self.san_diego = City.objects.create(name='San Diego', country=self.usa, population=1400000)
+        self.index = CityAutocompleteIndex(load_cities())
+
+    def names(self, results):
+        return [city['name'] for city in results]
+
+    def test_normalize_folds_accents_and_case(self):
+        self.assertEqual(normalize('  São  PAULO '), 'sao paulo')
+
+    def test_search_is_accent_insensitive(self):
+        """Test that plain letters match accented names and the other way round"""
+        self.assertEqual(self.names(self.index.search('sao p')), ['São Paulo'])
+        self.assertEqual(self.names(self.index.search('SÃO')), ['São Paulo'])
+
+    def test_results_are_ranked_by_population(self):
+        """Test that larger cities are suggested first"""
+        self.assertEqual(self.names(self.index.search('sa')), ['São Paulo', 'San Diego', 'Santos'])
+        self.assertEqual(self.names(self.index.search('san')), ['San Diego', 'Santos'])
+
+    def test_later_words_match(self):
+        """Test that a prefix of a later word finds the city"""
+        self.assertEqual(self.names(self.index.search('york')), ['New York'])
+
+    def test_country_scope_and_limit(self):
+        """Test that results can be scoped to a country and limited"""
+        self.assertEqual(self.names(self.index.search('sa', country_id=self.usa.id)), ['San Diego'])
+        self.assertEqual(self.names(self.index.search('s', limit=1)), ['São Paulo'])
+        self.assertEqual(self.index.search('sa', country_id=0), [])
+
+    def test_results_include_country(self):
+        result = self.index.search('new york')[0]
+        self.assertEqual(result['country']['code2'], 'US')
+
+    def test_index_is_rebuilt_when_reference_data_changes(self):
+        """Test that the shared index follows imports and edits of cities"""
+        index = get_city_index()
+        self.assertIs(get_city_index(), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name='Sacramento', country=self.usa, population=500000)
+
+        self.assertIsNot(get_city_index(), index)
+        self.assertIn('Sacramento', self.names(get_city_index().search('sac')))
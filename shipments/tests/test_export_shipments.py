@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import CustomUser
+from ..exporting import EXPORT_COLUMNS, export_shipments, iter_export_rows
+from ..models import Shipment, Shipper
+from cities_light.models import Country, City
+
+
+class ExportShipmentsTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.other_user = CustomUser.objects.create_user(
+            username='otheruser',
+            password='testpass123',
+            email='other@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='123 Test St',
+            city=self.city,
+            country=self.country,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+        for index, (owner, payment_status) in enumerate(
+            [(self.user, 'pending'), (self.user, 'paid'), (self.other_user, 'pending')]
+        ):
+            Shipment.objects.create(
+                shipper=self.shipper,
+                created_by=owner,
+                receiver_name=f'Test Receiver {index}',
+                receiver_address='456 Test Ave',
+                receiver_country=self.country,
+                receiver_city=self.city,
+                receiver_contact_person='Test Receiver Contact',
+                receiver_contact_number='0987654321',
+                payment_status=payment_status,
+                quantity=1,
+                grossweight=1.0,
+                width=10,
+                length=10,
+                height=10,
+                item_description='Test Item'
+            )
+
+    def run_export(self, *args):
+        stdout = io.StringIO()
+        call_command('export_shipments', *args, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+    def test_export_is_streamed_in_blocks(self):
+        """Test that the export is produced block by block with one query per page"""
+        with self.assertNumQueries(2):
+            blocks = list(export_shipments(Shipment.objects.order_by('id'), 'csv', chunk_size=2))
+        rows = list(csv.reader(io.StringIO(''.join(blocks))))
+        self.assertEqual(rows[0], [column for column, _ in EXPORT_COLUMNS])
+        self.assertEqual(len(rows), 4)
+
+    def test_pages_follow_the_ordering(self):
+        """Test that keyset pages continue after the last row, also for ordering with ties"""
+        Shipment.objects.update(created_at=timezone.now())
+        queryset = Shipment.objects.order_by('-created_at', 'receiver_name')
+        with self.assertNumQueries(4):
+            rows = list(iter_export_rows(queryset, chunk_size=1))
+        name = [column for column, _ in EXPORT_COLUMNS].index('receiver_name')
+        self.assertEqual(
+            [row[name] for row in rows],
+            ['Test Receiver 0', 'Test Receiver 1', 'Test Receiver 2']
+        )
+
+    def test_csv_formulas_are_escaped(self):
+        """Test that text cells are not turned into spreadsheet formulas"""
+        Shipment.objects.filter(receiver_name='Test Receiver 0').update(receiver_name='=HYPERLINK("x")')
+        self.shipper.shipper_name = '@SUM(1)'
+        self.shipper.save()
+        rows = list(csv.DictReader(io.StringIO(self.run_export())))
+        self.assertEqual(rows[0]['receiver_name'], '\'=HYPERLINK("x")')
+        self.assertEqual(rows[0]['shipper_name'], "'@SUM(1)")
+        self.assertEqual(rows[1]['receiver_name'], 'Test Receiver 1')
+
+    def test_export_all_shipments_as_csv(self):
+        """Test that the command exports every shipment in primary key order"""
+        rows = list(csv.DictReader(io.StringIO(self.run_export())))
+        self.assertEqual(
+            [row['receiver_name'] for row in rows],
+            ['Test Receiver 0', 'Test Receiver 1', 'Test Receiver 2']
+        )
+        self.assertEqual(rows[0]['shipper_country'], 'Test Country')
+
+    def test_export_filters(self):
+        """Test that the command filters by owner and payment status"""
+        output = self.run_export('--format', 'ndjson', '--owner', 'testuser', '--payment-status', 'pending')
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([row['receiver_name'] for row in rows], ['Test Receiver 0'])
+
+    def test_export_to_file(self):
+        """Test that the command writes to the output file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'shipments.csv'
+            self.run_export('--output', str(path))
+            self.assertEqual(len(path.read_text().splitlines()), 4)
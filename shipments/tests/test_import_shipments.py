@@ -0,0 +1,262 @@
+import csv
+import io
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from accounts.models import CustomUser
+from ..geography import GeographyNameIndex
+from ..models import ImportChunk, Shipment, Shipper
+from cities_light.models import Country, City
+
+HEADERS = [
+    'shipper_name', 'shipper_address', 'shipper_country', 'shipper_city',
+    'shipper_contact_person', 'shipper_contact_number',
+    'receiver_name', 'receiver_address', 'receiver_country', 'receiver_city',
+    'receiver_contact_person', 'receiver_contact_number',
+    'quantity', 'grossweight', 'width', 'length', 'height', 'item_description',
+]
+
+
+class GeographyNameIndexTest(TestCase):
+    def setUp(self):
+        self.index = GeographyNameIndex(
+            countries=[(1, 'Brazil', 'Brazil', 'BR', 'BRA'), (2, 'Côte d’Ivoire', 'Cote d’Ivoire', 'CI', 'CIV')],
+            cities=[
+                (10, 1, 'São Paulo', 'Sao Paulo', 12000000),
+                (11, 1, 'Santa Cruz', 'Santa Cruz', 100),
+                (12, 1, 'Santa Cruz', 'Santa Cruz', 5000),
+                (20, 2, 'Abidjan', 'Abidjan', 4000000),
+            ],
+        )
+
+    def test_country_by_name_code_or_id(self):
+        """Test that countries are found by name, ASCII name, ISO codes and ID"""
+        for value in ('Brazil', ' brazil ', 'BR', 'bra', 1, '1'):
+            self.assertEqual(self.index.get_country_id(value), 1)
+        self.assertEqual(self.index.get_country_id('cote d’ivoire'), 2)
+        self.assertIsNone(self.index.get_country_id('Atlantis'))
+        self.assertIsNone(self.index.get_country_id(99))
+
+    def test_city_within_country(self):
+        """Test that cities are found by name or ID within their own country only"""
+        self.assertEqual(self.index.get_city_id(1, 'sao paulo'), 10)
+        self.assertEqual(self.index.get_city_id(1, 'SÃO PAULO'), 10)
+        self.assertEqual(self.index.get_city_id(1, 10), 10)
+        self.assertIsNone(self.index.get_city_id(2, 'Sao Paulo'))
+        self.assertIsNone(self.index.get_city_id(2, 10))
+
+    def test_most_populous_city_wins(self):
+        """Test that an ambiguous city name resolves to the most populous city"""
+        self.assertEqual(self.index.get_city_id(1, 'Santa Cruz'), 12)
+
+
+class ImportShipmentsCommandTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='merchant',
+            password='testpass123',
+            email='merchant@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country', name_ascii='Test Country', code2='TC', code3='TCO')
+        self.city = City.objects.create(name='Test City', name_ascii='Test City', country=self.country)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def get_row(self, **overrides):
+        row = {
+            'shipper_name': 'Manifest Shipper',
+            'shipper_address': 'Shipper Street 1',
+            'shipper_country': 'Test Country',
+            'shipper_city': 'test city',
+            'shipper_contact_person': 'Shipper Contact',
+            'shipper_contact_number': '1111111111',
+            'receiver_name': 'Manifest Receiver',
+            'receiver_address': 'Receiver Street 2',
+            'receiver_country': 'TC',
+            'receiver_city': 'Test City',
+            'receiver_contact_person': 'Receiver Contact',
+            'receiver_contact_number': '2222222222',
+            'quantity': '2',
+            'grossweight': '1.5',
+            'width': '50',
+            'length': '40',
+            'height': '30',
+            'item_description': 'Books',
+        }
+        row.update(overrides)
+        return row
+
+    def write_csv(self, rows, headers=HEADERS, name='manifest.csv'):
+        path = Path(self.directory.name) / name
+        with open(path, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=headers, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, path, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_shipments', str(path), '--owner', 'merchant', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv(self):
+        """Test that every row becomes a shipment with resolved places and weights"""
+        path = self.write_csv([self.get_row(receiver_name=f'Receiver {index}') for index in range(5)])
+        stdout, stderr = self.run_import(path, '--chunk-size', '2')
+
+        self.assertIn('Imported 5 shipment(s), rejected 0 row(s).', stdout)
+        self.assertEqual(stderr, '')
+        shipments = Shipment.objects.filter(created_by=self.user)
+        self.assertEqual(shipments.count(), 5)
+        shipment = shipments.get(receiver_name='Receiver 0')
+        self.assertEqual(shipment.receiver_country, self.country)
+        self.assertEqual(shipment.receiver_city, self.city)
+        self.assertEqual(shipment.shipper.city, self.city)
+        self.assertEqual(shipment.volumetricks, Decimal('24'))
+        self.assertEqual(shipment.chargeable_weight, Decimal('24'))
+        self.assertEqual(shipment.payment_status, 'pending')
+        self.assertTrue(shipment.awb_number.startswith('PENDING'))
+
+    def test_identical_shippers_are_stored_once(self):
+        """Test that rows of the same shipper share one Shipper per chunk"""
+        path = self.write_csv([self.get_row() for _ in range(3)])
+        self.run_import(path)
+        self.assertEqual(Shipment.objects.count(), 3)
+        self.assertEqual(Shipper.objects.count(), 1)
+
+    def test_invalid_rows_are_reported(self):
+        """Test that invalid rows are rejected with their line while valid rows are imported"""
+        rows = [
+            self.get_row(),
+            self.get_row(receiver_country='Atlantis'),
+            self.get_row(quantity='many', grossweight=''),
+            self.get_row(shipper_city='Elsewhere'),
+        ]
+        errors_path = Path(self.directory.name) / 'errors.csv'
+        stdout, _ = self.run_import(self.write_csv(rows), '--errors', str(errors_path))
+
+        self.assertIn('Imported 1 shipment(s), rejected 3 row(s).', stdout)
+        with open(errors_path, newline='') as handle:
+            errors = list(csv.reader(handle))
+        self.assertEqual([error[0] for error in errors], ['line', '3', '4', '5'])
+        self.assertIn('receiver_country', errors[1][1])
+        self.assertIn('quantity', errors[2][1])
+        self.assertIn('grossweight', errors[2][1])
+        self.assertIn('shipper_city', errors[3][1])
+
+    def test_duplicate_awb_rejects_only_that_row(self):
+        """Test that a database conflict in a chunk only rejects the conflicting rows"""
+        headers = HEADERS + ['awb_number']
+        rows = [self.get_row(awb_number='AWB-1'), self.get_row(awb_number='AWB-1'), self.get_row(awb_number='AWB-2')]
+        stdout, stderr = self.run_import(self.write_csv(rows, headers=headers))
+
+        self.assertIn('Imported 2 shipment(s), rejected 1 row(s).', stdout)
+        self.assertIn('Line 3:', stderr)
+        self.assertEqual(
+            sorted(Shipment.objects.values_list('awb_number', flat=True)), ['AWB-1', 'AWB-2']
+        )
+
+    def test_imported_numbers_advance_the_sequence(self):
+        """Test that the tracking number sequence is moved past the numbers of the file"""
+        headers = HEADERS + ['awb_number', 'reference_number']
+        rows = [
+            self.get_row(awb_number='AWB-990000005', reference_number='REF-990000001'),
+            self.get_row(awb_number='AWB-990000002', reference_number='REF-990000009'),
+            self.get_row(),
+        ]
+        with mock.patch('shipments.importing.advance_tracking_number_sequence') as advance:
+            self.run_import(self.write_csv(rows, headers=headers))
+        advance.assert_called_once_with(990000009)
+
+    def test_copy_failure_rejects_rows_one_by_one(self):
+        """Test that a driver error raised by COPY falls back to saving the rows one at a time"""
+        open_cursor = connection.cursor
+
+        def cursor():
+            wrapper = open_cursor()
+            wrapper.copy_expert = mock.Mock(side_effect=connection.Database.IntegrityError('duplicate key'))
+            return wrapper
+
+        path = self.write_csv([self.get_row(), self.get_row()])
+        with mock.patch('shipments.management.commands.import_shipments.can_copy', return_value=True), \
+                mock.patch.object(connection, 'cursor', cursor):
+            stdout, stderr = self.run_import(path)
+
+        self.assertIn('Imported 0 shipment(s), rejected 2 row(s).', stdout)
+        self.assertIn('Line 2: duplicate key', stderr)
+        self.assertFalse(Shipment.objects.exists())
+
+    def test_column_map(self):
+        """Test that file headers can be mapped to columns"""
+        headers = ['Consignee'] + HEADERS[1:]
+        row = self.get_row()
+        row['Consignee'] = row.pop('shipper_name')
+        self.run_import(self.write_csv([row], headers=headers), '--map', 'Consignee=shipper_name')
+        self.assertEqual(Shipper.objects.get().shipper_name, 'Manifest Shipper')
+
+    def test_missing_required_column(self):
+        """Test that a file without a required column is refused before importing anything"""
+        path = self.write_csv([self.get_row()], headers=HEADERS[1:])
+        with self.assertRaisesMessage(CommandError, 'shipper_name'):
+            self.run_import(path)
+        self.assertFalse(Shipment.objects.exists())
+
+    def record_chunk(self, path, rows_read, chunk_size=1, checkpoint='manifest'):
+        ImportChunk.objects.create(
+            checkpoint=checkpoint, source=str(path.resolve()), chunk_size=chunk_size,
+            rows_read=rows_read, created=1, failed=0
+        )
+
+    def test_chunks_are_recorded_with_checkpoint(self):
+        """Test that every written chunk is recorded, so running the import again writes nothing"""
+        path = self.write_csv([self.get_row(receiver_name=f'Receiver {index}') for index in range(5)])
+        self.run_import(path, '--checkpoint', 'manifest', '--chunk-size', '2')
+
+        self.assertEqual(
+            list(ImportChunk.objects.order_by('rows_read').values_list('rows_read', 'created')),
+            [(2, 2), (4, 2), (5, 1)]
+        )
+        stdout, _ = self.run_import(path, '--checkpoint', 'manifest', '--chunk-size', '2')
+        self.assertIn('Imported 5 shipment(s)', stdout)
+        self.assertEqual(Shipment.objects.count(), 5)
+
+    def test_resume_from_checkpoint(self):
+        """Test that an import resumes with the chunks its checkpoint does not record, in any order"""
+        path = self.write_csv([self.get_row(receiver_name=f'Receiver {index}') for index in range(5)])
+        for rows_read in (1, 2, 4):
+            self.record_chunk(path, rows_read)
+
+        stdout, _ = self.run_import(path, '--checkpoint', 'manifest', '--chunk-size', '1')
+
+        self.assertIn('Resuming: 3 chunk(s) already written.', stdout)
+        self.assertIn('Imported 5 shipment(s)', stdout)
+        self.assertEqual(
+            sorted(Shipment.objects.values_list('receiver_name', flat=True)), ['Receiver 2', 'Receiver 4']
+        )
+
+    def test_chunk_is_not_recorded_without_its_rows(self):
+        """Test that a chunk whose shipments are rolled back is not recorded either"""
+        path = self.write_csv([self.get_row()])
+        with mock.patch('shipments.importing.ImportCheckpoint.record', side_effect=DatabaseError('lost')):
+            with self.assertRaises(DatabaseError):
+                self.run_import(path, '--checkpoint', 'manifest')
+        self.assertFalse(Shipment.objects.exists())
+
+    def test_checkpoint_of_another_file_is_refused(self):
+        """Test that a checkpoint is only used for the file it was written for"""
+        path = self.write_csv([self.get_row()])
+        self.record_chunk(self.write_csv([self.get_row()], name='other.csv'), 1)
+        with self.assertRaises(CommandError):
+            self.run_import(path, '--checkpoint', 'manifest')
+
+    def test_checkpoint_needs_same_chunk_size(self):
+        """Test that an import cannot be resumed with another chunk size"""
+        path = self.write_csv([self.get_row(), self.get_row()])
+        self.record_chunk(path, 1)
+        with self.assertRaisesMessage(CommandError, '--chunk-size 1'):
+            self.run_import(path, '--checkpoint', 'manifest', '--chunk-size', '2')
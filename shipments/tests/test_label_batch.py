@@ -0,0 +1,77 @@
+import io
+import zipfile
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from accounts.models import CustomUser
+from ..models import Shipment, Shipper
+from ..utils.label_batch import get_label_queryset, iter_label_chunks, iter_label_pdfs, iter_zip_stream
+from cities_light.models import Country, City
+
+
+class LabelBatchTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='123 Test St',
+            city=self.city,
+            country=self.country,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+        self.shipments = [
+            Shipment.objects.create(
+                shipper=self.shipper,
+                created_by=self.user,
+                receiver_name=f'Test Receiver {index}',
+                receiver_address='456 Test Ave',
+                receiver_country=self.country,
+                receiver_city=self.city,
+                receiver_contact_person='Test Receiver Contact',
+                receiver_contact_number='0987654321',
+                quantity=1,
+                grossweight=1.0,
+                width=10,
+                length=10,
+                height=10,
+                item_description='Test Item',
+                payment_status='paid' if index < 3 else 'pending'
+            )
+            for index in range(5)
+        ]
+
+    def test_queryset_filters_and_joins_in_one_query(self):
+        """Test that selected shipments and their label data load in one query"""
+        with self.assertNumQueries(1):
+            shipments = list(get_label_queryset(payment_status='paid'))
+            cities = [(s.shipper.city.name, s.receiver_city.name) for s in shipments]
+        self.assertEqual([s.id for s in shipments], [s.id for s in self.shipments[:3]])
+        self.assertEqual(len(cities), 3)
+
+    def test_chunks_respect_chunk_size(self):
+        """Test that large batches are split into bounded chunks"""
+        chunks = list(iter_label_chunks(get_label_queryset(ids=[s.id for s in self.shipments]), 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    @mock.patch('shipments.utils.label_batch.render_shipment_labels_pdf', side_effect=lambda chunk: b'%PDF' * len(chunk))
+    def test_streamed_zip_contains_one_pdf_per_chunk(self, render):
+        """Test that streaming mode yields a valid ZIP of chunk PDFs"""
+        pdfs = iter_label_pdfs(get_label_queryset(ids=[s.id for s in self.shipments]), 2)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_zip_stream(pdfs))))
+
+        self.assertEqual(archive.namelist(), ['labels-0001.pdf', 'labels-0002.pdf', 'labels-0003.pdf'])
+        self.assertEqual(archive.read('labels-0003.pdf'), b'%PDF')
+        self.assertEqual(render.call_count, 3)
+
+    def test_print_labels_rejects_chunk_size_below_one(self):
+        """Test that print_labels refuses a chunk size that would never advance"""
+        for chunk_size in ('0', '-5'):
+            with self.assertRaisesMessage(CommandError, '--chunk-size must be at least 1.'):
+                call_command('print_labels', '--payment-status', 'paid', '--chunk-size', chunk_size)
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from accounts.models import CustomUser
+from ..models import Shipment, Shipper
+from ..utils.pdf_cache import get_pdf_cache_dir, get_pdf_cache_path, get_pdf_digest, store_pdf
+from ..utils.pdf_generator import shipment_pdf_response
+from ..utils.pdf_renderer import PDFRenderer
+from cities_light.models import Country, City
+
+
+class ShipmentPDFCacheTest(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(PDF_CACHE_DIR=Path(self.cache_dir.name))
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.addCleanup(self.cache_dir.cleanup)
+
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='123 Test St',
+            city=self.city,
+            country=self.country,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+        self.shipment = Shipment.objects.create(
+            shipper=self.shipper,
+            created_by=self.user,
+            receiver_name='Test Receiver',
+            receiver_address='456 Test Ave',
+            receiver_country=self.country,
+            receiver_city=self.city,
+            receiver_contact_person='Test Receiver Contact',
+            receiver_contact_number='0987654321',
+            quantity=1,
+            grossweight=1.0,
+            width=10,
+            length=10,
+            height=10,
+            item_description='Test Item',
+            payment_status='paid'
+        )
+
+    def test_digest_depends_on_document_type(self):
+        """Test that each document type gets its own cache entry"""
+        self.assertNotEqual(
+            get_pdf_digest(self.shipment, 'label'),
+            get_pdf_digest(self.shipment, 'detailed')
+        )
+
+    def test_digest_changes_when_shipment_changes(self):
+        """Test that saving the shipment points at a new cache entry"""
+        digest = get_pdf_digest(self.shipment, 'label')
+        self.shipment.receiver_name = 'Updated Receiver'
+        self.shipment.save()
+        self.assertNotEqual(get_pdf_digest(self.shipment, 'label'), digest)
+
+    def test_digest_changes_when_receiver_city_is_renamed(self):
+        """Test that renaming a city printed on the PDF points at a new cache entry"""
+        digest = get_pdf_digest(self.shipment, 'label')
+        self.city.name = 'Renamed City'
+        self.city.save()
+        shipment = Shipment.objects.with_geography().get(pk=self.shipment.pk)
+        self.assertNotEqual(get_pdf_digest(shipment, 'label'), digest)
+
+    @mock.patch('shipments.utils.pdf_generator.render_shipment_pdf', return_value=b'%PDF-1.7')
+    def test_pdf_purged_while_served_is_rendered_again(self, render):
+        """Test that a PDF purged before it could be opened is rendered and served, not a 500"""
+        with mock.patch('shipments.utils.pdf_generator.store_pdf'):
+            response = shipment_pdf_response(self.shipment, 'label')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7')
+        render.assert_called_once()
+
+    @mock.patch('shipments.utils.pdf_generator.render_shipment_pdf', return_value=b'%PDF-1.7')
+    def test_last_modified_is_the_render_time(self, render):
+        """Test that Last-Modified moves with a new template version, like the ETag"""
+        path = store_pdf(get_pdf_cache_path(self.shipment, 'label'), b'%PDF-1.7')
+        os.utime(path, (0, 0))
+        response = shipment_pdf_response(self.shipment, 'label')
+        response.close()
+        self.assertEqual(response['Last-Modified'], 'Thu, 01 Jan 1970 00:00:00 GMT')
+
+        with override_settings(PDF_TEMPLATE_VERSION='2'):
+            response = shipment_pdf_response(self.shipment, 'label')
+            response.close()
+        self.assertNotEqual(response['Last-Modified'], 'Thu, 01 Jan 1970 00:00:00 GMT')
+
+    @override_settings(PDF_TEMPLATE_VERSION='2')
+    def test_digest_changes_with_template_version(self):
+        """Test that bumping the template version invalidates cached PDFs"""
+        with override_settings(PDF_TEMPLATE_VERSION='1'):
+            digest = get_pdf_digest(self.shipment, 'label')
+        self.assertNotEqual(get_pdf_digest(self.shipment, 'label'), digest)
+
+    def test_saving_shipment_purges_cached_pdfs(self):
+        """Test that stale PDFs are removed once the save commits"""
+        path = store_pdf(get_pdf_cache_path(self.shipment, 'label'), b'%PDF-1.7')
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipment.save()
+
+        self.assertFalse(path.exists())
+        self.assertFalse(get_pdf_cache_dir(self.shipment.id).exists())
+
+
+class PDFRendererTest(SimpleTestCase):
+    @override_settings(DEBUG=False)
+    def test_each_thread_is_warmed_with_its_own_state(self):
+        """Test that threads never share WeasyPrint objects and warm up before their first render"""
+        template_name = 'shipments/pdf/shipment_label.html'
+        renderer = PDFRenderer()
+        renderer.warm_up([template_name])
+        seen = []
+
+        def render():
+            font_config = renderer.font_config
+            seen.append((font_config, renderer._local.stylesheets.get(template_name)))
+
+        thread = threading.Thread(target=render)
+        thread.start()
+        thread.join()
+
+        font_config, stylesheets = seen[0]
+        self.assertIsNot(font_config, renderer.font_config)
+        self.assertIsNotNone(stylesheets)
+        self.assertIsNot(stylesheets, renderer.get_stylesheets(template_name))
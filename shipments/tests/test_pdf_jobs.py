@@ -0,0 +1,172 @@
+from datetime import timedelta
+from unittest import mock
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import CustomUser
+from ..models import PDFRenderJob, Shipment, Shipper
+from ..utils.pdf_jobs import claim_next_job, enqueue_pdf_render, purge_finished_jobs, run_job, run_worker
+from cities_light.models import Country, City
+
+
+class PDFRenderJobQueueTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='123 Test St',
+            city=self.city,
+            country=self.country,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+        self.shipment = Shipment.objects.create(
+            shipper=self.shipper,
+            created_by=self.user,
+            receiver_name='Test Receiver',
+            receiver_address='456 Test Ave',
+            receiver_country=self.country,
+            receiver_city=self.city,
+            receiver_contact_person='Test Receiver Contact',
+            receiver_contact_number='0987654321',
+            quantity=1,
+            grossweight=1.0,
+            width=10,
+            length=10,
+            height=10,
+            item_description='Test Item',
+            payment_status='paid'
+        )
+
+    def test_enqueue_reuses_active_job(self):
+        """Test that repeated requests for the same PDF share one job"""
+        first = enqueue_pdf_render(self.shipment, 'label')
+        second = enqueue_pdf_render(self.shipment, 'label')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.status, 'pending')
+
+    def test_claim_marks_job_running(self):
+        """Test that claiming a job takes it off the pending queue"""
+        job = enqueue_pdf_render(self.shipment, 'label')
+
+        claimed = claim_next_job()
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, 'running')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    def test_abandoned_running_job_is_claimed_again(self):
+        """Test that a job left running by a dead worker is picked up again"""
+        job = enqueue_pdf_render(self.shipment, 'label')
+        PDFRenderJob.objects.filter(pk=job.pk).update(
+            status='running',
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+    def test_job_abandoned_too_often_is_failed(self):
+        """Test that a job that keeps killing its worker is given up after the last attempt"""
+        job = enqueue_pdf_render(self.shipment, 'label')
+        PDFRenderJob.objects.filter(pk=job.pk).update(
+            status='running',
+            started_at=timezone.now() - timedelta(hours=1),
+            attempts=3
+        )
+
+        with self.settings(PDF_RENDER_JOB_MAX_ATTEMPTS=3):
+            self.assertIsNone(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch('shipments.utils.pdf_jobs.get_pdf_cache_path')
+    def test_cached_pdf_reuses_done_job(self, cache_path):
+        """Test that polling an already cached PDF does not add a job per request"""
+        cache_path.return_value.exists.return_value = True
+
+        first = enqueue_pdf_render(self.shipment, 'label')
+        second = enqueue_pdf_render(self.shipment, 'label')
+
+        self.assertEqual(first.status, 'done')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+    def test_enqueue_returns_job_queued_concurrently(self):
+        """Test that losing the race to queue a PDF returns the winner's job"""
+        existing = PDFRenderJob.objects.create(shipment=self.shipment, document_type='label')
+
+        with mock.patch.object(QuerySet, 'first', autospec=True, side_effect=[None, existing]):
+            job = enqueue_pdf_render(self.shipment, 'label')
+
+        self.assertEqual(job.pk, existing.pk)
+        self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+    def test_purge_finished_jobs(self):
+        """Test that jobs finished before the retention period are deleted"""
+        old_job = enqueue_pdf_render(self.shipment, 'label')
+        PDFRenderJob.objects.filter(pk=old_job.pk).update(
+            status='done',
+            finished_at=timezone.now() - timedelta(days=2)
+        )
+        slow_job = enqueue_pdf_render(self.shipment, 'confirmation')
+        PDFRenderJob.objects.filter(pk=slow_job.pk).update(
+            status='done',
+            created_at=timezone.now() - timedelta(days=2),
+            finished_at=timezone.now()
+        )
+        pending_job = enqueue_pdf_render(self.shipment, 'detailed')
+
+        self.assertEqual(purge_finished_jobs(), 1)
+        self.assertEqual(
+            set(PDFRenderJob.objects.values_list('pk', flat=True)),
+            {slow_job.pk, pending_job.pk}
+        )
+
+    @mock.patch('shipments.utils.pdf_jobs.get_or_render_shipment_pdf')
+    def test_worker_renders_queued_jobs(self, render):
+        """Test that the worker renders every queued job and exits when idle"""
+        label_job = enqueue_pdf_render(self.shipment, 'label')
+        detailed_job = enqueue_pdf_render(self.shipment, 'detailed')
+
+        processed = run_worker(exit_when_idle=True)
+
+        self.assertEqual(processed, 2)
+        self.assertEqual(render.call_count, 2)
+        for job in (label_job, detailed_job):
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'done')
+            self.assertTrue(job.digest)
+
+    @mock.patch('shipments.utils.pdf_jobs.get_or_render_shipment_pdf', side_effect=RuntimeError('boom'))
+    def test_failed_render_is_recorded(self, render):
+        """Test that a rendering error marks the job as failed"""
+        enqueue_pdf_render(self.shipment, 'label')
+
+        job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'boom')
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch('shipments.utils.pdf_jobs.get_or_render_shipment_pdf')
+    def test_reclaimed_job_is_not_overwritten(self, render):
+        """Test that a worker whose job was claimed again does not record its outcome"""
+        enqueue_pdf_render(self.shipment, 'label')
+        job = claim_next_job()
+        PDFRenderJob.objects.filter(pk=job.pk).update(attempts=2)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+        self.assertIsNone(job.finished_at)
@@ -0,0 +1,112 @@
+from unittest import mock
+from django.test import TestCase
+from accounts.models import CustomUser
+from ..models import Shipment, Shipper
+from ..sequences import PendingNumberGenerator, TrackingNumberAllocator, allocator
+from cities_light.models import Country, City
+
+
+class TrackingNumberAllocatorTest(TestCase):
+    def test_numbers_are_served_from_reserved_block(self):
+        """Test that one reservation serves a whole block of numbers"""
+        block_allocator = TrackingNumberAllocator(block_size=3)
+        with mock.patch.object(
+            block_allocator, '_reserve_block', side_effect=[[10, 11, 12], [20, 21, 22]]
+        ) as reserve:
+            numbers = [block_allocator.next() for _ in range(4)]
+
+        self.assertEqual(numbers, [10, 11, 12, 20])
+        self.assertEqual(reserve.call_count, 2)
+
+    def test_block_is_dropped_after_fork(self):
+        """Test that a child process does not reuse its parent's block"""
+        block_allocator = TrackingNumberAllocator(block_size=2)
+        with mock.patch.object(block_allocator, '_reserve_block', side_effect=[[1, 2], [7, 8]]):
+            self.assertEqual(block_allocator.next(), 1)
+            block_allocator._pid = -1
+            self.assertEqual(block_allocator.next(), 7)
+
+
+class PendingNumberGeneratorTest(TestCase):
+    def test_pending_numbers_are_unique_and_ordered(self):
+        """Test that pending numbers never repeat and sort in creation order"""
+        generator = PendingNumberGenerator()
+        numbers = [generator.generate('PENDING') for _ in range(1000)]
+
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertTrue(all(len(number) == len('PENDING') + 24 for number in numbers))
+
+    def test_pending_numbers_survive_clock_going_back(self):
+        """Test that a clock step backwards does not produce a duplicate"""
+        generator = PendingNumberGenerator()
+        with mock.patch('shipments.sequences.time.time_ns', side_effect=[2_000_000_000, 1_000_000_000]):
+            first = generator.generate('PENDING')
+            second = generator.generate('PENDING')
+
+        self.assertLess(first, second)
+
+
+class ShipmentTrackingNumberTest(TestCase):
+    def setUp(self):
+        allocator.reset()
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.country = Country.objects.create(name='Test Country')
+        self.city = City.objects.create(name='Test City', country=self.country)
+        self.shipper = Shipper.objects.create(
+            shipper_name='Test Shipper',
+            address='123 Test St',
+            city=self.city,
+            country=self.country,
+            contact_person='Test Contact',
+            contact_number='1234567890'
+        )
+
+    def create_shipment(self, **kwargs):
+        return Shipment.objects.create(
+            shipper=self.shipper,
+            created_by=self.user,
+            receiver_name='Test Receiver',
+            receiver_address='456 Test Ave',
+            receiver_country=self.country,
+            receiver_city=self.city,
+            receiver_contact_person='Test Receiver Contact',
+            receiver_contact_number='0987654321',
+            quantity=1,
+            grossweight=1.0,
+            width=10,
+            length=10,
+            height=10,
+            item_description='Test Item',
+            **kwargs
+        )
+
+    def test_paid_shipment_gets_matching_numbers(self):
+        """Test that AWB and REF numbers are allocated together"""
+        shipment = self.create_shipment(payment_status='paid')
+
+        self.assertTrue(shipment.awb_number.startswith('AWB-'))
+        self.assertEqual(shipment.awb_number[4:], shipment.reference_number[4:])
+
+    def test_paid_shipments_get_distinct_numbers(self):
+        """Test that consecutive paid shipments never share a number"""
+        first = self.create_shipment(payment_status='paid')
+        second = self.create_shipment(payment_status='paid')
+
+        self.assertNotEqual(first.awb_number, second.awb_number)
+        self.assertNotEqual(first.reference_number, second.reference_number)
+
+    def test_payment_confirmation_replaces_pending_numbers(self):
+        """Test that confirming payment swaps pending numbers for permanent ones"""
+        shipment = self.create_shipment()
+        self.assertTrue(shipment.awb_number.startswith('PENDING'))
+
+        shipment.payment_status = 'paid'
+        shipment.save()
+
+        self.assertTrue(shipment.awb_number.startswith('AWB-'))
+        self.assertTrue(shipment.reference_number.startswith('REF-'))
@@ -0,0 +1,21 @@
+import datetime
+from django.test import SimpleTestCase, TestCase
+from ..partitions import add_months, create_tracking_partitions, partition_name
+
+
+class TrackingPartitionTest(SimpleTestCase):
+    def test_add_months(self):
+        """Test that months roll over into the next and previous years"""
+        self.assertEqual(add_months(datetime.date(2025, 11, 1), 1), datetime.date(2025, 12, 1))
+        self.assertEqual(add_months(datetime.date(2025, 11, 1), 3), datetime.date(2026, 2, 1))
+        self.assertEqual(add_months(datetime.date(2025, 1, 1), -1), datetime.date(2024, 12, 1))
+
+    def test_partition_name(self):
+        """Test that partitions are named after their month"""
+        self.assertEqual(partition_name(datetime.date(2025, 3, 1)), 'shipments_trackingevent_2025_03')
+
+
+class CreateTrackingPartitionsTest(TestCase):
+    def test_nothing_to_do_without_postgresql(self):
+        """Test that other databases keep the plain table"""
+        self.assertEqual(create_tracking_partitions(months_ahead=2), ([], []))
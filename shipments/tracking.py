@@ -0,0 +1,58 @@
+"""
+Recording tracking events.
+
+Scan events arrive in batches from hubs and couriers. A batch is written
+with one ``bulk_create`` and one ``UPDATE`` that moves the
+``current_status`` of every shipment in the batch to its latest event.
+The update only applies where the event is at least as recent as the
+stored status, so late or out-of-order scans extend the timeline without
+rolling the status back, and concurrent batches cannot overwrite a newer
+status with an older one.
+"""
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from .cache import invalidate_tracking_cache
+from .models import Shipment, TrackingEvent
+
+
+def update_current_status(events):
+    """Move each shipment's current status to the latest of its ``events``, in one query."""
+    latest = {}
+    for event in events:
+        current = latest.get(event.shipment_id)
+        if current is None or event.occurred_at >= current.occurred_at:
+            latest[event.shipment_id] = event
+    if not latest:
+        return 0
+
+    condition = Q()
+    status_cases, time_cases, location_cases = [], [], []
+    for shipment_id, event in latest.items():
+        condition |= Q(pk=shipment_id) & (
+            Q(current_status_at__isnull=True) | Q(current_status_at__lte=event.occurred_at)
+        )
+        status_cases.append(When(pk=shipment_id, then=Value(event.status)))
+        time_cases.append(When(pk=shipment_id, then=Value(event.occurred_at)))
+        location_cases.append(When(pk=shipment_id, then=Value(event.location)))
+
+    return Shipment.objects.filter(condition).update(
+        current_status=Case(*status_cases, default=F('current_status'), output_field=models.CharField()),
+        current_status_at=Case(*time_cases, default=F('current_status_at'), output_field=models.DateTimeField()),
+        current_location=Case(*location_cases, default=F('current_location'), output_field=models.CharField()),
+        updated_at=timezone.now(),
+    )
+
+
+def record_tracking_events(events):
+    """
+    Save unsaved ``TrackingEvent`` objects and update their shipments'
+    current status. Each event's ``shipment`` must be set; its tracking
+    numbers are used to drop the cached tracking payload.
+    """
+    with transaction.atomic():
+        TrackingEvent.objects.bulk_create(events)
+        update_current_status(events)
+        for shipment in {event.shipment_id: event.shipment for event in events}.values():
+            invalidate_tracking_cache(shipment)
+    return events
@@ -0,0 +1,74 @@
+"""
+Batch label printing: select shipments once and render their labels together.
+
+Small batches become a single multi-page PDF. Large batches are rendered in
+chunks of ``chunk_size`` labels, each chunk its own PDF, so only one chunk is
+held in memory at a time; over HTTP the chunks are streamed as a ZIP archive.
+"""
+import zipfile
+
+from shipments.models import Shipment
+from .pdf_generator import render_shipment_labels_pdf
+
+
+def get_label_queryset(ids=None, payment_status=None, service=None, created_after=None, created_before=None):
+    """Return the shipments to print, with everything the label template reads joined in."""
+    queryset = Shipment.objects.with_geography()
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    if payment_status:
+        queryset = queryset.filter(payment_status=payment_status)
+    if service:
+        queryset = queryset.filter(service=service)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(created_at__lt=created_before)
+    return queryset.order_by('id')
+
+
+def iter_label_chunks(queryset, chunk_size):
+    """Yield lists of at most ``chunk_size`` shipments, reading rows with a server-side cursor."""
+    chunk = []
+    for shipment in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(shipment)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_label_pdfs(queryset, chunk_size):
+    """Yield ``(filename, pdf_bytes)`` for each chunk of labels."""
+    for index, chunk in enumerate(iter_label_chunks(queryset, chunk_size), start=1):
+        yield f'labels-{index:04d}.pdf', render_shipment_labels_pdf(chunk)
+
+
+class _StreamBuffer:
+    """Write-only file object collecting bytes until they are handed to the response."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_stream(named_files):
+    """Stream a ZIP archive of ``(filename, bytes)`` pairs without buffering the whole archive."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, data in named_files:
+            archive.writestr(filename, data)
+            yield buffer.pop()
+    yield buffer.pop()
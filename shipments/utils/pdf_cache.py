@@ -0,0 +1,78 @@
+"""
+Content-addressed storage for rendered shipment PDFs.
+
+A cached PDF is named after a digest of the shipment id, the document type,
+the shipment's and shipper's ``updated_at``, the country and city names
+printed on it, ``PDF_TEMPLATE_VERSION`` and ``PDF_BARCODE_FORMAT``. Any
+change to the printed data therefore points at a new file; the stale ones
+are purged when the shipment is saved or deleted. Countries and cities carry
+no timestamp, so a rename is only noticed through their names. This module
+does not import WeasyPrint so that models can use it.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def get_pdf_cache_root():
+    return Path(getattr(settings, 'PDF_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'pdf_cache'))
+
+
+def get_pdf_cache_dir(shipment_id):
+    return get_pdf_cache_root() / str(shipment_id)
+
+
+def get_pdf_last_modified(shipment):
+    """Return the latest modification time of the data printed on the PDF."""
+    timestamps = [shipment.updated_at]
+    if shipment.shipper_id and shipment.shipper.updated_at:
+        timestamps.append(shipment.shipper.updated_at)
+    return max(timestamps)
+
+
+def get_printed_places(shipment):
+    """Return the countries and cities printed on the PDF, as they are printed."""
+    places = [shipment.receiver_country, shipment.receiver_city]
+    if shipment.shipper_id:
+        places += [shipment.shipper.country, shipment.shipper.city]
+    return [str(place) if place is not None else '' for place in places]
+
+
+def get_pdf_digest(shipment, document_type):
+    key = '\n'.join([
+        str(shipment.id),
+        document_type,
+        get_pdf_last_modified(shipment).isoformat(),
+        *get_printed_places(shipment),
+        str(getattr(settings, 'PDF_TEMPLATE_VERSION', '1')),
+        getattr(settings, 'PDF_BARCODE_FORMAT', 'svg'),
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_pdf_cache_path(shipment, document_type, digest=None):
+    digest = digest or get_pdf_digest(shipment, document_type)
+    return get_pdf_cache_dir(shipment.id) / f'{document_type}-{digest}.pdf'
+
+
+def store_pdf(path, pdf):
+    """Write a PDF atomically so readers never see a partially written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(pdf)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def purge_pdf_cache(shipment_id):
+    """Remove every cached PDF of a shipment."""
+    shutil.rmtree(get_pdf_cache_dir(shipment_id), ignore_errors=True)
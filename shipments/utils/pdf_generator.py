@@ -1,152 +1,150 @@
+import io
 import os
+import time
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.http import HttpResponse, Http404
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
-from barcode import Code128
-from barcode.writer import ImageWriter
-from io import BytesIO
-import base64
+from django.http import FileResponse, HttpResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 import logging
+from .barcodes import get_barcode_context
+from .pdf_cache import get_pdf_cache_path, get_pdf_digest, store_pdf
+from .pdf_renderer import renderer
 
 logger = logging.getLogger(__name__)
 
-def generate_barcode(awb_number):
-    """Generate a Code128 barcode for the AWB number."""
-    # Create a BytesIO object to store the barcode image
-    buffer = BytesIO()
-    
-    # Generate the barcode
-    code128 = Code128(awb_number, writer=ImageWriter())
-    code128.write(buffer)
-    
-    # Get the image data and encode it to base64
-    buffer.seek(0)
-    return base64.b64encode(buffer.getvalue()).decode()
-
-def generate_shipment_confirmation_pdf(shipment):
-    """Generate a confirmation PDF for the given shipment."""
+# Company details printed on every PDF
+COMPANY_CONTEXT = {
+    'company_name': 'Your Company Name',
+    'company_address': 'Your Company Address',
+    'company_phone': 'Your Company Phone',
+    'company_email': 'Your Company Email',
+}
+
+# Template and download filename for each PDF document type
+PDF_DOCUMENTS = {
+    'confirmation': {
+        'template': 'shipments/pdf/shipment_pdf.html',
+        'filename': 'shipment_{awb_number}.pdf',
+    },
+    'detailed': {
+        'template': 'shipments/pdf/shipment_detailed.html',
+        'filename': 'shipment_detailed_{awb_number}.pdf',
+    },
+    'label': {
+        'template': 'shipments/pdf/shipment_label.html',
+        'filename': 'label_{awb_number}.pdf',
+    },
+}
+
+LABEL_BATCH_TEMPLATE = 'shipments/pdf/shipment_labels.html'
+
+def render_shipment_pdf(shipment, document_type):
+    """Render the given PDF document type for a shipment and return the PDF bytes."""
+    # Render HTML template to PDF with the shared fonts and stylesheets
+    return renderer.render(PDF_DOCUMENTS[document_type]['template'], {
+        **COMPANY_CONTEXT,
+        **get_barcode_context(shipment.awb_number),
+        'shipment': shipment,
+        'generated_date': shipment.created_at,
+    })
+
+def render_shipment_labels_pdf(shipments):
+    """Render one PDF with a label page per shipment in a single WeasyPrint pass."""
+    return renderer.render(LABEL_BATCH_TEMPLATE, {
+        **COMPANY_CONTEXT,
+        'labels': [
+            {'shipment': shipment, **get_barcode_context(shipment.awb_number)}
+            for shipment in shipments
+        ],
+    })
+
+def warm_up_pdf_renderer():
+    """Load fonts and compile every PDF stylesheet, e.g. when a worker process starts."""
+    templates = [document['template'] for document in PDF_DOCUMENTS.values()]
+    renderer.warm_up(templates + [LABEL_BATCH_TEMPLATE])
+
+def get_or_render_shipment_pdf(shipment, document_type, digest=None):
+    """Return the path of the cached PDF, rendering it only if it is not cached yet."""
+    path = get_pdf_cache_path(shipment, document_type, digest)
+    if not path.exists():
+        store_pdf(path, render_shipment_pdf(shipment, document_type))
+    return path
+
+def open_shipment_pdf(shipment, document_type, digest=None):
+    """
+    Open the cached PDF, rendering it if it is missing, and return the open
+    file with the time it was rendered. The cache of a shipment can be purged
+    at any moment by a concurrent save, so the file is opened rather than
+    checked for; if it is gone again right after rendering, the rendered
+    bytes are served from memory.
+    """
+    path = get_pdf_cache_path(shipment, document_type, digest)
     try:
-        if not shipment:
-            raise Http404("Shipment not found")
-        
-        # Generate barcode
-        barcode_data = generate_barcode(shipment.awb_number)
-        
-        # Render HTML template
-        html_string = render_to_string('shipments/pdf/shipment_pdf.html', {
-            'shipment': shipment,
-            'barcode_data': barcode_data,
-            'company_name': 'Your Company Name',
-            'company_address': 'Your Company Address',
-            'company_phone': 'Your Company Phone',
-            'company_email': 'Your Company Email',
-            'generated_date': shipment.created_at,
-        })
-        
-        # Configure fonts
-        font_config = FontConfiguration()
-        
-        # Generate PDF
-        html = HTML(string=html_string)
-        pdf = html.write_pdf(font_config=font_config)
-        
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="shipment_{shipment.awb_number}.pdf"'
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-        
-    except Exception as e:
-        logger.error(f"Error generating confirmation PDF for shipment {shipment.id}: {str(e)}")
-        return HttpResponse(
-            f"Error generating PDF: {str(e)}", 
-            status=500, 
-            content_type='text/plain'
+        pdf_file = open(path, 'rb')
+    except FileNotFoundError:
+        pdf = render_shipment_pdf(shipment, document_type)
+        store_pdf(path, pdf)
+        try:
+            pdf_file = open(path, 'rb')
+        except FileNotFoundError:
+            return io.BytesIO(pdf), time.time()
+    return pdf_file, os.fstat(pdf_file.fileno()).st_mtime
+
+def shipment_pdf_response(shipment, document_type, request=None):
+    """
+    Serve a shipment PDF from the render-once cache.
+    Conditional requests matching the ETag or Last-Modified get a 304.
+    Last-Modified is the time the cached file was rendered, so it also moves
+    on changes that carry no timestamp, such as a new template version.
+    """
+    if not shipment:
+        raise Http404("Shipment not found")
+
+    digest = get_pdf_digest(shipment, document_type)
+    etag = quote_etag(digest)
+    pdf_file, last_modified = open_shipment_pdf(shipment, document_type, digest)
+
+    response = None
+    if request is not None:
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        filename = PDF_DOCUMENTS[document_type]['filename'].format(awb_number=shipment.awb_number)
+        response = FileResponse(
+            pdf_file,
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=filename,
         )
+    else:
+        pdf_file.close()
 
-def generate_shipment_detailed_pdf(shipment):
-    """Generate a detailed PDF for the given shipment."""
+    # PDFs carry personal data: browsers may keep them but must revalidate
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _generate_pdf(shipment, document_type, request=None):
     try:
-        if not shipment:
-            raise Http404("Shipment not found")
-        
-        # Generate barcode
-        barcode_data = generate_barcode(shipment.awb_number)
-        
-        # Render HTML template
-        html_string = render_to_string('shipments/pdf/shipment_detailed.html', {
-            'shipment': shipment,
-            'barcode_data': barcode_data,
-            'company_name': 'Your Company Name',
-            'company_address': 'Your Company Address',
-            'company_phone': 'Your Company Phone',
-            'company_email': 'Your Company Email',
-            'generated_date': shipment.created_at,
-        })
-        
-        # Configure fonts
-        font_config = FontConfiguration()
-        
-        # Generate PDF
-        html = HTML(string=html_string)
-        pdf = html.write_pdf(font_config=font_config)
-        
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="shipment_detailed_{shipment.awb_number}.pdf"'
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-        
+        return shipment_pdf_response(shipment, document_type, request)
+    except Http404:
+        raise
     except Exception as e:
-        logger.error(f"Error generating detailed PDF for shipment {shipment.id}: {str(e)}")
+        logger.error(f"Error generating {document_type} PDF for shipment {shipment.id}: {str(e)}")
         return HttpResponse(
-            f"Error generating PDF: {str(e)}", 
-            status=500, 
+            f"Error generating PDF: {str(e)}",
+            status=500,
             content_type='text/plain'
         )
 
-def generate_shipment_label_pdf(shipment):
+def generate_shipment_confirmation_pdf(shipment, request=None):
+    """Generate a confirmation PDF for the given shipment."""
+    return _generate_pdf(shipment, 'confirmation', request)
+
+def generate_shipment_detailed_pdf(shipment, request=None):
+    """Generate a detailed PDF for the given shipment."""
+    return _generate_pdf(shipment, 'detailed', request)
+
+def generate_shipment_label_pdf(shipment, request=None):
     """Generate a shipping label PDF for the given shipment."""
-    try:
-        if not shipment:
-            raise Http404("Shipment not found")
-        
-        # Generate barcode
-        barcode_data = generate_barcode(shipment.awb_number)
-        
-        # Render HTML template
-        html_string = render_to_string('shipments/pdf/shipment_label.html', {
-            'shipment': shipment,
-            'barcode_data': barcode_data,
-            'company_name': 'Your Company Name',
-            'company_address': 'Your Company Address',
-            'company_phone': 'Your Company Phone',
-            'company_email': 'Your Company Email',
-            'generated_date': shipment.created_at,
-        })
-        
-        # Configure fonts
-        font_config = FontConfiguration()
-        
-        # Generate PDF
-        html = HTML(string=html_string)
-        pdf = html.write_pdf(font_config=font_config)
-        
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="label_{shipment.awb_number}.pdf"'
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-        
-    except Exception as e:
-        logger.error(f"Error generating label PDF for shipment {shipment.id}: {str(e)}")
-        return HttpResponse(
-            f"Error generating PDF: {str(e)}", 
-            status=500, 
-            content_type='text/plain'
-        ) 
\ No newline at end of file
+    return _generate_pdf(shipment, 'label', request)
@@ -0,0 +1,178 @@
+"""
+Database-backed queue for rendering shipment PDFs outside the web workers.
+
+Views enqueue a ``PDFRenderJob``; ``run_pdf_workers`` starts a pool of
+processes that claim pending jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``
+and render them into the PDF cache, from where the download endpoint serves
+them. Finished jobs are deleted after ``PDF_RENDER_JOB_RETENTION`` seconds.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from shipments.models import PDFRenderJob, Shipment
+from .pdf_cache import get_pdf_cache_path, get_pdf_digest
+from .pdf_generator import get_or_render_shipment_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def get_job_timeout():
+    """Seconds after which a running job is considered abandoned by a dead worker."""
+    return getattr(settings, 'PDF_RENDER_JOB_TIMEOUT', 300)
+
+
+def get_job_max_attempts():
+    """Claims of a job before it is given up on, e.g. because its PDF keeps crashing the worker."""
+    return getattr(settings, 'PDF_RENDER_JOB_MAX_ATTEMPTS', 3)
+
+
+def get_job_retention():
+    """Seconds finished jobs are kept, so clients can still poll them."""
+    return getattr(settings, 'PDF_RENDER_JOB_RETENTION', 86400)
+
+
+def enqueue_pdf_render(shipment, document_type):
+    """
+    Return a job rendering the given PDF, reusing a queued one when possible.
+    If the PDF is already cached, the returned job is already done; one done
+    job per cached PDF is shared by every request for it.
+    """
+    digest = get_pdf_digest(shipment, document_type)
+    if get_pdf_cache_path(shipment, document_type, digest).exists():
+        done_job = PDFRenderJob.objects.filter(
+            shipment=shipment,
+            document_type=document_type,
+            status='done',
+            digest=digest,
+        ).order_by('-created_at').first()
+        if done_job:
+            return done_job
+        now = timezone.now()
+        return PDFRenderJob.objects.create(
+            shipment=shipment,
+            document_type=document_type,
+            status='done',
+            digest=digest,
+            started_at=now,
+            finished_at=now,
+        )
+
+    active_jobs = PDFRenderJob.objects.filter(
+        shipment=shipment,
+        document_type=document_type,
+        status__in=['pending', 'running'],
+    )
+    active_job = active_jobs.first()
+    if active_job:
+        return active_job
+    try:
+        with transaction.atomic():
+            return PDFRenderJob.objects.create(shipment=shipment, document_type=document_type)
+    except IntegrityError:
+        # A concurrent request queued the same PDF first
+        active_job = active_jobs.first()
+        if active_job is None:
+            raise
+        return active_job
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending (or abandoned) job as running and return it.
+    Abandoned jobs that already used up their attempts are marked failed.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=get_job_timeout())
+    max_attempts = get_job_max_attempts()
+    with transaction.atomic():
+        PDFRenderJob.objects.filter(
+            status='running', started_at__lt=stale_before, attempts__gte=max_attempts,
+        ).update(
+            status='failed',
+            error=f'Abandoned by the worker {max_attempts} time(s)',
+            finished_at=now,
+            updated_at=now,
+        )
+        job = (
+            PDFRenderJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending')
+                | Q(status='running', started_at__lt=stale_before, attempts__lt=max_attempts)
+            )
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """
+    Render the PDF of a claimed job into the cache and record the outcome.
+    The outcome is only written while the job is still this worker's claim:
+    a render that outlived the job timeout may have been claimed again, or
+    failed, in the meantime.
+    """
+    try:
+        shipment = Shipment.objects.with_geography().get(pk=job.shipment_id)
+        job.digest = get_pdf_digest(shipment, job.document_type)
+        get_or_render_shipment_pdf(shipment, job.document_type, job.digest)
+        job.status = 'done'
+        job.error = ''
+    except Exception as e:
+        logger.exception(f"Error rendering {job.document_type} PDF for shipment {job.shipment_id}")
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    owned = PDFRenderJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+        status=job.status,
+        digest=job.digest,
+        error=job.error,
+        finished_at=job.finished_at,
+        updated_at=job.finished_at,
+    )
+    if not owned:
+        logger.warning(f"PDF render job {job.pk} was claimed again or finished before attempt {job.attempts} ended")
+    return job
+
+
+def purge_finished_jobs():
+    """Delete the done and failed jobs finished before the retention period; return how many."""
+    finished_before = timezone.now() - timedelta(seconds=get_job_retention())
+    deleted, _ = PDFRenderJob.objects.filter(
+        status__in=['done', 'failed'], finished_at__lt=finished_before,
+    ).delete()
+    return deleted
+
+
+def run_worker(poll_interval=1.0, exit_when_idle=False, purge_interval=3600):
+    """
+    Process jobs one by one, sleeping while the queue is empty, and purge
+    finished jobs every ``purge_interval`` seconds. Returns the number of jobs run.
+    """
+    processed = 0
+    last_purge = None
+    while True:
+        close_old_connections()
+        if last_purge is None or time.monotonic() - last_purge >= purge_interval:
+            purge_finished_jobs()
+            last_purge = time.monotonic()
+        job = claim_next_job()
+        if job is None:
+            if exit_when_idle:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
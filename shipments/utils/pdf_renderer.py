@@ -0,0 +1,82 @@
+"""
+Reusable WeasyPrint renderer for shipment PDFs.
+
+Building a ``FontConfiguration`` and parsing the ``<style>`` block of a PDF
+template are a large share of a render, and both give the same result every
+time. ``PDFRenderer`` keeps a warmed font configuration and the template
+stylesheets pre-compiled into ``CSS`` objects, strips the inline styles from
+the rendered HTML and passes the compiled stylesheets to WeasyPrint instead.
+
+WeasyPrint objects are not meant to be shared between threads, so the
+warmed state is kept per thread. ``warm_up`` warms the calling thread and
+remembers the templates; any other thread, such as a request thread of a
+threaded Gunicorn worker, warms them all before its first render.
+"""
+import re
+import threading
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+
+
+class PDFRenderer:
+    """Render Django templates to PDF, reusing fonts and stylesheets between renders."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._warm_templates = []
+
+    @property
+    def font_config(self):
+        font_config = getattr(self._local, 'font_config', None)
+        if font_config is None:
+            font_config = self._local.font_config = FontConfiguration()
+            self._local.stylesheets = {}
+            self._warm(self._warm_templates)
+        return font_config
+
+    def get_stylesheets(self, template_name):
+        """Return the compiled stylesheets of a template's ``<style>`` blocks."""
+        font_config = self.font_config
+        stylesheets = self._local.stylesheets.get(template_name)
+        if stylesheets is None:
+            # Style blocks only hold static CSS, so an empty context is enough
+            source = render_to_string(template_name, {})
+            # @font-face rules register their fonts with this thread's font configuration
+            stylesheets = [
+                CSS(string=css, font_config=font_config)
+                for css in STYLE_BLOCK_RE.findall(source)
+            ]
+            # Keep picking up template edits during development
+            if not settings.DEBUG:
+                self._local.stylesheets[template_name] = stylesheets
+        return stylesheets
+
+    def render(self, template_name, context):
+        """Render a template with the given context and return the PDF bytes."""
+        stylesheets = self.get_stylesheets(template_name)
+        html_string = STYLE_BLOCK_RE.sub('', render_to_string(template_name, context))
+        html = HTML(string=html_string)
+        return html.write_pdf(stylesheets=stylesheets, font_config=self.font_config)
+
+    def warm_up(self, template_names):
+        """
+        Load fonts and compile stylesheets ahead of the first real render, in
+        this thread now and in every other thread when it first renders.
+        """
+        self._warm_templates = list(dict.fromkeys([*self._warm_templates, *template_names]))
+        self._warm(template_names)
+
+    def _warm(self, template_names):
+        for template_name in template_names:
+            HTML(string='<p>warm-up</p>').write_pdf(
+                stylesheets=self.get_stylesheets(template_name),
+                font_config=self.font_config,
+            )
+
+
+renderer = PDFRenderer()